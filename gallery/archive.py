@@ -0,0 +1,341 @@
+# gallery/archive.py
+#
+# Album / selection ka ZIP download, on the fly: koi temp file nahi, memory
+# constant (64 KB blocks). Saari entries "stored" (no compression) - JPEG/MP4
+# pehle se compressed hain, aur isi se archive ka exact size pehle se pata
+# hota hai: Content-Length milta hai aur Range se toota download resume hota
+# hai. CRC-32 stream karte waqt banta hai (data descriptor me jaata hai) aur
+# Blob.crc32 me save - resume pe pichhli files dobara nahi padhni padti.
+# 4 GB se badi files / archives ke liye ZIP64.
+
+import hashlib
+import os
+import struct
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header
+
+from .models import Blob
+from .serving import STREAM_BLOCK_SIZE, UNSATISFIABLE, is_async_request, parse_range
+
+ZIP64_LIMIT = 0xFFFFFFFF
+MAX_ENTRIES = 0xFFFF
+MARKER = 0xFFFFFFFF  # "asli value ZIP64 extra field me hai"
+
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+END_RECORD = struct.Struct("<IHHHHIIH")
+ZIP64_END_RECORD = struct.Struct("<IQHHIIQQQQ")
+ZIP64_LOCATOR = struct.Struct("<IIQI")
+
+FLAGS = 0x08 | 0x800  # data descriptor (CRC baad me) + UTF-8 names
+VERSION = 20
+VERSION_ZIP64 = 45
+MADE_BY = (3 << 8) | VERSION_ZIP64  # unix
+FILE_MODE = 0o100644 << 16
+
+
+def clamp(value):
+    # Classic 32-bit field; bada ho to marker, value ZIP64 record me
+    return value if value < ZIP64_LIMIT else MARKER
+
+
+def dos_datetime(value):
+    value = timezone.localtime(value) if timezone.is_aware(value) else value
+    if value.year < 1980:
+        return 0, (1 << 5) | 1  # 1980-01-01, DOS epoch
+    time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    date = ((value.year - 1980) << 9) | (value.month << 5) | value.day
+    return time, date
+
+
+def entry_names(media):
+    # ZIP me same naam do baar - "IMG_1 (2).jpg"
+    seen = set()
+    for item in media:
+        name = (item.display_name or f"file-{item.pk}").replace("\\", "_")
+        base, ext = os.path.splitext(name.replace("/", "_"))
+        name, n = base + ext, 1
+        while name.lower() in seen:
+            n += 1
+            name = f"{base} ({n}){ext}"
+        seen.add(name.lower())
+        yield name
+
+
+class Entry:
+    def __init__(self, media, name):
+        self.media = media
+        self.name = name.encode("utf-8")
+        self.size = media.size
+        self.crc = media.blob.crc32 if media.blob_id else None
+        self.time, self.date = dos_datetime(media.taken_at or media.uploaded_at)
+        self.offset = 0
+
+    @property
+    def zip64(self):
+        return self.size >= ZIP64_LIMIT
+
+    def local_header(self):
+        extra = struct.pack("<HHQQ", 1, 16, 0, 0) if self.zip64 else b""
+        size = MARKER if self.zip64 else 0  # asli size descriptor me
+        return (
+            LOCAL_HEADER.pack(
+                0x04034B50,
+                VERSION_ZIP64 if self.zip64 else VERSION,
+                FLAGS,
+                0,  # stored
+                self.time,
+                self.date,
+                0,
+                size,
+                size,
+                len(self.name),
+                len(extra),
+            )
+            + self.name
+            + extra
+        )
+
+    def descriptor(self):
+        if self.zip64:
+            return struct.pack("<IIQQ", 0x08074B50, self.crc, self.size, self.size)
+        return struct.pack("<IIII", 0x08074B50, self.crc, self.size, self.size)
+
+    def central_header(self):
+        fields = [self.size, self.size] if self.zip64 else []
+        if self.offset >= ZIP64_LIMIT:
+            fields.append(self.offset)
+        extra = (
+            struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields)
+            if fields
+            else b""
+        )
+        return (
+            CENTRAL_HEADER.pack(
+                0x02014B50,
+                MADE_BY,
+                VERSION_ZIP64 if extra else VERSION,
+                FLAGS,
+                0,
+                self.time,
+                self.date,
+                self.crc,
+                clamp(self.size),
+                clamp(self.size),
+                len(self.name),
+                len(extra),
+                0,
+                0,
+                0,
+                FILE_MODE,
+                clamp(self.offset),
+            )
+            + self.name
+            + extra
+        )
+
+    def local_length(self):
+        return LOCAL_HEADER.size + len(self.name) + (20 if self.zip64 else 0)
+
+    def descriptor_length(self):
+        return 24 if self.zip64 else 16
+
+    def central_length(self):
+        fields = (2 if self.zip64 else 0) + (self.offset >= ZIP64_LIMIT)
+        return CENTRAL_HEADER.size + len(self.name) + (4 + 8 * fields if fields else 0)
+
+
+class ZipArchive:
+    """Deterministic store-only ZIP; any byte range can be regenerated."""
+
+    def __init__(self, media):
+        self.entries = [
+            Entry(item, name) for item, name in zip(media, entry_names(media))
+        ]
+        self.computed = []  # naye CRCs - stream ke end me Blob pe save
+        self.parts = []  # (offset, length, kind, entry)
+        offset = 0
+        for entry in self.entries:
+            entry.offset = offset
+            for kind, length in (
+                ("local", entry.local_length()),
+                ("data", entry.size),
+                ("descriptor", entry.descriptor_length()),
+            ):
+                self.parts.append((offset, length, kind, entry))
+                offset += length
+        self.cd_offset = offset
+        for entry in self.entries:
+            self.parts.append((offset, entry.central_length(), "central", entry))
+            offset += entry.central_length()
+        self.cd_size = offset - self.cd_offset
+        end = self.end_records()
+        self.parts.append((offset, len(end), "end", None))
+        self.size = offset + len(end)
+
+    def etag(self):
+        hasher = hashlib.sha256()
+        for entry in self.entries:
+            media = entry.media
+            key = f"{media.pk}:{media.file.name}:{entry.size}:{entry.time}:{entry.date}"
+            hasher.update(key.encode() + b":" + entry.name + b"\0")
+        return f'"zip-{hasher.hexdigest()[:32]}"'
+
+    def end_records(self):
+        count = len(self.entries)
+        records = b""
+        if (
+            count >= MAX_ENTRIES
+            or self.cd_offset >= ZIP64_LIMIT
+            or self.cd_size >= ZIP64_LIMIT
+        ):
+            zip64_offset = self.cd_offset + self.cd_size
+            records += ZIP64_END_RECORD.pack(
+                0x06064B50,
+                ZIP64_END_RECORD.size - 12,
+                MADE_BY,
+                VERSION_ZIP64,
+                0,
+                0,
+                count,
+                count,
+                self.cd_size,
+                self.cd_offset,
+            )
+            records += ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_offset, 1)
+        return records + END_RECORD.pack(
+            0x06054B50,
+            0,
+            0,
+            min(count, MAX_ENTRIES),
+            min(count, MAX_ENTRIES),
+            clamp(self.cd_size),
+            clamp(self.cd_offset),
+            0,
+        )
+
+    # ====================== BYTES ======================
+    def header(self, kind, entry):
+        if kind == "local":
+            return entry.local_header()
+        if kind == "end":
+            return self.end_records()
+        self.ensure_crc(entry)
+        return entry.descriptor() if kind == "descriptor" else entry.central_header()
+
+    def ensure_crc(self, entry):
+        # Resume me file ka shuru wala hissa bheja hi nahi - CRC ke liye padho
+        if entry.crc is None:
+            crc = 0
+            for block in self.read(entry, 0, entry.size):
+                crc = zlib.crc32(block, crc)
+            self.remember_crc(entry, crc)
+
+    def remember_crc(self, entry, crc):
+        entry.crc = crc
+        self.computed.append(entry)
+
+    def read(self, entry, start, stop):
+        with entry.media.file.storage.open(entry.media.file.name, "rb") as fh:
+            fh.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                block = fh.read(min(STREAM_BLOCK_SIZE, remaining))
+                if not block:
+                    # Size pehle hi Content-Length me ja chuka - chhoti file pe abort
+                    raise OSError(f"{entry.media.file.name} is shorter than expected")
+                remaining -= len(block)
+                yield block
+
+    def data(self, entry, start, stop):
+        if entry.crc is not None or start > 0:
+            yield from self.read(entry, start, stop)
+            return
+        crc = 0
+        for block in self.read(entry, start, stop):
+            crc = zlib.crc32(block, crc)
+            yield block
+        if stop == entry.size:
+            self.remember_crc(entry, crc)
+
+    def chunks(self, start=0, stop=None):
+        """Yield bytes start..stop (exclusive) of the archive."""
+        stop = self.size if stop is None else stop
+        for offset, length, kind, entry in self.parts:
+            if offset + length <= start or length == 0:
+                continue
+            if offset >= stop:
+                break
+            lo, hi = max(start - offset, 0), min(stop - offset, length)
+            if kind == "data":
+                yield from self.data(entry, lo, hi)
+            else:
+                yield self.header(kind, entry)[lo:hi]
+
+    def save_crcs(self):
+        blobs = [
+            Blob(pk=entry.media.blob_id, crc32=entry.crc)
+            for entry in self.computed
+            if entry.media.blob_id
+        ]
+        if blobs:
+            Blob.objects.bulk_update(blobs, ["crc32"])
+        self.computed = []
+
+    def stream(self, start, stop):
+        try:
+            yield from self.chunks(start, stop)
+        finally:
+            self.save_crcs()
+
+    async def astream(self, start, stop):
+        # ASGI: har block thread me bane, event loop sirf bhejta hai
+        chunks = self.chunks(start, stop)
+        step = sync_to_async(next, thread_sensitive=False)
+        try:
+            while (chunk := await step(chunks, None)) is not None:
+                yield chunk
+        finally:
+            await sync_to_async(chunks.close, thread_sensitive=False)()
+            await sync_to_async(self.save_crcs)()
+
+
+def serve_archive(request, queryset, name):
+    media = list(queryset.select_related("blob").order_by("uploaded_at", "id"))
+    archive = ZipArchive(media)
+    etag = archive.etag()
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        use_range = request.headers.get("If-Range", etag) == etag
+        byte_range = (
+            parse_range(request.headers.get("Range"), archive.size)
+            if use_range
+            else None
+        )
+        if byte_range is UNSATISFIABLE:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{archive.size}"
+            return response
+        start, end = byte_range or (0, archive.size - 1)
+        stream = archive.astream if is_async_request(request) else archive.stream
+        response = StreamingHttpResponse(
+            stream(start, end + 1),
+            status=206 if byte_range else 200,
+            content_type="application/zip",
+        )
+        if byte_range:
+            response["Content-Range"] = f"bytes {start}-{end}/{archive.size}"
+        response["Content-Length"] = end - start + 1
+        response["Accept-Ranges"] = "bytes"
+        response["Content-Disposition"] = content_disposition_header(
+            True, f"{name}.zip"
+        )
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
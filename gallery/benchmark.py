@@ -0,0 +1,417 @@
+# gallery/benchmark.py
+#
+# Synthetic library seed karke gallery/urls.py ka har URL test client se
+# chalao: latency aur query count record, aur declared query budget se zyada
+# ho to fail. Budget data size pe depend nahi karta - isliye budget ke andar
+# rehna matlab view O(1) queries me hai (N+1 nahi). Har request rolled-back
+# transaction me chalta hai, taaki delete/restore jaise views har repeat pe
+# same data dekhein.
+#
+# `manage.py benchmark` (throwaway test DB) aur BenchmarkTests dono yahi
+# module use karte hain.
+
+import os
+import platform
+import statistics
+from datetime import timedelta
+from time import perf_counter
+from types import SimpleNamespace
+
+import django
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from .models import Album, Job, MediaDerivative, MediaFile, MediaTag, Tag, UploadSession
+from .similarity import hash_fields
+from .stats import rebuild_stats
+from .tags import reindex
+from .uploads import create_staging_file, staging_path
+
+PASSWORD = "benchmark"
+MEDIA_TYPES = ("photo", "photo", "video", "document")
+CAMERAS = ("iPhone 15", "Pixel 8", "EOS R6", "")
+PROBE_BYTES = bytes(range(256)) * 64
+
+
+# url name -> max queries per request, kisi bhi library size pe
+QUERY_BUDGETS = {
+    "home": 7,
+    "upload": 18,
+    "chunked_upload_init": 5,
+    "chunked_upload_status": 4,
+    "chunked_upload_chunk": 8,
+    "chunked_upload_finalize": 20,
+    "photos_list": 7,
+    "videos_list": 7,
+    "docs_list": 7,
+    "delete_file": 9,
+    "media_detail": 9,
+    "album_list": 6,
+    "album_create": 5,
+    "album_edit": 6,
+    "album_delete": 7,
+    "album_detail": 8,
+    "album_download": 4,
+    "add_to_album": 10,
+    "remove_from_album": 8,
+    "global_search": 7,
+    "export_media": 5,
+    "toggle_favorite": 5,
+    "trash_bin": 6,
+    "duplicate_clusters": 7,
+    "restore_file": 11,
+    "empty_trash": 5,
+    "toggle_theme": 6,
+    "public_share": 3,
+    "media_file": 5,
+    "derivative_file": 5,
+    "revoke_share": 10,
+    "shared_media_file": 3,
+    "share_link": 5,
+    "bulk_media_action": 10,
+    "media_jobs": 6,
+    "job_status": 5,
+    "perf_stats": 4,
+    "tag_cloud": 5,
+    "bulk_add_tags": 10,
+    "bulk_remove_tags": 9,
+}
+
+
+class Case:
+    """One request against a named URL; callables get the seeded fixture."""
+
+    def __init__(
+        self,
+        name,
+        method="get",
+        args=None,
+        data=None,
+        body=None,
+        anonymous=False,
+        before=None,
+        headers=None,
+    ):
+        self.name = name
+        self.method = method
+        self.args = args or (lambda f: [])
+        self.data = data or (lambda f: {})
+        self.body = body  # raw request body (chunk PUT)
+        self.anonymous = anonymous
+        # Disk pe jo rollback se wapas nahi aata (staged upload) - har run se pehle
+        self.before = before or (lambda f: None)
+        self.headers = headers or {}
+
+
+CASES = [
+    Case("home"),
+    Case("upload"),
+    Case(
+        "upload",
+        "post",
+        data=lambda f: {"file": ContentFile(os.urandom(2048), name="bench.jpg")},
+    ),
+    Case(
+        "chunked_upload_init",
+        "post",
+        data=lambda f: {"filename": "clip.mp4", "size": "4096"},
+    ),
+    Case("chunked_upload_status", args=lambda f: [f.session.pk]),
+    Case(
+        "chunked_upload_chunk",
+        "put",
+        args=lambda f: [f.session.pk],
+        data=lambda f: {"offset": 0},
+        body=b"x" * 1024,
+    ),
+    Case(
+        "chunked_upload_finalize",
+        "post",
+        args=lambda f: [f.staged.pk],
+        before=lambda f: stage_upload(f.staged),
+    ),
+    Case("photos_list"),
+    Case("photos_list", data=lambda f: {"category": "camera", "camera": "pixel 8"}),
+    Case("videos_list"),
+    Case("docs_list"),
+    Case("delete_file", args=lambda f: [f.photo.pk]),
+    Case("media_detail", args=lambda f: [f.photo.pk]),
+    Case("album_list"),
+    Case("album_create"),
+    Case("album_create", "post", data=lambda f: {"name": "Bench album"}),
+    Case("album_edit", args=lambda f: [f.album.pk]),
+    Case(
+        "album_edit",
+        "post",
+        args=lambda f: [f.album.pk],
+        data=lambda f: {"name": "Renamed"},
+    ),
+    Case("album_delete", args=lambda f: [f.album.pk]),
+    Case("album_detail", args=lambda f: [f.album.pk]),
+    # Seed files disk pe nahi hain - Range se sirf pehla local header
+    Case(
+        "album_download",
+        args=lambda f: [f.album.pk],
+        headers={"Range": "bytes=0-29"},
+    ),
+    Case("add_to_album", args=lambda f: [f.album.pk, f.video.pk]),
+    Case("remove_from_album", args=lambda f: [f.album.pk, f.photo.pk]),
+    Case("global_search"),
+    Case("global_search", data=lambda f: {"q": "bench", "type": "photo"}),
+    Case("global_search", data=lambda f: {"tag": "tag1", "favorite": "1"}),
+    Case("export_media", data=lambda f: {"ids": [f.photo.pk, f.video.pk]}),
+    Case(
+        "export_media", data=lambda f: {"q": "bench"}, headers={"Range": "bytes=0-29"}
+    ),
+    Case("toggle_favorite", args=lambda f: [f.photo.pk]),
+    Case("trash_bin"),
+    Case("duplicate_clusters"),
+    Case("restore_file", args=lambda f: [f.trashed.pk]),
+    Case("empty_trash", "post"),
+    Case("toggle_theme"),
+    Case("public_share", args=lambda f: [f.photo.share_token], anonymous=True),
+    Case("media_file", args=lambda f: [f.photo.pk]),
+    Case("derivative_file", args=lambda f: [f.photo.pk, "thumb"]),
+    Case("revoke_share", "post", args=lambda f: [f.photo.pk]),
+    Case("shared_media_file", args=lambda f: [f.photo.share_token], anonymous=True),
+    Case("share_link", args=lambda f: [f.photo.pk]),
+    Case(
+        "bulk_media_action",
+        "post",
+        data=lambda f: {"action": "favorite", "ids": f.page_ids},
+    ),
+    Case(
+        "bulk_media_action",
+        "post",
+        data=lambda f: {
+            "action": "add_to_album",
+            "album": f.album.pk,
+            "ids": f.page_ids,
+        },
+    ),
+    Case("media_jobs", args=lambda f: [f.photo.pk]),
+    Case("job_status", args=lambda f: [f.job.pk]),
+    Case("perf_stats"),
+    Case("tag_cloud"),
+    Case(
+        "bulk_add_tags",
+        "post",
+        data=lambda f: {"ids": f.page_ids, "tags": "new, bench"},
+    ),
+    Case(
+        "bulk_remove_tags", "post", data=lambda f: {"ids": f.page_ids, "tags": "tag1"}
+    ),
+]
+
+
+# ====================== SEED ======================
+def seed_library(user, files, albums, tags):
+    # Dobara call karo to library badhti hai (scaling checks)
+    start = MediaFile.objects.filter(user=user).count()
+    now = timezone.now()
+    media = []
+    for i in range(start, start + files):
+        media_type = MEDIA_TYPES[i % len(MEDIA_TYPES)]
+        trashed = i % 10 == 9
+        extension = {"photo": "jpg", "video": "mp4", "document": "pdf"}[media_type]
+        # Teen-teen ke group me same hash - duplicates page pe clusters
+        phash = (i // 3 * 0x9E3779B97F4A7C15) & ((1 << 64) - 1)
+        media.append(
+            MediaFile(
+                user=user,
+                file=f"bench/{user.pk}/{i}.{extension}",
+                original_name=f"bench {i}.{extension}",
+                media_type=media_type,
+                size=1024 * (i + 1),
+                category="camera" if i % 2 else None,
+                is_favorite=i % 7 == 0,
+                is_deleted=trashed,
+                deleted_at=now if trashed else None,
+                taken_at=now - timedelta(days=i),
+                camera_model=CAMERAS[i % len(CAMERAS)] if media_type == "photo" else "",
+                **(hash_fields(phash) if media_type == "photo" else {}),
+            )
+        )
+    media = MediaFile.objects.bulk_create(media)
+
+    MediaDerivative.objects.bulk_create(
+        MediaDerivative(
+            media=item,
+            size_name=size_name,
+            file=f"bench/{user.pk}/{item.pk}_{size_name}.jpg",
+            width=px,
+            height=px * 3 // 4,
+            checksum=f"{item.pk:016x}",
+        )
+        for item in media
+        if item.media_type == "photo"
+        for size_name, px in (("thumb", 256), ("preview", 1024))
+    )
+
+    album_rows = Album.objects.bulk_create(
+        Album(user=user, name=f"Album {i}") for i in range(albums)
+    )
+    live = [item for item in media if not item.is_deleted]
+    if album_rows:
+        MediaFile.albums.through.objects.bulk_create(
+            MediaFile.albums.through(
+                album_id=album_rows[i % len(album_rows)].pk, mediafile_id=item.pk
+            )
+            for i, item in enumerate(live)
+        )
+        for i, album in enumerate(album_rows[: len(live)]):
+            album.cover = live[i]
+        Album.objects.bulk_update(album_rows, ["cover"])
+        Album.refresh_media_counts([album.pk for album in album_rows])
+
+    tag_start = Tag.objects.filter(user=user).count()
+    tag_rows = Tag.objects.bulk_create(
+        Tag(user=user, name=f"tag{i}") for i in range(tag_start, tag_start + tags)
+    )
+    if tag_rows:
+        MediaTag.objects.bulk_create(
+            MediaTag(user=user, media=item, tag=tag_rows[j])
+            for i, item in enumerate(media)
+            for j in {i % len(tag_rows), i * 7 % len(tag_rows)}
+        )
+    reindex([item.pk for item in live])
+    rebuild_stats(user.pk)
+    return media, album_rows
+
+
+def store_probe(instance, content):
+    name = default_storage.save(
+        f"bench/probe/{instance.file.name}", ContentFile(content)
+    )
+    type(instance).objects.filter(pk=instance.pk).update(file=name)
+    instance.file.name = name
+
+
+def stage_upload(session):
+    create_staging_file(session)
+    with open(staging_path(session), "wb") as fh:
+        fh.write(PROBE_BYTES)
+
+
+def seed(users=2, files=200, albums=20, tags=30):
+    """Create synthetic libraries; returns the first user's fixture."""
+    fixture = None
+    for u in range(max(users, 1)):
+        user = User.objects.create_user(
+            username=f"bench{u}", password=PASSWORD, is_staff=u == 0
+        )
+        media, album_rows = seed_library(user, max(files, 8), max(albums, 1), tags)
+        if fixture is None:
+            fixture = SimpleNamespace(user=user, album=album_rows[0])
+            fixture.media = media
+
+    media = fixture.media
+    fixture.photo = next(m for m in media if m.media_type == "photo")
+    fixture.video = next(
+        m
+        for m in media
+        if m.media_type == "video"
+        and not m.is_deleted
+        and not m.albums.filter(pk=fixture.album.pk).exists()
+    )
+    fixture.trashed = next(m for m in media if m.is_deleted)
+    # Bytes serve / save() karne wale views ke liye asli files
+    for item in (fixture.photo, fixture.video, fixture.trashed):
+        store_probe(item, PROBE_BYTES)
+    store_probe(fixture.photo.derivatives.get(size_name="thumb"), PROBE_BYTES[:4096])
+    fixture.page_ids = [m.pk for m in media[:50] if not m.is_deleted]
+
+    fixture.job = Job.objects.create(
+        key=f"process_media:{fixture.photo.pk}",
+        name="process_media",
+        payload={"media_id": fixture.photo.pk},
+        user=fixture.user,
+    )
+    fixture.session = UploadSession.objects.create(
+        user=fixture.user, filename="clip.mp4", total_size=4096
+    )
+    create_staging_file(fixture.session)
+    fixture.staged = UploadSession.objects.create(
+        user=fixture.user,
+        filename="staged.mp4",
+        total_size=len(PROBE_BYTES),
+        received=[[0, len(PROBE_BYTES)]],
+    )
+    return fixture
+
+
+# ====================== RUN ======================
+def request(client, case, fixture):
+    url = reverse(case.name, args=case.args(fixture))
+    data = case.data(fixture)
+    if case.body is not None:
+        url = f"{url}?{urlencode(data)}"
+        return client.generic(
+            case.method.upper(),
+            url,
+            case.body,
+            content_type="application/octet-stream",
+            headers=case.headers,
+        )
+    return getattr(client, case.method)(url, data, headers=case.headers)
+
+
+def measure(client, case, fixture, repeat):
+    timings = []
+    queries = 0
+    status = None
+    for _ in range(repeat):
+        case.before(fixture)
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                start = perf_counter()
+                response = request(client, case, fixture)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                timings.append((perf_counter() - start) * 1000)
+            transaction.set_rollback(True)
+        queries = max(queries, len(captured))
+        status = response.status_code
+    budget = QUERY_BUDGETS.get(case.name)
+    return {
+        "name": case.name,
+        "method": case.method.upper(),
+        "path": reverse(case.name, args=case.args(fixture)),
+        "params": {k: str(v) for k, v in case.data(fixture).items()},
+        "status": status,
+        "runs": len(timings),
+        "queries": queries,
+        "budget": budget,
+        "over_budget": budget is not None and queries > budget,
+        "min_ms": round(min(timings), 2),
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(sorted(timings)[max(0, round(len(timings) * 0.95) - 1)], 2),
+        "max_ms": round(max(timings), 2),
+    }
+
+
+def run(fixture, repeat=5, cases=CASES):
+    """Measure every case; returns a JSON-serialisable report."""
+    owner = Client()
+    owner.login(username=fixture.user.username, password=PASSWORD)
+    anonymous = Client()
+    results = [
+        measure(anonymous if case.anonymous else owner, case, fixture, repeat)
+        for case in cases
+    ]
+    return {
+        "created_at": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "repeat": repeat,
+        "results": results,
+        "over_budget": [r["name"] for r in results if r["over_budget"]],
+    }
@@ -0,0 +1,107 @@
+# gallery/bulk.py
+#
+# Multi-select actions: saari ids ek request me, ownership ek query me.
+# QuerySet.update / bulk_create signals nahi chalate, isliye stats, album
+# counts, search index aur share cache yahin sync hote hain.
+
+from django.utils import timezone
+
+from .caching import invalidate_share
+from .models import Album, MediaFile
+from .search import get_backend
+from .stats import rebuild_stats
+from .tags import reindex
+
+Membership = MediaFile.albums.through
+
+
+def parse_ids(raw):
+    # Kharab values chupchap ignore - filter(pk__in=["abc"]) ValueError deta hai
+    return [int(value) for value in raw if str(value).strip().isdigit()]
+
+
+def owned(user, media_ids):
+    return MediaFile.objects.filter(user=user, pk__in=parse_ids(media_ids))
+
+
+def album_ids_for(media_ids):
+    return set(
+        Membership.objects.filter(mediafile_id__in=media_ids).values_list(
+            "album_id", flat=True
+        )
+    )
+
+
+def set_trashed(user, media_ids, trashed):
+    rows = list(
+        owned(user, media_ids)
+        .filter(is_deleted=not trashed)
+        .values_list("pk", "share_token")
+    )
+    if not rows:
+        return 0
+    ids = [pk for pk, _ in rows]
+    MediaFile.objects.filter(pk__in=ids).update(
+        is_deleted=trashed, deleted_at=timezone.now() if trashed else None
+    )
+
+    if trashed:
+        get_backend().remove_many(ids)
+    else:
+        reindex(ids)
+    rebuild_stats(user.pk)
+    Album.refresh_media_counts(album_ids_for(ids))
+    invalidate_share(*(token for _, token in rows))
+    return len(ids)
+
+
+def trash(user, media_ids):
+    return set_trashed(user, media_ids, True)
+
+
+def restore(user, media_ids):
+    return set_trashed(user, media_ids, False)
+
+
+def set_favorite(user, media_ids, favorite):
+    updated = (
+        owned(user, media_ids)
+        .filter(is_deleted=False)
+        .exclude(is_favorite=favorite)
+        .update(is_favorite=favorite)
+    )
+    if updated:
+        rebuild_stats(user.pk)
+    return updated
+
+
+def favorite(user, media_ids):
+    return set_favorite(user, media_ids, True)
+
+
+def unfavorite(user, media_ids):
+    return set_favorite(user, media_ids, False)
+
+
+def add_to_album(user, album, media_ids):
+    ids = list(
+        owned(user, media_ids).filter(is_deleted=False).values_list("pk", flat=True)
+    )
+    if not ids:
+        return 0
+    Membership.objects.bulk_create(
+        [Membership(album_id=album.pk, mediafile_id=pk) for pk in ids],
+        ignore_conflicts=True,
+    )
+    Album.refresh_media_counts([album.pk])
+    # Cover nahi hai to pehli selected file
+    Album.objects.filter(pk=album.pk, cover__isnull=True).update(cover_id=ids[0])
+    return len(ids)
+
+
+ACTIONS = {
+    "delete": trash,
+    "restore": restore,
+    "favorite": favorite,
+    "unfavorite": unfavorite,
+}
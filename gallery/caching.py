@@ -0,0 +1,52 @@
+# gallery/caching.py
+#
+# Share links ka lookup cache: viral link pe har hit DB tak na jaaye. Soft
+# delete / restore / share revoke hote hi signals se key hat jaati hai.
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import MediaFile
+
+SHARE_CACHE_PREFIX = "gallery:share:"
+
+
+def share_cache_key(token):
+    return f"{SHARE_CACHE_PREFIX}{token}"
+
+
+def share_cache_timeout():
+    return getattr(settings, "SHARE_CACHE_TIMEOUT", 300)
+
+
+def get_shared_media(token):
+    key = share_cache_key(token)
+    media = cache.get(key)
+    if media is None:
+        media = (
+            MediaFile.objects.select_related("blob")
+            .filter(share_token=token, is_deleted=False)
+            .first()
+        )
+        if media is not None:
+            cache.set(key, media, share_cache_timeout())
+    return media
+
+
+async def aget_shared_media(token):
+    # Async views (ASGI) ke liye same lookup - cache aur ORM dono await
+    key = share_cache_key(token)
+    media = await cache.aget(key)
+    if media is None:
+        media = (
+            await MediaFile.objects.select_related("blob")
+            .filter(share_token=token, is_deleted=False)
+            .afirst()
+        )
+        if media is not None:
+            await cache.aset(key, media, share_cache_timeout())
+    return media
+
+
+def invalidate_share(*tokens):
+    cache.delete_many([share_cache_key(token) for token in tokens if token])
@@ -0,0 +1,91 @@
+# gallery/derivatives.py
+#
+# Grid tiles ke liye chhote sizes (thumbnails). Original sirf detail view me
+# serve hota hai, baaki sab jagah yeh derivatives use hote hain.
+
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow optional hai - bina uske original hi serve hoga
+    Image = None
+
+
+DEFAULT_THUMBNAIL_SIZES = {
+    "thumb": 256,
+    "preview": 1024,
+}
+THUMBNAIL_QUALITY = 82
+
+
+def get_sizes():
+    return getattr(settings, "THUMBNAIL_SIZES", DEFAULT_THUMBNAIL_SIZES)
+
+
+def can_generate(media):
+    return Image is not None and media.media_type == "photo" and bool(media.file)
+
+
+def render_derivative(media, size_name):
+    """Return (ContentFile, width, height) for one named size, or None."""
+    max_px = get_sizes()[size_name]
+    try:
+        with media.file.open("rb") as fh:
+            img = Image.open(fh)
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_px, max_px))
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            buf = BytesIO()
+            img.save(buf, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    except (OSError, ValueError):  # corrupt / unsupported image
+        return None
+    return ContentFile(buf.getvalue()), img.width, img.height
+
+
+def generate_derivative(media, size_name):
+    from .models import MediaDerivative
+
+    if not can_generate(media) or size_name not in get_sizes():
+        return None
+
+    rendered = render_derivative(media, size_name)
+    if rendered is None:
+        return None
+    content, width, height = rendered
+
+    derivative, _ = MediaDerivative.objects.get_or_create(
+        media=media, size_name=size_name
+    )
+    if derivative.file:
+        derivative.file.delete(save=False)
+    derivative.width = width
+    derivative.height = height
+    derivative.checksum = hashlib.sha256(content.read()).hexdigest()[:16]
+    content.seek(0)
+    derivative.file.save(f"{media.pk}_{size_name}.jpg", content, save=False)
+    derivative.save()
+    return derivative
+
+
+def generate_derivatives(media):
+    from .models import MediaFile
+
+    made = [
+        derivative
+        for derivative in (generate_derivative(media, name) for name in get_sizes())
+        if derivative is not None
+    ]
+    # Decode fail hua to yaad rakho - generate_thumbnails ise skip karta hai
+    failed = can_generate(media) and len(made) < len(get_sizes())
+    if failed or media.derivatives_failed_at:
+        media.derivatives_failed_at = timezone.now() if failed else None
+        MediaFile.objects.filter(pk=media.pk).update(
+            derivatives_failed_at=media.derivatives_failed_at
+        )
+    return made
@@ -1,24 +1,43 @@
 # gallery/forms.py
 
 from django import forms
+from .mime import OCTET_STREAM, mime_type_for, read_header, sniff
 from .models import MediaFile, Album
 
 
+def media_type_for(name, header=None, mime_type=None):
+    # File ke magic bytes (ya pehle se pata MIME) mile to wahi sach, warna extension
+    mime_type = sniff(header) or mime_type
+    if mime_type and mime_type != OCTET_STREAM:
+        if mime_type.startswith('image/'):
+            return 'photo'
+        if mime_type.startswith('video/'):
+            return 'video'
+        return 'document'
+    ext = name.split('.')[-1].lower()
+    if ext in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
+        return 'photo'
+    elif ext in ['mp4', 'mov', 'avi', 'mkv', 'webm']:
+        return 'video'
+    return 'document'  # pdf, doc, txt, sab document
+
+
 class UploadForm(forms.ModelForm):
     class Meta:
         model = MediaFile
         fields = ['file', 'category']  # sirf file field
 
+    def __init__(self, *args, header=None, **kwargs):
+        # header = upload handler ne stream karte waqt pakde pehle bytes
+        super().__init__(*args, **kwargs)
+        self.header = header
+
     def clean_file(self):
         file = self.cleaned_data.get('file')
         if file:
-            ext = file.name.split('.')[-1].lower()
-            if ext in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
-                self.instance.media_type = 'photo'
-            elif ext in ['mp4', 'mov', 'avi', 'mkv', 'webm']:
-                self.instance.media_type = 'video'
-            else:
-                self.instance.media_type = 'document'  # pdf, doc, txt, sab document
+            header = self.header if self.header is not None else read_header(file)
+            self.instance.media_type = media_type_for(file.name, header)
+            self.instance.mime_type = mime_type_for(file.name, header)
         return file
 
 
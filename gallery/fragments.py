@@ -0,0 +1,105 @@
+# gallery/fragments.py
+#
+# Media cards / grid tiles ka rendered HTML cache. Har card ki key = template
+# + media id + version; version un sab cheezon ka hash hai jo card pe dikhti
+# hain (naam, type, favorite, trash, thumbnail checksum). Save / favorite /
+# delete / naya thumbnail - kuch bhi badla to key khud badal jaati hai, aur
+# purani entry timeout pe mar jaati hai. Template ka source bhi key me hai,
+# isliye deploy ke baad purana markup nahi dikhta.
+#
+# Poore page ke liye ek get_many + sirf misses ka render + ek set_many.
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .models import MediaFile
+
+FRAGMENT_CACHE_PREFIX = "gallery:fragment:"
+DEFAULT_FRAGMENT_TIMEOUT = 24 * 60 * 60
+
+# Grid templates jinke fragments cache hote hain (warm_fragments yahi bharta hai)
+CARD_TEMPLATE = "gallery/_media_card.html"
+TILE_TEMPLATE = "gallery/_media_tile.html"
+
+
+def fragment_cache():
+    return caches[getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")]
+
+
+def fragment_timeout():
+    return getattr(settings, "FRAGMENT_CACHE_TIMEOUT", DEFAULT_FRAGMENT_TIMEOUT)
+
+
+def digest(*parts):
+    text = "|".join(str(part) for part in parts)
+    return hashlib.md5(text.encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+def fragment_version(media):
+    # Thumbnail sirf photo card pe; photo lists derivatives prefetch karti hain
+    thumbnails = (
+        sorted(f"{d.size_name}:{d.checksum}" for d in media.derivatives.all())
+        if media.media_type == "photo"
+        else []
+    )
+    return digest(
+        media.file.name,
+        media.display_name,
+        media.media_type,
+        media.is_favorite,
+        media.is_deleted,
+        ",".join(thumbnails),
+    )
+
+
+def render_fragments(template_name, media, **context):
+    """Return [(media, html)] for media, rendering only cache misses.
+
+    context must not depend on the request - it becomes part of the key.
+    """
+    media = list(media)
+    template = get_template(template_name)
+    # Cached loader ke saath get_template sasta hai - source sirf hash hota hai
+    prefix = (
+        f"{FRAGMENT_CACHE_PREFIX}{digest(template.template.source)}:"
+        f"{digest(*sorted(context.items()))}:"
+    )
+    keys = [f"{prefix}{item.pk}:{fragment_version(item)}" for item in media]
+    cache = fragment_cache()
+    found = cache.get_many(keys)
+    missing = {}
+    for item, key in zip(media, keys):
+        if key not in found:
+            found[key] = missing[key] = template.render({"file": item, **context})
+    if missing:
+        cache.set_many(missing, fragment_timeout())
+    return [(item, mark_safe(found[key])) for item, key in zip(media, keys)]
+
+
+def warm_fragments(queryset, batch_size=500):
+    """Render and cache the search card and list tile of every media."""
+    batch = []
+    warmed = 0
+    media = queryset.prefetch_related("derivatives").order_by("-uploaded_at", "-id")
+    for item in media.iterator(chunk_size=batch_size):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            warmed += warm_batch(batch)
+            batch = []
+    if batch:
+        warmed += warm_batch(batch)
+    return warmed
+
+
+def warm_batch(batch):
+    render_fragments(CARD_TEMPLATE, batch)
+    # List pages (photos/videos/docs) har type ka apna tile
+    for media_type, _ in MediaFile.MEDIA_TYPES:
+        tiles = [item for item in batch if item.media_type == media_type]
+        if tiles:
+            render_fragments(TILE_TEMPLATE, tiles, type=media_type)
+    return len(batch)
@@ -0,0 +1,221 @@
+# gallery/importer.py
+#
+# Purani photo library (phone backup, NAS folder) seedha disk se import -
+# har file ke liye HTTP POST nahi. Worker pool sirf file I/O karta hai (hash,
+# blob storage me copy); DB ka saara kaam main thread me batch me
+# (bulk_create), taaki SQLite pe bhi lock na lade.
+#
+# Restartable: content hash pehle banta hai, aur jo content user ke paas
+# pehle se hai woh skip - beech me ruka import dobara chalao, wahi se aage.
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files import File
+from django.db import transaction
+
+from .forms import media_type_for
+from .jobs import enqueue_many
+from .mime import SNIFF_BYTES, mime_type_for
+from .models import Album, Blob, MediaFile
+from .stats import rebuild_stats
+from .storage import HASH_BLOCK_SIZE, blob_extension, recount_references
+from .tags import reindex
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+FOLDER_MODES = ("category", "album", "none")
+
+Membership = MediaFile.albums.through
+
+
+def walk(root):
+    """Yield (path, folder) for every visible file under root, sorted."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        # .thumbnails, .trashed wagaira - phone backups me bahut hote hain
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+        folder = os.path.relpath(dirpath, root)
+        for name in sorted(filenames):
+            if not name.startswith("."):
+                yield os.path.join(dirpath, name), "" if folder == "." else folder
+
+
+def folder_label(folder):
+    # "2019/Goa Trip" -> "Goa Trip": sabse andar wala folder hi naam hai
+    return os.path.basename(folder)[:50]
+
+
+def hash_file(path):
+    # Ek hi read: hash, size aur MIME sniff ke liye pehle bytes
+    hasher = hashlib.sha256()
+    size = 0
+    header = b""
+    with open(path, "rb") as fh:
+        while block := fh.read(HASH_BLOCK_SIZE):
+            hasher.update(block)
+            size += len(block)
+            if len(header) < SNIFF_BYTES:
+                header += block[: SNIFF_BYTES - len(header)]
+    return hasher.hexdigest(), size, header
+
+
+def scan(path):
+    try:
+        digest, size, header = hash_file(path)
+    except OSError as exc:
+        return path, None, None, None, exc
+    return path, digest, size, header, None
+
+
+def copy_into_storage(blob, path):
+    storage = blob.file.storage
+    name = blob.storage_name()
+    if not storage.exists(name):  # pichhle run me copy ho chuka
+        with open(path, "rb") as fh:
+            name = storage.save(name, File(fh, name=os.path.basename(path)))
+    blob.file.name = name
+    return blob
+
+
+class Importer:
+    """Import a directory tree into one user's library in batches."""
+
+    def __init__(
+        self,
+        user,
+        folders="category",
+        workers=DEFAULT_WORKERS,
+        batch_size=DEFAULT_BATCH_SIZE,
+        dry_run=False,
+        log=None,
+    ):
+        if folders not in FOLDER_MODES:
+            raise ValueError(f"folders must be one of {', '.join(FOLDER_MODES)}")
+        self.user = user
+        self.folders = folders
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.dry_run = dry_run
+        self.log = log or (lambda message: None)
+        self.imported = self.skipped = self.failed = 0
+        self.albums = {}
+
+    def run(self, root):
+        batch = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            self.pool = pool
+            for entry in walk(root):
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+        if self.imported and not self.dry_run:
+            rebuild_stats(self.user.pk)
+        return self
+
+    def import_batch(self, entries):
+        folders = dict(entries)
+        scanned = []
+        for path, digest, size, header, error in self.pool.map(scan, folders):
+            if error is not None:
+                self.failed += 1
+                self.log(f"Skipping unreadable {path}: {error}")
+            else:
+                scanned.append((path, digest, size, header))
+
+        # Restart / duplicate files: jo content user ke paas hai woh dobara nahi
+        digests = {digest for _, digest, _, _ in scanned}
+        existing = dict(
+            MediaFile.objects.filter(
+                user=self.user, blob__sha256__in=digests, is_deleted=False
+            ).values_list("blob__sha256", "pk")
+        )
+        fresh = {}
+        for path, digest, size, header in scanned:
+            if digest in existing or digest in fresh:
+                self.skipped += 1
+            else:
+                fresh[digest] = (path, size, header)
+        self.imported += len(fresh)
+        if self.dry_run or not (fresh or existing):
+            return
+
+        blobs = self.store_blobs(fresh)
+        media = [
+            MediaFile(
+                user=self.user,
+                blob=blobs[digest],
+                file=blobs[digest].file.name,
+                size=size,
+                mime_type=mime_type_for(path, header),
+                original_name=os.path.basename(path)[:255],
+                media_type=media_type_for(path, header),  # UploadForm wala rule
+                category=(
+                    folder_label(folders[path]) or None
+                    if self.folders == "category"
+                    else None
+                ),
+            )
+            for digest, (path, size, header) in fresh.items()
+        ]
+        with transaction.atomic():
+            media = MediaFile.objects.bulk_create(media)
+            recount_references([blob.pk for blob in blobs.values()])
+            if self.folders == "album":
+                # Pehle import hue (existing) bhi - crash album link se pehle hua ho
+                paths = {digest: path for path, digest, _, _ in scanned}
+                self.link_albums(
+                    [(item.pk, folders[paths[item.blob.sha256]]) for item in media]
+                    + [(pk, folders[paths[digest]]) for digest, pk in existing.items()]
+                )
+
+        # bulk_create signals nahi chalata - search index aur thumbnails yahan
+        reindex([item.pk for item in media])
+        enqueue_many(
+            "process_media",
+            [(f"process_media:{item.pk}", {"media_id": item.pk}) for item in media],
+            user=self.user,
+        )
+        self.log(
+            f"{self.imported} imported, {self.skipped} skipped, {self.failed} failed"
+        )
+
+    def store_blobs(self, fresh):
+        known = {blob.sha256: blob for blob in Blob.objects.filter(sha256__in=fresh)}
+        missing = [
+            Blob(
+                sha256=digest,
+                size=size,
+                extension=blob_extension(path),
+                mime_type=mime_type_for(path, header),
+            )
+            for digest, (path, size, header) in fresh.items()
+            if digest not in known
+        ]
+        # Content copy parallel me; row tabhi jab file storage me aa gayi
+        copied = self.pool.map(
+            lambda blob: copy_into_storage(blob, fresh[blob.sha256][0]), missing
+        )
+        Blob.objects.bulk_create(copied, ignore_conflicts=True)
+        return {blob.sha256: blob for blob in Blob.objects.filter(sha256__in=fresh)}
+
+    def link_albums(self, rows):
+        names = {folder_label(folder) for _, folder in rows if folder}
+        for name in names - set(self.albums):
+            album = Album.objects.filter(user=self.user, name=name).first()
+            self.albums[name] = album or Album.objects.create(user=self.user, name=name)
+        links = [
+            Membership(album_id=self.albums[folder_label(folder)].pk, mediafile_id=pk)
+            for pk, folder in rows
+            if folder
+        ]
+        Membership.objects.bulk_create(links, ignore_conflicts=True)
+        album_ids = {link.album_id for link in links}
+        Album.refresh_media_counts(album_ids)
+        for album_id in album_ids:
+            Album.objects.filter(pk=album_id, cover__isnull=True).update(
+                cover_id=next(l.mediafile_id for l in links if l.album_id == album_id)
+            )
@@ -0,0 +1,199 @@
+# gallery/jobs.py
+#
+# Chhoti DB-backed job queue: upload request sirf Job row likhta hai, baaki
+# kaam (thumbnails, metadata, ...) `manage.py run_jobs` worker karta hai.
+# Koi broker nahi - SQLite wale single box pe bhi chalta hai. Claim ek
+# conditional UPDATE hai, isliye kai threads/processes safely saath chalte hain.
+
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+TASKS = {}
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_BACKOFF = 30  # seconds, har retry pe double
+MAX_RETRY_DELAY = 60 * 60
+DEFAULT_LOCK_TIMEOUT = 15 * 60
+STALE_SWEEP_INTERVAL = 60  # seconds
+
+
+def task(name):
+    # @task("process_media") - worker naam se function dhoondhta hai
+    def register(func):
+        TASKS[name] = func
+        return func
+
+    return register
+
+
+def run_eagerly():
+    return getattr(settings, "JOBS_EAGER", False)
+
+
+def retry_delay(attempts):
+    base = getattr(settings, "JOB_RETRY_BACKOFF", DEFAULT_RETRY_BACKOFF)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY))
+
+
+def lock_timeout():
+    return timedelta(
+        seconds=getattr(settings, "JOB_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT)
+    )
+
+
+def enqueue(name, payload=None, key=None, user=None, run_after=None):
+    """Queue a job; an existing job with the same key is returned unchanged."""
+    if name not in TASKS:
+        raise ValueError(f"Unknown job: {name}")
+    job = Job(
+        key=key or f"{name}:{timezone.now().timestamp()}:{os.urandom(4).hex()}",
+        name=name,
+        payload=payload or {},
+        user=user,
+        max_attempts=getattr(settings, "JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS),
+        run_after=run_after or timezone.now(),
+    )
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:  # same key pehle se queue me
+        return Job.objects.get(key=job.key)
+    if run_eagerly():
+        claimed = claim_job(job.pk, "eager")
+        if claimed is not None:
+            run_job(claimed)
+            job.refresh_from_db()
+    return job
+
+
+def enqueue_many(name, jobs, user=None):
+    """Queue (key, payload) pairs with one INSERT; existing keys are skipped."""
+    if name not in TASKS:
+        raise ValueError(f"Unknown job: {name}")
+    now = timezone.now()
+    max_attempts = getattr(settings, "JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+    Job.objects.bulk_create(
+        [
+            Job(
+                key=key,
+                name=name,
+                payload=payload,
+                user=user,
+                max_attempts=max_attempts,
+                run_after=now,
+            )
+            for key, payload in jobs
+        ],
+        ignore_conflicts=True,
+    )
+    if run_eagerly():
+        for job_id in Job.objects.filter(
+            key__in=[key for key, _ in jobs], status=Job.QUEUED
+        ).values_list("pk", flat=True):
+            claimed = claim_job(job_id, "eager")
+            if claimed is not None:
+                run_job(claimed)
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim_job(job_id, worker):
+    # Conditional UPDATE - do workers ek hi job nahi utha sakte
+    claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+        status=Job.RUNNING,
+        locked_by=worker,
+        locked_at=timezone.now(),
+        attempts=F("attempts") + 1,
+    )
+    return Job.objects.get(pk=job_id) if claimed else None
+
+
+def claim_next(worker):
+    ready = Job.objects.filter(status=Job.QUEUED, run_after__lte=timezone.now())
+    for job_id in ready.order_by("run_after", "id").values_list("pk", flat=True)[:10]:
+        job = claim_job(job_id, worker)
+        if job is not None:
+            return job
+    return None
+
+
+def run_job(job):
+    try:
+        TASKS[job.name](**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+    job.locked_by = ""
+    job.locked_at = None
+    job.save(
+        update_fields=[
+            "status",
+            "run_after",
+            "last_error",
+            "finished_at",
+            "locked_by",
+            "locked_at",
+        ]
+    )
+    return job
+
+
+def requeue_stale():
+    # Worker beech me mar gaya - uske RUNNING jobs wapas queue me. Har claim
+    # attempts badhata hai; jo job har baar worker ko gira deta hai woh
+    # max_attempts pe FAILED, warna hamesha ghoomta rahega
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - lock_timeout())
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED,
+        locked_by="",
+        locked_at=None,
+        finished_at=now,
+        last_error="Worker lock expired while running the job",
+    )
+    return stale.update(status=Job.QUEUED, locked_by="", locked_at=None)
+
+
+def work(stop=None, burst=False, poll_interval=1.0):
+    """Worker loop for one thread; returns number of jobs run."""
+    stop = stop or threading.Event()
+    worker = worker_id()
+    done = 0
+    next_sweep = 0
+    while not stop.is_set():
+        close_old_connections()
+        if time.monotonic() >= next_sweep:
+            # Dusre (mare hue) workers ke jobs bhi - sirf startup pe nahi
+            requeue_stale()
+            next_sweep = time.monotonic() + STALE_SWEEP_INTERVAL
+        job = claim_next(worker)
+        if job is None:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job)
+        done += 1
+    close_old_connections()
+    return done
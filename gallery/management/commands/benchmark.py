@@ -0,0 +1,74 @@
+# gallery/management/commands/benchmark.py
+
+import json
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from gallery.benchmark import run, seed
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database, time every gallery URL and check query budgets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2)
+        parser.add_argument("--files", type=int, default=200, help="Per user")
+        parser.add_argument("--albums", type=int, default=20, help="Per user")
+        parser.add_argument("--tags", type=int, default=30, help="Per user")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--output",
+            default="benchmark.json",
+            help="Machine-readable results, compare across releases",
+        )
+
+    def handle(self, *args, **options):
+        # Asli DB / MEDIA_ROOT ko haath nahi lagana - test DB aur temp dirs
+        media_root = tempfile.mkdtemp(prefix="mediavault-bench-")
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                UPLOAD_STAGING_DIR=f"{media_root}/staging",
+                JOBS_EAGER=False,
+                SLOW_REQUEST_MS=float("inf"),
+            ):
+                fixture = seed(
+                    options["users"],
+                    options["files"],
+                    options["albums"],
+                    options["tags"],
+                )
+                report = run(fixture, repeat=options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        report["scale"] = {
+            name: options[name] for name in ("users", "files", "albums", "tags")
+        }
+        with open(options["output"], "w") as fh:
+            json.dump(report, fh, indent=2)
+
+        for result in report["results"]:
+            flag = "  OVER BUDGET" if result["over_budget"] else ""
+            self.stdout.write(
+                f"{result['method']:6} {result['name']:26} {result['status']} "
+                f"{result['queries']:>3}/{result['budget']} queries "
+                f"p50 {result['p50_ms']:.1f}ms p95 {result['p95_ms']:.1f}ms{flag}"
+            )
+        if report["over_budget"]:
+            raise CommandError(
+                "Query budget exceeded: " + ", ".join(report["over_budget"])
+            )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
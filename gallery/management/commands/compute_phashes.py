@@ -0,0 +1,25 @@
+# gallery/management/commands/compute_phashes.py
+
+from django.core.management.base import BaseCommand
+
+from gallery.models import MediaFile
+from gallery.similarity import compute_phash
+
+
+class Command(BaseCommand):
+    help = "Backfill perceptual hashes for photos that do not have one yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Recompute existing hashes too"
+        )
+
+    def handle(self, *args, **options):
+        queryset = MediaFile.objects.filter(media_type="photo")
+        if not options["all"]:
+            queryset = queryset.filter(phash__isnull=True)
+        done = 0
+        for media in queryset.only("id", "file", "media_type").iterator():
+            compute_phash(media)
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f"Hashed {done} photos"))
@@ -0,0 +1,56 @@
+# gallery/management/commands/extract_metadata.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from gallery.metadata import apply_metadata
+from gallery.models import MediaFile
+
+
+def extract_batch(media_ids):
+    done = 0
+    for media in MediaFile.objects.filter(pk__in=media_ids).only(
+        "id", "file", "media_type"
+    ):
+        apply_metadata(media)
+        done += 1
+    return done
+
+
+def extract_batch_in_thread(media_ids):
+    # Har thread apna DB connection khulta hai - kaam ke baad band karo
+    try:
+        return extract_batch(media_ids)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Backfill EXIF / video metadata columns for existing media"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-extract rows that already have metadata",
+        )
+
+    def handle(self, *args, **options):
+        queryset = MediaFile.objects.filter(media_type__in=["photo", "video"])
+        if not options["all"]:
+            queryset = queryset.filter(metadata_extracted_at__isnull=True)
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+        size = options["batch_size"]
+        batches = [ids[i : i + size] for i in range(0, len(ids), size)]
+
+        if options["workers"] <= 1:
+            done = sum(map(extract_batch, batches))
+        else:
+            # Header parsing zyada tar I/O hai - threads kaafi hain
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                done = sum(pool.map(extract_batch_in_thread, batches))
+        self.stdout.write(self.style.SUCCESS(f"Extracted metadata for {done} files"))
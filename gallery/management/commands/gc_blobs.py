@@ -0,0 +1,38 @@
+# gallery/management/commands/gc_blobs.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from gallery.storage import collect_garbage, recount_references
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed blobs no MediaFile references any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=1,
+            help="Skip blobs younger than this (uploads may still be attaching)",
+        )
+        parser.add_argument(
+            "--recount",
+            action="store_true",
+            help="Recompute ref_count from MediaFile rows before collecting",
+        )
+
+    def handle(self, *args, **options):
+        if options["recount"]:
+            recount_references()
+        removed = collect_garbage(
+            grace=timedelta(hours=options["grace_hours"]),
+            dry_run=options["dry_run"],
+        )
+        freed = sum(blob.size for blob in removed)
+        verb = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {len(removed)} blobs ({freed} bytes)")
+        )
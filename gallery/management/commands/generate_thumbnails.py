@@ -0,0 +1,34 @@
+# gallery/management/commands/generate_thumbnails.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from gallery.derivatives import generate_derivatives, get_sizes
+from gallery.models import MediaFile
+
+
+class Command(BaseCommand):
+    help = "Backfill missing thumbnails (pages never generate them while rendering)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Also retry photos whose thumbnails failed before",
+        )
+
+    def handle(self, *args, **options):
+        queryset = MediaFile.objects.filter(media_type="photo", is_deleted=False)
+        if not options["retry_failed"]:
+            queryset = queryset.filter(derivatives_failed_at__isnull=True)
+        queryset = queryset.annotate(made=Count("derivatives")).filter(
+            made__lt=len(get_sizes())
+        )
+        done = failed = 0
+        for media in queryset.iterator():
+            generate_derivatives(media)
+            done += 1
+            failed += media.derivatives_failed_at is not None
+        self.stdout.write(
+            self.style.SUCCESS(f"Processed {done} photos ({failed} failed)")
+        )
@@ -0,0 +1,55 @@
+# gallery/management/commands/import_media.py
+
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from gallery.importer import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WORKERS,
+    FOLDER_MODES,
+    Importer,
+)
+
+
+class Command(BaseCommand):
+    help = "Import a directory tree (e.g. a phone backup) into a user's library"
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("path")
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--folders",
+            choices=FOLDER_MODES,
+            default="category",
+            help="Map each file's folder name to its category or to an album",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+        if not os.path.isdir(options["path"]):
+            raise CommandError(f"{options['path']} is not a directory")
+
+        importer = Importer(
+            user,
+            folders=options["folders"],
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+            log=self.stdout.write,
+        ).run(options["path"])
+
+        verb = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {importer.imported} files "
+                f"({importer.skipped} already present, {importer.failed} failed)"
+            )
+        )
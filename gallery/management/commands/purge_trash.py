@@ -0,0 +1,32 @@
+# gallery/management/commands/purge_trash.py
+
+from django.core.management.base import BaseCommand
+
+from gallery.retention import (
+    PURGE_BATCH_SIZE,
+    expired_trash,
+    purge_expired,
+    retention_days,
+)
+
+
+class Command(BaseCommand):
+    help = "Permanently delete trashed media older than TRASH_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help=f"Override the retention window (default {retention_days()})",
+        )
+        parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            count = expired_trash(options["days"]).count()
+            self.stdout.write(self.style.SUCCESS(f"Would purge {count} files"))
+            return
+        rows, freed = purge_expired(options["days"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {rows} files ({freed} bytes)"))
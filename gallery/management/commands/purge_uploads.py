@@ -0,0 +1,13 @@
+# gallery/management/commands/purge_uploads.py
+
+from django.core.management.base import BaseCommand
+
+from gallery.uploads import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned chunked upload sessions and their staging files"
+
+    def handle(self, *args, **options):
+        purged = purge_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} upload sessions"))
@@ -0,0 +1,38 @@
+# gallery/management/commands/rebuild_library_stats.py
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from gallery.models import LibraryStats
+from gallery.stats import COUNTERS, compute_stats, rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or just verify) the materialized per-user library stats"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only this username")
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Report drift without writing; exits non-zero if any found",
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.all()
+        if options["user"]:
+            users = users.filter(username=options["user"])
+
+        drifted = 0
+        for user in users.iterator():
+            expected = compute_stats(user.pk)
+            stored = LibraryStats.objects.filter(user=user).values(*COUNTERS).first()
+            if stored != expected:
+                drifted += 1
+                self.stdout.write(f"{user.username}: {stored} -> {expected}")
+                if not options["verify"]:
+                    rebuild_stats(user.pk)
+
+        if options["verify"] and drifted:
+            raise CommandError(f"{drifted} user(s) have stale library stats")
+        self.stdout.write(self.style.SUCCESS(f"Checked stats, {drifted} drifted"))
@@ -0,0 +1,20 @@
+# gallery/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+
+from gallery.models import MediaFile
+from gallery.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the global_search full-text index from MediaFile rows"
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        queryset = MediaFile.objects.filter(is_deleted=False)
+        backend.rebuild(queryset)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {queryset.count()} files with {type(backend).__name__}"
+            )
+        )
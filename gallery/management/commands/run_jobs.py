@@ -0,0 +1,87 @@
+# gallery/management/commands/run_jobs.py
+
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from gallery.jobs import requeue_stale, work
+
+
+def run_threads(threads, burst, poll_interval):
+    stop = threading.Event()
+    previous = {}
+    if threading.current_thread() is threading.main_thread():
+        # SIGTERM/Ctrl-C: chal raha job poora karo, phir band
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous[sig] = signal.signal(sig, lambda *args: stop.set())
+    results = []
+    pool = [
+        threading.Thread(
+            target=lambda: results.append(work(stop, burst, poll_interval)),
+            daemon=True,
+        )
+        for _ in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    while any(thread.is_alive() for thread in pool):
+        for thread in pool:
+            thread.join(0.5)
+    for sig, handler in previous.items():
+        signal.signal(sig, handler)
+    return sum(results)
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (thumbnails etc.) from the database queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=getattr(settings, "JOB_WORKER_THREADS", 2),
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=getattr(settings, "JOB_WORKER_PROCESSES", 1),
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling",
+        )
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        stale = requeue_stale()
+        if stale:
+            self.stdout.write(f"Requeued {stale} stale jobs")
+        worker_args = (options["threads"], options["burst"], options["poll_interval"])
+
+        if options["processes"] <= 1:
+            done = run_threads(*worker_args)
+            self.stdout.write(self.style.SUCCESS(f"Ran {done} jobs"))
+            return
+
+        # Fork se pehle connections band - child apne khud kholega
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=run_threads, args=worker_args)
+            for _ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
+        self.stdout.write(self.style.SUCCESS("Workers stopped"))
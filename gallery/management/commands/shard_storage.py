@@ -0,0 +1,32 @@
+# gallery/management/commands/shard_storage.py
+
+from django.core.management.base import BaseCommand
+
+from gallery.sharding import shard_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Move media and thumbnails from date folders to hash-prefix shards "
+        "(resumable: re-run after an interruption)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Print the moves, change nothing"
+        )
+
+    def handle(self, *args, **options):
+        handled = shard_storage(
+            batch_size=max(1, options["batch_size"]),
+            dry_run=options["dry_run"],
+            log=lambda message: self.stdout.write(message),
+        )
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {handled['mediafile']} media files and "
+                f"{handled['mediaderivative']} thumbnails"
+            )
+        )
@@ -0,0 +1,28 @@
+# gallery/management/commands/warm_fragments.py
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from gallery.fragments import warm_fragments
+from gallery.models import MediaFile
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render media cards and grid tiles into the fragment cache "
+        "(run after a deploy; needs a shared CACHES backend)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only this username's library")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = MediaFile.objects.filter(is_deleted=False)
+        if options["user"]:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']!r}")
+            queryset = queryset.filter(user=user)
+        warmed = warm_fragments(queryset, max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Warmed fragments for {warmed} files"))
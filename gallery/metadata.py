@@ -0,0 +1,236 @@
+# gallery/metadata.py
+#
+# Photos ka EXIF (capture time, camera, size, orientation, GPS) aur videos
+# (MP4/MOV) ka duration/resolution - sirf file headers padh ke. Pillow
+# Image.open lazy hai (pixels decode nahi hote), aur MP4 me box headers ke
+# beech seek karte hain, mdat kabhi nahi padhte.
+
+import struct
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow optional - photos ka metadata skip
+    Image = None
+
+from .models import MediaFile
+
+METADATA_FIELDS = (
+    "taken_at",
+    "camera_make",
+    "camera_model",
+    "width",
+    "height",
+    "orientation",
+    "latitude",
+    "longitude",
+    "duration",
+)
+
+# EXIF tag ids
+MAKE, MODEL, ORIENTATION, DATETIME = 271, 272, 274, 306
+EXIF_IFD, GPS_IFD = 0x8769, 0x8825
+DATETIME_ORIGINAL, OFFSET_TIME_ORIGINAL = 36867, 36881
+GPS_LAT_REF, GPS_LAT, GPS_LON_REF, GPS_LON = 1, 2, 3, 4
+
+MP4_EPOCH = datetime(1904, 1, 1, tzinfo=dt_timezone.utc)
+
+
+# ====================== PHOTOS (EXIF) ======================
+def exif_datetime(value, offset=None):
+    try:
+        taken = datetime.strptime(str(value).strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+    if offset:  # OffsetTimeOriginal, e.g. "+05:30"
+        try:
+            return datetime.strptime(
+                f"{taken.isoformat()}{offset.strip()}", "%Y-%m-%dT%H:%M:%S%z"
+            )
+        except ValueError:
+            pass
+    # Camera ka timezone pata nahi - server timezone maan lo
+    return timezone.make_aware(taken)
+
+
+def gps_coordinate(dms, ref):
+    if not dms:
+        return None
+    try:
+        degrees, minutes, seconds = (float(part) for part in dms)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    value = degrees + minutes / 60 + seconds / 3600
+    return -value if ref in ("S", "W") else value
+
+
+def clean_text(value):
+    return str(value or "").strip("\x00 ")[:100]
+
+
+def read_image_metadata(fh):
+    if Image is None:
+        return {}
+    try:
+        img = Image.open(fh)  # lazy: sirf header, pixels nahi
+        exif = img.getexif()
+    except (OSError, ValueError, SyntaxError):
+        return {}
+    width, height = img.size
+    details = exif.get_ifd(EXIF_IFD)
+    gps = exif.get_ifd(GPS_IFD)
+
+    orientation = exif.get(ORIENTATION)
+    if orientation in (5, 6, 7, 8):  # 90° rotated - display size ulta
+        width, height = height, width
+    return {
+        "taken_at": exif_datetime(
+            details.get(DATETIME_ORIGINAL) or exif.get(DATETIME),
+            details.get(OFFSET_TIME_ORIGINAL),
+        ),
+        "camera_make": clean_text(exif.get(MAKE)),
+        "camera_model": clean_text(exif.get(MODEL)),
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "latitude": gps_coordinate(gps.get(GPS_LAT), gps.get(GPS_LAT_REF)),
+        "longitude": gps_coordinate(gps.get(GPS_LON), gps.get(GPS_LON_REF)),
+    }
+
+
+# ====================== VIDEOS (MP4 / MOV) ======================
+def iter_boxes(fh, start, end):
+    # ISO BMFF box headers: (type, payload_start, box_end)
+    offset = start
+    while offset + 8 <= end:
+        fh.seek(offset)
+        header = fh.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:  # 64-bit size
+            size = struct.unpack(">Q", fh.read(8))[0]
+            header_size = 16
+        elif size == 0:  # file ke end tak
+            size = end - offset
+        if size < header_size:
+            return
+        yield kind, offset + header_size, offset + size
+        offset += size
+
+
+def find_box(fh, start, end, kind):
+    for box_kind, payload, box_end in iter_boxes(fh, start, end):
+        if box_kind == kind:
+            return payload, box_end
+    return None
+
+
+def read_mvhd(fh, payload):
+    fh.seek(payload)
+    version = fh.read(1)[0]
+    fh.read(3)  # flags
+    if version == 1:
+        created, _, timescale, duration = struct.unpack(">QQIQ", fh.read(28))
+    else:
+        created, _, timescale, duration = struct.unpack(">IIII", fh.read(16))
+    return created, (duration / timescale if timescale else None)
+
+
+def read_tkhd_size(fh, payload):
+    fh.seek(payload)
+    version = fh.read(1)[0]
+    fh.seek(payload + (88 if version == 1 else 76))
+    width, height = struct.unpack(">II", fh.read(8))
+    return width >> 16, height >> 16  # 16.16 fixed point
+
+
+def read_video_metadata(fh):
+    fh.seek(0, 2)
+    end = fh.tell()
+    try:
+        moov = find_box(fh, 0, end, b"moov")  # mdat ke upar se seek karke
+        if moov is None:
+            return {}
+        metadata = {}
+        mvhd = find_box(fh, *moov, b"mvhd")
+        if mvhd is not None:
+            created, duration = read_mvhd(fh, mvhd[0])
+            metadata["duration"] = duration
+            if created:
+                metadata["taken_at"] = MP4_EPOCH + timedelta(seconds=created)
+        for kind, payload, box_end in iter_boxes(fh, *moov):
+            if kind != b"trak":
+                continue
+            tkhd = find_box(fh, payload, box_end, b"tkhd")
+            if tkhd is None:
+                continue
+            width, height = read_tkhd_size(fh, tkhd[0])
+            if width and height:  # audio track ka size 0 hota hai
+                metadata.update(width=width, height=height)
+                break
+        return metadata
+    except (struct.error, IndexError, OverflowError):
+        return {}  # truncated / non-MP4 container
+
+
+# ====================== EXTRACTION ======================
+def extract_metadata(media):
+    if not media.file or media.media_type not in ("photo", "video"):
+        return {}
+    try:
+        with media.file.open("rb") as fh:
+            if media.media_type == "photo":
+                return read_image_metadata(fh)
+            return read_video_metadata(fh)
+    except OSError:  # file storage se gayab
+        return {}
+
+
+def apply_metadata(media):
+    metadata = extract_metadata(media)
+    values = {name: metadata.get(name) for name in METADATA_FIELDS}
+    values["camera_make"] = values["camera_make"] or ""
+    values["camera_model"] = values["camera_model"] or ""
+    values["metadata_extracted_at"] = timezone.now()
+    # update(): save() file stat karta hai aur signals chalte hain - zaroorat nahi
+    MediaFile.objects.filter(pk=media.pk).update(**values)
+    for name, value in values.items():
+        setattr(media, name, value)
+    return metadata
+
+
+# ====================== FILTERS ======================
+def day_start(value):
+    # "2019-06-01" -> aware datetime; kharab date ignore (filter hi nahi lagega)
+    try:
+        day = parse_date(value or "")
+    except ValueError:
+        return None
+    return day and timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_by_metadata(queryset, params):
+    # ?taken_from=2019-06-01&taken_to=2019-06-30&camera=iPhone&located=1
+    taken_from = day_start(params.get("taken_from"))
+    taken_to = day_start(params.get("taken_to"))
+    camera = (params.get("camera") or "").strip()
+    # __date nahi - column pe seedha range, taaki taken_at index lage
+    if taken_from:
+        queryset = queryset.filter(taken_at__gte=taken_from)
+    if taken_to:
+        queryset = queryset.filter(taken_at__lt=taken_to + timedelta(days=1))
+    if camera:
+        # icontains / iexact index nahi use karte (LIKE / UPPER()) - lower()
+        # wale expression index pe seedha equality
+        queryset = queryset.alias(camera=Lower("camera_model")).filter(
+            camera=camera.lower()
+        )
+    if params.get("located") == "1":
+        queryset = queryset.filter(latitude__isnull=False)
+    return queryset
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0005_mediafile_is_favorite_mediafile_share_token_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size_name', models.CharField(max_length=20)),
+                ('file', models.FileField(upload_to='derivatives/%Y/%m/%d/')),
+                ('width', models.PositiveIntegerField(default=0)),
+                ('height', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('media', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='derivatives', to='gallery.mediafile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('media', 'size_name'), name='unique_media_derivative')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0006_mediaderivative'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='mediafile',
+            options={'ordering': ['-uploaded_at', '-id']},
+        ),
+    ]
@@ -0,0 +1,43 @@
+# SQLite FTS5 search index for global_search (see gallery/search.py)
+
+import os
+
+from django.db import migrations
+
+FTS_TABLE = "gallery_mediafile_fts"
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    MediaFile = apps.get_model("gallery", "MediaFile")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(name, tags, category)"
+        )
+        for media in MediaFile.objects.filter(is_deleted=False).iterator():
+            name = os.path.splitext(os.path.basename(media.file.name or ""))[0]
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, tags, category) "
+                "VALUES (%s, %s, %s, %s)",
+                [media.pk, name, media.tags or "", media.category or ""],
+            )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0007_alter_mediafile_ordering"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
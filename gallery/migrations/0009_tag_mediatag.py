@@ -0,0 +1,110 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0008_mediafile_fts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Purana comma separated column data migration tak legacy_tags me rahega
+        migrations.RenameField(
+            model_name="mediafile",
+            old_name="tags",
+            new_name="legacy_tags",
+        ),
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="MediaTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "media",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_links",
+                        to="gallery.mediafile",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="media_links",
+                        to="gallery.tag",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="tags",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="media_files",
+                through="gallery.MediaTag",
+                to="gallery.tag",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="tag",
+            constraint=models.UniqueConstraint(
+                fields=("user", "name"), name="unique_user_tag"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mediatag",
+            index=models.Index(fields=["user", "tag"], name="mediatag_user_tag_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="mediatag",
+            constraint=models.UniqueConstraint(
+                fields=("media", "tag"), name="unique_media_tag"
+            ),
+        ),
+    ]
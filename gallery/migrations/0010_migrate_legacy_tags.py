@@ -0,0 +1,58 @@
+# Comma separated MediaFile.legacy_tags -> Tag / MediaTag rows
+
+from django.db import migrations
+
+
+def parse_tags(raw):
+    names = []
+    for part in (raw or "").split(","):
+        name = part.strip().lower()[:50]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def forwards(apps, schema_editor):
+    MediaFile = apps.get_model("gallery", "MediaFile")
+    Tag = apps.get_model("gallery", "Tag")
+    MediaTag = apps.get_model("gallery", "MediaTag")
+
+    tag_ids = {}
+    links = []
+    rows = MediaFile.objects.exclude(legacy_tags="").values_list(
+        "id", "user_id", "legacy_tags"
+    )
+    for media_id, user_id, raw in rows.iterator():
+        for name in parse_tags(raw):
+            key = (user_id, name)
+            if key not in tag_ids:
+                tag, _ = Tag.objects.get_or_create(user_id=user_id, name=name)
+                tag_ids[key] = tag.id
+            links.append(
+                MediaTag(media_id=media_id, tag_id=tag_ids[key], user_id=user_id)
+            )
+    MediaTag.objects.bulk_create(links, batch_size=500, ignore_conflicts=True)
+
+
+def backwards(apps, schema_editor):
+    MediaFile = apps.get_model("gallery", "MediaFile")
+    MediaTag = apps.get_model("gallery", "MediaTag")
+
+    names = {}
+    for media_id, name in MediaTag.objects.values_list("media_id", "tag__name"):
+        names.setdefault(media_id, []).append(name)
+    for media_id, tag_names in names.items():
+        MediaFile.objects.filter(id=media_id).update(
+            legacy_tags=", ".join(tag_names)[:500]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0009_tag_mediatag"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0010_migrate_legacy_tags"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="mediafile",
+            name="legacy_tags",
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("gallery", "0011_remove_mediafile_legacy_tags"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LibraryStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="library_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("photo_count", models.PositiveIntegerField(default=0)),
+                ("video_count", models.PositiveIntegerField(default=0)),
+                ("document_count", models.PositiveIntegerField(default=0)),
+                ("favorite_count", models.PositiveIntegerField(default=0)),
+                ("bytes_used", models.PositiveBigIntegerField(default=0)),
+                ("trash_count", models.PositiveIntegerField(default=0)),
+                ("trash_bytes", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_media_count(apps, schema_editor):
+    Album = apps.get_model("gallery", "Album")
+    Through = apps.get_model("gallery", "MediaFile").albums.through
+    live = (
+        Through.objects.filter(album_id=OuterRef("pk"), mediafile__is_deleted=False)
+        .values("album_id")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Album.objects.update(media_count=Coalesce(Subquery(live), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0012_librarystats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="album",
+            name="media_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_media_count, migrations.RunPython.noop),
+    ]
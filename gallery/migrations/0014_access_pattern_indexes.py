@@ -0,0 +1,52 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0013_album_media_count"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="album",
+            index=models.Index(
+                fields=["user", "-updated_at"], name="album_user_recent_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                fields=["user", "is_deleted", "media_type", "-uploaded_at", "-id"],
+                name="media_user_type_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["user", "-uploaded_at", "-id"],
+                name="media_live_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)),
+                fields=["user", "-uploaded_at", "-id"],
+                name="media_trash_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False), ("is_favorite", True)),
+                fields=["user", "-uploaded_at", "-id"],
+                name="media_favorite_recent_idx",
+            ),
+        ),
+    ]
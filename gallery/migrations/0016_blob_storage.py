@@ -0,0 +1,61 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:37
+
+import django.db.models.deletion
+import os
+
+from django.db import migrations, models
+
+
+def backfill_original_name(apps, schema_editor):
+    MediaFile = apps.get_model("gallery", "MediaFile")
+    for media in MediaFile.objects.only("id", "file").iterator():
+        MediaFile.objects.filter(pk=media.pk).update(
+            original_name=os.path.basename(media.file.name or "")[:255]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0015_uploadsession"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Blob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                ("file", models.FileField(max_length=255, upload_to="")),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("extension", models.CharField(blank=True, max_length=10)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="original_name",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="media_files",
+                to="gallery.blob",
+            ),
+        ),
+        migrations.RunPython(backfill_original_name, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0016_blob_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediaderivative",
+            name="checksum",
+            field=models.CharField(blank=True, max_length=16),
+        ),
+    ]
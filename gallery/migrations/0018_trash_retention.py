@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def start_retention_clock(apps, schema_editor):
+    # Purane trash ka delete time pata nahi - window aaj se shuru
+    MediaFile = apps.get_model("gallery", "MediaFile")
+    MediaFile.objects.filter(is_deleted=True, deleted_at__isnull=True).update(
+        deleted_at=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0017_mediaderivative_checksum"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediafile",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)),
+                fields=["deleted_at"],
+                name="media_trash_expiry_idx",
+            ),
+        ),
+        migrations.RunPython(start_retention_clock, migrations.RunPython.noop),
+    ]
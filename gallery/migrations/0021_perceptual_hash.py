@@ -0,0 +1,72 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0020_media_metadata"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediafile",
+            name="phash",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="phash_b0",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="phash_b1",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="phash_b2",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="phash_b3",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["user", "phash_b0"],
+                name="media_phash_b0_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["user", "phash_b1"],
+                name="media_phash_b1_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["user", "phash_b2"],
+                name="media_phash_b2_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["user", "phash_b3"],
+                name="media_phash_b3_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0021_perceptual_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blob",
+            name="crc32",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
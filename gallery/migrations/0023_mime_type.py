@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:20
+
+import mimetypes
+import os
+
+from django.db import migrations, models
+
+
+def backfill_mime_type(apps, schema_editor):
+    # Purani files dobara padhna mehnga - extension se andaza, bytes nahi
+    MediaFile = apps.get_model("gallery", "MediaFile")
+    batch = []
+    for media in MediaFile.objects.only("pk", "file", "original_name").iterator():
+        name = media.original_name or os.path.basename(media.file.name or "")
+        media.mime_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        batch.append(media)
+        if len(batch) >= 1000:
+            MediaFile.objects.bulk_update(batch, ["mime_type"])
+            batch = []
+    MediaFile.objects.bulk_update(batch, ["mime_type"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0022_blob_crc32"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blob",
+            name="mime_type",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="mediafile",
+            name="mime_type",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.RunPython(backfill_mime_type, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0023_mime_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediafile",
+            name="derivatives_failed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
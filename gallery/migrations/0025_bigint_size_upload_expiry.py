@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:51
+
+import gallery.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0024_derivatives_failed_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="expires_at",
+            field=models.DateTimeField(
+                db_index=True, default=gallery.uploads.session_expiry
+            ),
+        ),
+        migrations.AlterField(
+            model_name="mediafile",
+            name="size",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 22:29
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gallery", "0025_bigint_size_upload_expiry"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="mediafile",
+            name="media_live_camera_idx",
+        ),
+        migrations.AddIndex(
+            model_name="mediafile",
+            index=models.Index(
+                models.F("user"),
+                django.db.models.functions.text.Lower("camera_model"),
+                condition=models.Q(("is_deleted", False)),
+                name="media_live_camera_idx",
+            ),
+        ),
+    ]
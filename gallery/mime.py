@@ -0,0 +1,114 @@
+# gallery/mime.py
+#
+# Magic-byte MIME sniffing. Extension jhooth bol sakti hai ("photo.jpg" jo
+# asal me PDF hai) - file ke pehle kuch bytes nahi. Upload stream hote waqt
+# pehla chunk yahan aata hai (storage.HashingUploadHandler), file dobara
+# padhni nahi padti.
+
+import mimetypes
+import struct
+
+SNIFF_BYTES = 64
+OCTET_STREAM = "application/octet-stream"
+
+# (offset, signature, mime) - pehla match jeetta hai. "BM" / "ID3" jaise
+# 2-3 byte prefixes se text files bhi shuru ho sakti hain - unke headers
+# neeche is_bmp / is_id3 validate karte hain
+SIGNATURES = [
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"OggS", "application/ogg"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (0, b"Rar!\x1a\x07", "application/vnd.rar"),
+]
+RIFF_TYPES = {
+    b"WEBP": "image/webp",
+    b"AVI ": "video/x-msvideo",
+    b"WAVE": "audio/wav",
+}
+# ISO base media (MP4/MOV/HEIC/AVIF): "ftyp" box ke baad major brand
+FTYP_BRANDS = {
+    b"qt  ": "video/quicktime",
+    b"heic": "image/heic",
+    b"heix": "image/heic",
+    b"mif1": "image/heif",
+    b"avif": "image/avif",
+    b"avis": "image/avif",
+    b"M4A ": "audio/mp4",
+    b"3gp4": "video/3gpp",
+    b"3gp5": "video/3gpp",
+}
+
+
+# BITMAPINFOHEADER aur uske versions (core, v2-v5)
+BMP_DIB_SIZES = {12, 40, 52, 56, 64, 108, 124}
+
+
+def is_bmp(header):
+    # "BM", file size, 4 reserved (zero), pixel offset, phir DIB header size
+    if len(header) < 18 or header[:2] != b"BM":
+        return False
+    file_size, reserved, offset, dib_size = struct.unpack("<IIII", header[2:18])
+    return (
+        reserved == 0
+        and dib_size in BMP_DIB_SIZES
+        and 14 + dib_size <= offset <= file_size
+    )
+
+
+def is_id3(header):
+    # "ID3", version 2.2-2.4, revision, flags (neeche ke bits hamesha 0),
+    # size 4 syncsafe bytes (har byte < 0x80)
+    if len(header) < 10 or header[:3] != b"ID3":
+        return False
+    major, revision, flags = header[3], header[4], header[5]
+    return (
+        major in (2, 3, 4)
+        and revision != 0xFF
+        and not flags & 0x0F
+        and all(byte < 0x80 for byte in header[6:10])
+    )
+
+
+def sniff(header):
+    """MIME type from the leading bytes, or None if nothing matched."""
+    header = header or b""
+    for offset, signature, mime_type in SIGNATURES:
+        if header[offset : offset + len(signature)] == signature:
+            return mime_type
+    if is_bmp(header):
+        return "image/bmp"
+    if is_id3(header):
+        return "audio/mpeg"
+    if header[:4] == b"RIFF":
+        return RIFF_TYPES.get(header[8:12])
+    if header[4:8] == b"ftyp":
+        return FTYP_BRANDS.get(header[8:12], "video/mp4")
+    if header[:4] == b"\x1a\x45\xdf\xa3":  # EBML
+        return "video/webm" if b"webm" in header else "video/x-matroska"
+    if header[:4] == b"PK\x03\x04":
+        return "application/zip"
+    return None
+
+
+def mime_type_for(name, header=None):
+    # ZIP container (docx/xlsx/epub) ka asli type extension hi batata hai
+    sniffed = sniff(header)
+    guessed = mimetypes.guess_type(name or "")[0]
+    if sniffed == "application/zip" and guessed:
+        return guessed
+    return sniffed or guessed or OCTET_STREAM
+
+
+def read_header(content):
+    # Local upload (memory / temp file) - storage backend nahi
+    content.seek(0)
+    header = content.read(SNIFF_BYTES)
+    content.seek(0)
+    return header
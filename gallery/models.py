@@ -1,10 +1,37 @@
 # gallery/models.py (update kar)
 
 from django.db import models
+from django.db.models.functions import Coalesce, Lower
 from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
 from django.utils import timezone
+import os
 import uuid
 
+from .uploads import session_expiry
+
+
+class Blob(models.Model):
+    # Content-addressed file (gallery/storage.py) - ek content, ek copy
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    extension = models.CharField(max_length=10, blank=True)
+    # Magic bytes se (gallery/mime.py) - hash-only upload bhi yahin se leta hai
+    mime_type = models.CharField(max_length=100, blank=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    # ZIP export (gallery/archive.py) pehli baar stream karte waqt bharta hai
+    crc32 = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256
+
+    def storage_name(self):
+        digest = self.sha256
+        return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}{self.extension}"
+
 
 class MediaFile(models.Model):
     MEDIA_TYPES = (
@@ -15,34 +42,342 @@ class MediaFile(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     file = models.FileField(upload_to="uploads/%Y/%m/%d/")
+    blob = models.ForeignKey(
+        Blob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="media_files",
+    )
+    original_name = models.CharField(max_length=255, blank=True)
     media_type = models.CharField(max_length=10, choices=MEDIA_TYPES, default="photo")
-    size = models.PositiveIntegerField(default=0)
+    size = models.PositiveBigIntegerField(default=0)  # 4 GB+ videos
+    mime_type = models.CharField(max_length=100, blank=True)
     category = models.CharField(max_length=50, blank=True, null=True)
-    tags = models.CharField(
-        max_length=500, blank=True, help_text="Comma separated tags"
-    )
     is_favorite = models.BooleanField(default=False)
     is_deleted = models.BooleanField(default=False)
+    # Trash me kab gaya - retention window isi se (gallery/retention.py)
+    deleted_at = models.DateTimeField(null=True, blank=True)
     share_token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # File headers se nikla metadata (gallery/metadata.py) - filters isi pe
+    taken_at = models.DateTimeField(null=True, blank=True)
+    camera_make = models.CharField(max_length=100, blank=True)
+    camera_model = models.CharField(max_length=100, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    orientation = models.PositiveSmallIntegerField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)  # seconds (video)
+    metadata_extracted_at = models.DateTimeField(null=True, blank=True)
+    # Thumbnails nahi ban sake (corrupt / undecodable, jaise HEIC) - backfill
+    # inhe baar baar decode nahi karta
+    derivatives_failed_at = models.DateTimeField(null=True, blank=True)
+
+    # Perceptual hash (64-bit dHash, signed) + uske 4 x 16-bit bands -
+    # multi-index hashing se near-duplicates (gallery/similarity.py)
+    phash = models.BigIntegerField(null=True, blank=True)
+    phash_b0 = models.PositiveIntegerField(null=True, blank=True)
+    phash_b1 = models.PositiveIntegerField(null=True, blank=True)
+    phash_b2 = models.PositiveIntegerField(null=True, blank=True)
+    phash_b3 = models.PositiveIntegerField(null=True, blank=True)
+
     albums = models.ManyToManyField("Album", related_name="media_files", blank=True)
+    tags = models.ManyToManyField(
+        "Tag", through="MediaTag", related_name="media_files", blank=True
+    )
 
     def __str__(self):
         return self.file.name
 
+    @property
+    def display_name(self):
+        # Blob path hash hota hai - user ko upload wala naam dikhao
+        return self.original_name or os.path.basename(self.file.name or "")
+
     class Meta:
-        ordering = ["-uploaded_at"]
+        ordering = ["-uploaded_at", "-id"]  # keyset pagination isi pe chalti hai
+        indexes = [
+            # photos/videos/docs list: user + live + type, already sorted
+            models.Index(
+                fields=["user", "is_deleted", "media_type", "-uploaded_at", "-id"],
+                name="media_user_type_recent_idx",
+            ),
+            # home recent uploads / search: sirf live rows
+            models.Index(
+                fields=["user", "-uploaded_at", "-id"],
+                name="media_live_recent_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            # trash_bin
+            models.Index(
+                fields=["user", "-uploaded_at", "-id"],
+                name="media_trash_recent_idx",
+                condition=models.Q(is_deleted=True),
+            ),
+            # purge_trash: expire hua trash, oldest first
+            models.Index(
+                fields=["deleted_at"],
+                name="media_trash_expiry_idx",
+                condition=models.Q(is_deleted=True),
+            ),
+            # "2019 trip": capture date range filters
+            models.Index(
+                fields=["user", "taken_at"],
+                name="media_live_taken_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            # ?camera= case-insensitive exact match (metadata.filter_by_metadata)
+            models.Index(
+                "user",
+                Lower("camera_model"),
+                name="media_live_camera_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            # Similar photos: har band ka apna index (multi-index hashing)
+            *[
+                models.Index(
+                    fields=["user", f"phash_b{band}"],
+                    name=f"media_phash_b{band}_idx",
+                    condition=models.Q(is_deleted=False),
+                )
+                for band in range(4)
+            ],
+            # search ?favorite=1
+            models.Index(
+                fields=["user", "-uploaded_at", "-id"],
+                name="media_favorite_recent_idx",
+                condition=models.Q(is_deleted=False, is_favorite=True),
+            ),
+        ]
 
     def delete(self, *args, **kwargs):  # Override for soft delete
         self.is_deleted = True
-        self.save()
+        self.deleted_at = timezone.now()
+        self.save(update_fields=["is_deleted", "deleted_at"])
+
+    def restore(self):
+        self.is_deleted = False
+        self.deleted_at = None
+        self.save(update_fields=["is_deleted", "deleted_at"])
 
     def save(self, *args, **kwargs):
-        if self.file:
-            self.size = self.file.size  # Auto set size on save
+        # Size ingest pe ek baar (storage.attach_blob); yahan sirf naya,
+        # abhi tak save na hua upload - storage stat kabhi nahi
+        if self.file and not self.file._committed:
+            self.size = self.file.size
         super().save(*args, **kwargs)
 
+    def derivative(self, size_name="thumb"):
+        for derivative in self.derivatives.all():  # prefetch friendly
+            if derivative.size_name == size_name and derivative.file:
+                return derivative
+        return None
+
+    def derivative_url(self, size_name="thumb"):
+        # Grid tiles ke liye chhota size; abhi nahi bana to original pe
+        # fallback. Render me decode kabhi nahi - sirf job queue. Din me ek
+        # baar (cache + key me date), taaki har render naya job / INSERT na
+        # kare par delete hue ya naye size wale thumbnails phir se ban jaayein
+        from .derivatives import can_generate
+        from .jobs import enqueue
+
+        derivative = self.derivative(size_name)
+        if derivative is not None:
+            return derivative.url
+        today = timezone.now().date()
+        if (
+            can_generate(self)
+            and not self.derivatives_failed_at
+            and cache.add(f"gallery:derivatives:{self.pk}:{today}", True, 24 * 60 * 60)
+        ):
+            enqueue(
+                "generate_derivatives",
+                {"media_id": self.pk},
+                key=f"generate_derivatives:{self.pk}:{today}",
+                user=self.user,
+            )
+        return reverse("media_file", args=[self.pk]) if self.file else ""
+
+
+class MediaDerivative(models.Model):
+    media = models.ForeignKey(
+        MediaFile, on_delete=models.CASCADE, related_name="derivatives"
+    )
+    size_name = models.CharField(max_length=20)
+    file = models.FileField(upload_to="derivatives/%Y/%m/%d/")
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    # Content hash - URL me version ki tarah, taaki browser immutable cache kare
+    checksum = models.CharField(max_length=16, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.media_id}:{self.size_name}"
+
+    @property
+    def url(self):
+        path = reverse("derivative_file", args=[self.media_id, self.size_name])
+        return f"{path}?v={self.checksum}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["media", "size_name"], name="unique_media_derivative"
+            )
+        ]
+
+
+class Tag(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    name = models.CharField(max_length=50)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "name"], name="unique_user_tag")
+        ]
+
+
+class MediaTag(models.Model):
+    # user yaha bhi rakha hai taaki (user, tag) index se seedha lookup ho
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    media = models.ForeignKey(
+        MediaFile, on_delete=models.CASCADE, related_name="tag_links"
+    )
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="media_links")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["media", "tag"], name="unique_media_tag")
+        ]
+        indexes = [models.Index(fields=["user", "tag"], name="mediatag_user_tag_idx")]
+
+
+class UploadSession(models.Model):
+    # Chunked upload ka state (gallery/uploads.py); received = merged byte ranges
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    category = models.CharField(max_length=50, blank=True, null=True)
+    total_size = models.PositiveBigIntegerField()
+    received = models.JSONField(default=list)
+    media = models.ForeignKey(
+        MediaFile, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    # Chhoda hua session (aur staging file) purge_uploads iske baad hatata hai
+    expires_at = models.DateTimeField(default=session_expiry, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def received_bytes(self):
+        return sum(end - start for start, end in self.received)
+
+    @property
+    def is_complete(self):
+        return self.received == [[0, self.total_size]]
+
+    def as_json(self):
+        return {
+            "upload_id": str(self.pk),
+            "filename": self.filename,
+            "total_size": self.total_size,
+            "received": self.received,
+            "received_bytes": self.received_bytes,
+            "complete": self.is_complete,
+            "media_id": self.media_id,
+            "expires_at": self.expires_at.isoformat(),
+        }
+
+
+class Job(models.Model):
+    # DB-backed background job (gallery/jobs.py) - broker nahi chahiye
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    # Idempotency: same key dobara enqueue ho to naya job nahi banta
+    key = models.CharField(max_length=200, unique=True)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True
+    )
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} [{self.status}]"
+
+    def as_json(self):
+        return {
+            "id": self.pk,
+            "name": self.name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "run_after": self.run_after.isoformat(),
+            "finished_at": self.finished_at and self.finished_at.isoformat(),
+            "error": self.last_error.strip().rsplit("\n", 1)[-1] or None,
+        }
+
+    class Meta:
+        indexes = [
+            # Worker ka claim: queued + run_after aa chuka, oldest pehle
+            models.Index(
+                fields=["run_after", "id"],
+                name="job_ready_idx",
+                condition=models.Q(status="queued"),
+            ),
+        ]
+
+
+class LibraryStats(models.Model):
+    # Har user ka ek row - dashboard isi se padhta hai (gallery/stats.py)
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="library_stats",
+    )
+    photo_count = models.PositiveIntegerField(default=0)
+    video_count = models.PositiveIntegerField(default=0)
+    document_count = models.PositiveIntegerField(default=0)
+    favorite_count = models.PositiveIntegerField(default=0)
+    bytes_used = models.PositiveBigIntegerField(default=0)
+    trash_count = models.PositiveIntegerField(default=0)
+    trash_bytes = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.user}"
+
+    @property
+    def total_bytes(self):
+        return self.bytes_used + self.trash_bytes
+
 
 class Album(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -54,6 +389,8 @@ class Album(models.Model):
         blank=True,
         related_name="album_covers",
     )
+    # Denormalized: album_list pe har album ka COUNT nahi chalana padta
+    media_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -62,7 +399,23 @@ class Album(models.Model):
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            models.Index(fields=["user", "-updated_at"], name="album_user_recent_idx")
+        ]
 
-    @property
-    def media_count(self):
-        return self.media_files.count()
+    @classmethod
+    def refresh_media_counts(cls, album_ids):
+        # Trash wali files count nahi hoti, album_detail jaisa hi
+        live = MediaFile.albums.through.objects.filter(
+            album_id=models.OuterRef("pk"), mediafile__is_deleted=False
+        )
+        cls.objects.filter(pk__in=album_ids).update(
+            media_count=Coalesce(
+                models.Subquery(
+                    live.values("album_id")
+                    .annotate(total=models.Count("pk"))
+                    .values("total")
+                ),
+                0,
+            )
+        )
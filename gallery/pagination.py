@@ -0,0 +1,98 @@
+# gallery/pagination.py
+#
+# Keyset (cursor) pagination, default (uploaded_at, id) pe. OFFSET/COUNT(*)
+# nahi chalta, isliye deep scroll bhi utna hi fast hai jitna pehla page.
+
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+ORDERING = ("-uploaded_at", "-id")
+
+
+def _split(key):
+    return (key[1:], True) if key.startswith("-") else (key, False)
+
+
+def encode_cursor(obj, ordering=ORDERING):
+    values = []
+    for key in ordering:
+        value = getattr(obj, _split(key)[0])
+        values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, model, ordering=ORDERING):
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        decoded = []
+        for key, value in zip(ordering, values):
+            try:
+                field = model._meta.get_field(_split(key)[0])
+            except FieldDoesNotExist:  # annotation, e.g. search rank
+                decoded.append(value)
+            else:
+                decoded.append(field.to_python(value))
+        return decoded
+    except (ValueError, UnicodeDecodeError, ValidationError):
+        return None  # kharab token -> pehle page se shuru, Paginator.get_page jaisa
+
+
+def keyset_filter(ordering, values):
+    # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y), direction ke hisaab se
+    condition = Q()
+    equal = {}
+    for key, value in zip(ordering, values):
+        name, descending = _split(key)
+        step = Q(**equal, **{f"{name}__{'lt' if descending else 'gt'}": value})
+        condition |= step
+        equal[name] = value
+    return condition
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def paginate(queryset, cursor=None, per_page=48, ordering=ORDERING):
+    queryset = queryset.order_by(*ordering)
+    position = decode_cursor(cursor, queryset.model, ordering)
+    if position is not None:
+        queryset = queryset.filter(keyset_filter(ordering, position))
+
+    # Ek extra row fetch karo - usi se pata chalta hai next page hai ya nahi
+    rows = list(queryset[: per_page + 1])
+    items = rows[:per_page]
+    next_cursor = (
+        encode_cursor(items[-1], ordering) if len(rows) > per_page else None
+    )
+    return KeysetPage(items, next_cursor)
+
+
+def next_page_url(request, page):
+    if not page.has_next:
+        return ""
+    params = request.GET.copy()
+    params["cursor"] = page.next_cursor
+    params.pop("fragment", None)
+    return f"{request.path}?{params.urlencode()}"
@@ -0,0 +1,275 @@
+# gallery/performance.py
+#
+# Har request ka hisaab: wall time, DB queries (count + time, execute_wrapper
+# se), template render time aur response size. Browser devtools ke liye
+# Server-Timing header, slow requests ka JSON log (sabse mehngi SQL ke saath),
+# aur per-view percentiles staff endpoint (api/perf/) pe.
+#
+# Aggregates process memory me hain - har worker process apne numbers rakhta
+# hai, restart pe reset.
+
+import json
+import logging
+import threading
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger("gallery.performance")
+
+DEFAULT_SLOW_REQUEST_MS = 500
+DEFAULT_WINDOW = 500  # har view ke last N requests
+DEFAULT_TOP_QUERIES = 5
+SQL_PREVIEW = 500
+
+current_metrics = ContextVar("gallery_request_metrics", default=None)
+
+_timings = defaultdict(deque)
+_timings_lock = threading.Lock()
+
+
+def slow_request_ms():
+    return getattr(settings, "SLOW_REQUEST_MS", DEFAULT_SLOW_REQUEST_MS)
+
+
+def timing_window():
+    return getattr(settings, "PERF_WINDOW", DEFAULT_WINDOW)
+
+
+def top_queries_limit():
+    return getattr(settings, "PERF_TOP_QUERIES", DEFAULT_TOP_QUERIES)
+
+
+# ====================== PER REQUEST ======================
+class RequestMetrics:
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = []  # (sql, ms)
+        self.template_ms = 0.0
+        self.template_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook - params log nahi karte (user data)
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (perf_counter() - start) * 1000))
+
+    @property
+    def db_ms(self):
+        return sum(ms for _, ms in self.queries)
+
+    def elapsed_ms(self):
+        return (perf_counter() - self.started) * 1000
+
+    def top_queries(self, limit):
+        # Same SQL ek group me - N+1 loop ek hi line me dikhe
+        grouped = defaultdict(lambda: [0, 0.0])
+        for sql, ms in self.queries:
+            grouped[sql][0] += 1
+            grouped[sql][1] += ms
+        ranked = sorted(grouped.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {"sql": sql[:SQL_PREVIEW], "count": count, "ms": round(ms, 2)}
+            for sql, (count, ms) in ranked[:limit]
+        ]
+
+
+def record_query(execute, sql, params, many, context):
+    # Permanent wrapper: query jis request ke context me chali usi ke metrics
+    # me. ASGI me saari requests ek hi thread-sensitive connection share
+    # karti hain - per request wrapper lagana/hatana ek doosre ko gin leta tha
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def install_query_hook():
+    # Is thread ke har connection pe ek baar; sabse neeche rakho taaki baaki
+    # execute_wrapper() contexts (LIFO pop) ise na hataayen
+    for alias in connections:
+        wrappers = connections[alias].execute_wrappers
+        if record_query not in wrappers:
+            wrappers.insert(0, record_query)
+
+
+# ====================== TEMPLATES ======================
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        # render_to_string ke andar render_to_string - bahar wala hi gino
+        metrics.template_depth += 1
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_ms += (perf_counter() - start) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that adds render time to the request metrics."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# ====================== AGGREGATES ======================
+def record_timing(view, sample):
+    with _timings_lock:
+        samples = _timings[view]
+        samples.append(sample)
+        while len(samples) > timing_window():
+            samples.popleft()
+
+
+def reset_timings():
+    with _timings_lock:
+        _timings.clear()
+
+
+def percentile(ordered, pct):
+    # Nearest-rank; ordered list khaali nahi honi chahiye
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def timing_summary():
+    """Per-view latency percentiles and averages, slowest p95 first."""
+    with _timings_lock:
+        snapshot = {view: list(samples) for view, samples in _timings.items()}
+    rows = []
+    for view, samples in snapshot.items():
+        totals = sorted(sample["total_ms"] for sample in samples)
+        count = len(samples)
+        rows.append(
+            {
+                "view": view,
+                "count": count,
+                "p50_ms": round(percentile(totals, 50), 2),
+                "p95_ms": round(percentile(totals, 95), 2),
+                "p99_ms": round(percentile(totals, 99), 2),
+                "max_ms": round(totals[-1], 2),
+                "avg_queries": round(sum(s["queries"] for s in samples) / count, 1),
+                "avg_db_ms": round(sum(s["db_ms"] for s in samples) / count, 2),
+                "avg_template_ms": round(
+                    sum(s["template_ms"] for s in samples) / count, 2
+                ),
+                "avg_bytes": round(sum(s["bytes"] or 0 for s in samples) / count),
+            }
+        )
+    return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+
+# ====================== MIDDLEWARE ======================
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "<unresolved>"
+
+
+def response_bytes(response):
+    # Streaming body abhi bheja nahi gaya - Content-Length hi bharosa
+    if response.has_header("Content-Length"):
+        return int(response["Content-Length"])
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+def server_timing(metrics, total_ms):
+    parts = [
+        f'db;dur={metrics.db_ms:.1f};desc="{len(metrics.queries)} queries"',
+        f"tpl;dur={metrics.template_ms:.1f}",
+        f"total;dur={total_ms:.1f}",
+    ]
+    return ", ".join(parts)
+
+
+class PerformanceMiddleware:
+    """Per-request timing: Server-Timing header, slow log, per-view stats."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        install_query_hook()
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        # ORM sync thread me chalta hai (sync_to_async) - hook wahin lagao;
+        # ContextVar us thread tak saath jaata hai
+        await sync_to_async(install_query_hook)()
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total_ms = metrics.elapsed_ms()
+        view = view_name(request)
+        size = response_bytes(response)
+
+        timing = server_timing(metrics, total_ms)
+        if response.has_header("Server-Timing"):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response["Server-Timing"] = timing
+
+        record_timing(
+            view,
+            {
+                "total_ms": total_ms,
+                "queries": len(metrics.queries),
+                "db_ms": metrics.db_ms,
+                "template_ms": metrics.template_ms,
+                "bytes": size,
+            },
+        )
+        if total_ms >= slow_request_ms():
+            record = {
+                "view": view,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 2),
+                "db_ms": round(metrics.db_ms, 2),
+                "queries": len(metrics.queries),
+                "template_ms": round(metrics.template_ms, 2),
+                "bytes": size,
+                "top_queries": metrics.top_queries(top_queries_limit()),
+            }
+            logger.warning("slow_request %s", json.dumps(record, sort_keys=True))
+        return response
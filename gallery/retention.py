@@ -0,0 +1,101 @@
+# gallery/retention.py
+#
+# Trash retention: TRASH_RETENTION_DAYS se purana trash hard delete. Chhote
+# batches me, har batch apni transaction me - lambe locks nahi. Rows ke
+# saath M2M links, album covers (SET_NULL), derivatives aur files bhi jaate
+# hain. Stats/search/album counts/blob refs poore batch ke liye set-based
+# sync hote hain (bulk.set_trashed jaisa) - per-row post_delete handlers
+# signals.bulk_delete() ke andar chup rehte hain.
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import album_ids_for
+from .caching import invalidate_share
+from .models import Album, MediaFile
+from .search import get_backend
+from .signals import bulk_delete
+from .stats import rebuild_stats
+from .storage import collect_garbage, recount_references
+
+DEFAULT_RETENTION_DAYS = 30
+PURGE_BATCH_SIZE = 200
+
+
+def retention_days():
+    return getattr(settings, "TRASH_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+
+
+def expired_trash(days=None, now=None):
+    days = retention_days() if days is None else days
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return MediaFile.objects.filter(is_deleted=True, deleted_at__lt=cutoff)
+
+
+def purge_batch(media_ids):
+    """Hard delete one batch; returns (rows, bytes)."""
+    with transaction.atomic():
+        batch = list(
+            MediaFile.objects.filter(pk__in=media_ids, is_deleted=True)
+            .select_for_update()
+            .prefetch_related("derivatives")
+        )
+        if not batch:
+            return 0, 0
+        # Blob wali files gc_blobs uthayega (doosre rows share kar sakte hain);
+        # purane non-blob uploads aur derivatives sirf isi row ke hain
+        files = [media.file for media in batch if media.file and not media.blob_id]
+        files += [d.file for media in batch for d in media.derivatives.all() if d.file]
+        ids = [media.pk for media in batch]
+        album_ids = album_ids_for(ids)
+        blob_ids = {media.blob_id for media in batch if media.blob_id}
+        with bulk_delete():
+            MediaFile.objects.filter(pk__in=ids).delete()
+
+        get_backend().remove_many(ids)
+        for user_id in {media.user_id for media in batch}:
+            rebuild_stats(user_id)
+        Album.refresh_media_counts(album_ids)
+        recount_references(blob_ids)
+        invalidate_share(*(media.share_token for media in batch))
+        transaction.on_commit(lambda: delete_stored_files(files))
+        # Jin blobs ka aakhri reference gaya, unki file bhi abhi - gc_blobs ka
+        # wait nahi
+        transaction.on_commit(
+            lambda: collect_garbage(grace=timedelta(0), blob_ids=blob_ids)
+        )
+    return len(batch), sum(media.size for media in batch)
+
+
+def delete_stored_files(files):
+    for fieldfile in files:
+        fieldfile.storage.delete(fieldfile.name)
+
+
+def purge(queryset, batch_size=PURGE_BATCH_SIZE):
+    """Purge every trashed row in queryset; returns (rows, bytes)."""
+    queryset = queryset.filter(is_deleted=True).order_by("deleted_at", "pk")
+    rows = freed = 0
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        purged, size = purge_batch(ids)
+        rows += purged
+        freed += size
+    return rows, freed
+
+
+def purge_expired(days=None, batch_size=PURGE_BATCH_SIZE):
+    return purge(expired_trash(days), batch_size)
+
+
+def empty_trash(user, before=None, batch_size=PURGE_BATCH_SIZE):
+    # before: "Empty trash" dabane ka waqt - uske baad trash hui files nahi
+    queryset = MediaFile.objects.filter(user=user)
+    if before is not None:
+        queryset = queryset.filter(deleted_at__lte=before)
+    return purge(queryset, batch_size)
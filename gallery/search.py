@@ -0,0 +1,178 @@
+# gallery/search.py
+#
+# global_search ke peeche full-text index. Default DB (SQLite) pe FTS5
+# virtual table, Postgres pe tsvector - dono same chhote interface ke peeche.
+
+import os
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+FTS_TABLE = "gallery_mediafile_fts"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+BATCH_SIZE = 500
+# save(update_fields=...) me inme se kuch na ho to index waisa hi hai
+INDEXED_FIELDS = {"file", "original_name", "category", "is_deleted"}
+
+
+def document_for(media):
+    # Index me kya jaata hai: file ka naam (bina folder path ke), tags, category
+    name = os.path.splitext(media.display_name)[0]
+    return {
+        "name": name,
+        "tags": ", ".join(tag.name for tag in media.tags.all()),
+        "category": media.category or "",
+    }
+
+
+class BaseSearchBackend:
+    # search() ke results kis order me paginate honge (pagination.py)
+    ordering = ("-uploaded_at", "-id")
+
+    def index(self, media):
+        pass
+
+    def remove(self, media_id):
+        pass
+
+    def index_many(self, media):
+        for item in media:
+            self.index(item)
+
+    def remove_many(self, media_ids):
+        for media_id in media_ids:
+            self.remove(media_id)
+
+    def rebuild(self, queryset):
+        for media in queryset.iterator():
+            self.index(media)
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    # Koi index nahi - purana LIKE '%q%' wala tareeka, unknown DBs ke liye.
+    # file ab blob ka hash path hai - naam original_name me
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(original_name__icontains=query)
+            | Q(tags__name__icontains=query)
+            | Q(category__icontains=query)
+        ).distinct()
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    # FTS5 rank (bm25) jitna chhota utna behtar match
+    ordering = ("search_rank", "-id")
+
+    def index(self, media):
+        self.index_many([media])
+
+    def remove(self, media_id):
+        self.remove_many([media_id])
+
+    def index_many(self, media):
+        # Bulk tag / restore: har batch ek DELETE + ek executemany INSERT,
+        # har row ke do queries nahi
+        media = list(media)
+        self.remove_many([item.pk for item in media])
+        rows = []
+        for item in media:
+            doc = document_for(item)
+            rows.append([item.pk, doc["name"], doc["tags"], doc["category"]])
+        if rows:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {FTS_TABLE} (rowid, name, tags, category) "
+                    "VALUES (%s, %s, %s, %s)",
+                    rows,
+                )
+
+    def remove_many(self, media_ids):
+        media_ids = list(media_ids)
+        with connection.cursor() as cursor:
+            # SQLite ki bound parameters limit ke andar
+            for start in range(0, len(media_ids), BATCH_SIZE):
+                batch = media_ids[start : start + BATCH_SIZE]
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", batch
+                )
+
+    def rebuild(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        super().rebuild(queryset)
+
+    @staticmethod
+    def match_expression(query):
+        # Har word prefix match: "img" -> IMG_1234.jpg bhi mile
+        tokens = TOKEN_RE.findall(query)
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def search(self, queryset, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset.annotate(search_rank=Value(0.0, FloatField()))
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [expression],
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT rank FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                [expression],
+            )
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    # tsvector/tsquery, query time pe banta hai (tags ka StringAgg expression
+    # index me nahi aa sakta) - bade libraries ke liye alag tsvector column chahiye
+    ordering = ("-search_rank", "-id")
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.aggregates import StringAgg
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVector,
+        )
+
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return queryset.annotate(search_rank=Value(0.0, FloatField()))
+        vector = (
+            SearchVector("original_name", weight="A")
+            + SearchVector(StringAgg("tags__name", " "), weight="B")
+            + SearchVector("category", weight="C")
+        )
+        search_query = SearchQuery(
+            " & ".join(f"{token}:*" for token in tokens), search_type="raw"
+        )
+        return (
+            queryset.annotate(search_vector=vector)
+            .filter(search_vector=search_query)
+            .annotate(search_rank=SearchRank(vector, search_query))
+        )
+
+
+BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_backend():
+    path = getattr(settings, "SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    return BACKENDS.get(connection.vendor, BasicSearchBackend)()
@@ -0,0 +1,261 @@
+# gallery/serving.py
+#
+# Media bytes serve karna: Range/206 support (video seek), streaming,
+# ETag/Last-Modified + 304, Cache-Control, aur agar front proxy configured ho
+# to X-Accel-Redirect / X-Sendfile handoff. ASGI pe body async iterator se
+# stream hoti hai (media_vault/asgi.py dekho).
+
+import mimetypes
+import os
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.crypto import salted_hmac
+from django.utils.http import content_disposition_header, http_date
+
+from .transcoding import FORMATS, available_formats, get_variant, negotiate
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_BLOCK_SIZE = 64 * 1024
+UNSATISFIABLE = object()
+
+OWNER_MAX_AGE = 24 * 60 * 60
+SHARED_MAX_AGE = 5 * 60
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def parse_range(header, size):
+    """(start, end) inclusive, None = poori file, UNSATISFIABLE = 416."""
+    match = RANGE_RE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None  # multi-range / kharab header: poori file bhejna allowed hai
+    first, last = match.groups()
+    if first == "":  # bytes=-500 -> aakhri 500 bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return UNSATISFIABLE
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return UNSATISFIABLE
+    return start, end
+
+
+def iter_range(fh, start, length):
+    try:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = fh.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        fh.close()
+
+
+async def aiter_range(fh, start, length):
+    # ASGI: har block thread me padho, event loop block na ho. Sync iterator
+    # dene pe Django ASGI me poori file list() karke memory me le aata hai.
+    read = sync_to_async(fh.read, thread_sensitive=False)
+    try:
+        await sync_to_async(fh.seek, thread_sensitive=False)(start)
+        remaining = length
+        while remaining > 0:
+            block = await read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        await sync_to_async(fh.close, thread_sensitive=False)()
+
+
+def is_async_request(request):
+    return isinstance(request, ASGIRequest)
+
+
+def content_type_for(filename):
+    content_type, _ = mimetypes.guess_type(filename)
+    return content_type or "application/octet-stream"
+
+
+def renders_safely(content_type):
+    # Browser me inline sirf media + PDF. HTML / SVG / baaki sab app ke origin
+    # pe script chala sakte hain (stored XSS) - wo attachment
+    if content_type == "image/svg+xml":
+        return False
+    return content_type == "application/pdf" or content_type.startswith(
+        ("image/", "video/", "audio/")
+    )
+
+
+def media_etag(media):
+    # Strong ETag: blob ho to content hash ka HMAC (raw sha256 bahar nahi jaata -
+    # wahi hash-only upload ki chaabi hai), warna row + size (files immutable hain)
+    if media.blob_id:
+        digest = salted_hmac("gallery.media_etag", media.blob.sha256)
+        return f'"{digest.hexdigest()[:32]}"'
+    return f'"m{media.pk}-{media.size}"'
+
+
+def proxy_handoff(fieldfile):
+    # Bytes Python se na guzren - nginx/apache khud bhej de
+    prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", None)
+    if prefix:
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + fieldfile.name
+        return response
+    header = getattr(settings, "MEDIA_SENDFILE_HEADER", None)
+    if header:
+        response = HttpResponse()
+        response[header] = fieldfile.path
+        return response
+    return None
+
+
+def serve_file(
+    request,
+    fieldfile,
+    filename,
+    etag=None,
+    last_modified=None,
+    cache_control=None,
+    as_attachment=False,
+    proxy=True,
+    content_type=None,
+):
+    content_type = content_type or content_type_for(filename)
+    as_attachment = as_attachment or not renders_safely(content_type)
+    not_modified = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()),
+    )
+    if not_modified is not None:
+        response = not_modified
+    else:
+        response = proxy_handoff(fieldfile) if proxy else None
+        if response is not None:
+            response["Content-Type"] = content_type
+        else:
+            # If-Range purane version ka ho to range nahi, poori file
+            use_range = request.headers.get("If-Range", etag) == etag
+            response = stream_file(request, fieldfile, content_type, use_range)
+        response["Content-Disposition"] = content_disposition_header(
+            as_attachment, filename
+        )
+        response["X-Content-Type-Options"] = "nosniff"
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    if cache_control:
+        patch_cache_control(response, **cache_control)
+    return response
+
+
+def serve_image(request, fieldfile, filename, etag, **kwargs):
+    # ?format=webp (<picture> source) ya Accept header se AVIF/WebP variant
+    # (gallery/transcoding.py); na bane to original
+    fmt = request.GET.get("format")
+    negotiated = fmt is None and bool(available_formats())
+    if negotiated:
+        fmt = negotiate(request.headers.get("Accept"))
+    key = etag.strip('"')  # content version - source badla to naya variant
+    variant = get_variant(fieldfile, key, fmt) if fmt in FORMATS else None
+    if variant is None:
+        response = serve_file(request, fieldfile, filename, etag=etag, **kwargs)
+    else:
+        kwargs["content_type"] = FORMATS[fmt][0]
+        response = serve_file(
+            request,
+            variant,
+            f"{os.path.splitext(filename)[0]}.{fmt}",
+            etag=f'"{key}.{fmt}"',
+            proxy=False,  # variant MEDIA_ROOT me nahi, transcode cache me hai
+            **kwargs,
+        )
+    if negotiated:
+        patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def serve_media(request, media, as_attachment=False, shared=False):
+    # Shared links revoke/trash ho sakte hain - CDN bas thodi der rakhe
+    if shared:
+        cache_control = {"public": True, "max_age": SHARED_MAX_AGE}
+    else:
+        cache_control = {"private": True, "max_age": OWNER_MAX_AGE}
+    options = {
+        # Upload pe sniff hua type - extension (display_name) jhooth bol sakti hai
+        "content_type": media.mime_type or None,
+        "etag": media_etag(media),
+        "last_modified": media.uploaded_at,
+        "cache_control": cache_control,
+        "as_attachment": as_attachment,
+    }
+    if media.media_type == "photo" and not as_attachment:
+        return serve_image(request, media.file, media.display_name, **options)
+    return serve_file(request, media.file, media.display_name, **options)
+
+
+def serve_derivative(request, derivative):
+    # URL me ?v=<checksum> hai - wahi version ho to immutable cache
+    if request.GET.get("v") == derivative.checksum:
+        cache_control = {
+            "private": True,
+            "max_age": IMMUTABLE_MAX_AGE,
+            "immutable": True,
+        }
+    else:
+        cache_control = {"private": True, "no_cache": True}
+    return serve_image(
+        request,
+        derivative.file,
+        os.path.basename(derivative.file.name),
+        etag=f'"{derivative.checksum}"',
+        last_modified=derivative.created_at,
+        cache_control=cache_control,
+    )
+
+
+def stream_file(request, fieldfile, content_type, use_range=True):
+    storage = fieldfile.storage
+    size = storage.size(fieldfile.name)
+    byte_range = parse_range(request.headers.get("Range"), size) if use_range else None
+
+    if byte_range is UNSATISFIABLE:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    fh = storage.open(fieldfile.name, "rb")
+    if byte_range is None and not is_async_request(request):
+        # WSGI: FileResponse -> server ka wsgi.file_wrapper (sendfile)
+        response = FileResponse(fh, content_type=content_type)
+        response["Content-Length"] = size
+    else:
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1
+        stream = aiter_range if is_async_request(request) else iter_range
+        response = StreamingHttpResponse(
+            stream(fh, start, length),
+            status=206 if byte_range else 200,
+            content_type=content_type,
+        )
+        if byte_range:
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = length
+    response["Accept-Ranges"] = "bytes"
+    return response
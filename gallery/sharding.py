@@ -0,0 +1,126 @@
+# gallery/sharding.py
+#
+# upload_to="uploads/%Y/%m/%d/" - ek din ki saari files ek hi directory me.
+# Busy din pe lakhon entries, aur stat/listing bahut dheere. Ye storage
+# backends date folders ki jagah path ke hash se 2 level shards banate hain:
+#
+#   uploads/2024/05/01/IMG_1.jpg  ->  uploads/3f/a2/IMG_1.jpg
+#
+# (256 x 256 directories). blobs/ pehle se content hash se sharded hai
+# (storage.py) - unhe nahi chhedte. Purane rows shard_storage command se
+# migrate hote hain; beech me ruka to dobara chalao, wahin se aage.
+
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Q
+
+try:
+    from storages.backends.s3 import S3Storage
+except ImportError:  # pip install django-storages[s3] (boto3)
+    S3Storage = None
+
+SHARDED_PREFIXES = ("uploads", "derivatives")
+SHARD_RE = re.compile(r"^[^/]+/[0-9a-f]{2}/[0-9a-f]{2}/[^/]+$")
+
+
+def is_sharded(name):
+    return bool(SHARD_RE.match(name))
+
+
+def needs_shard(name):
+    return name.split("/", 1)[0] in SHARDED_PREFIXES and not is_sharded(name)
+
+
+def shard_name(name):
+    """Deterministic sharded path for an uploads/derivatives name."""
+    name = name.replace("\\", "/")
+    if not needs_shard(name):
+        return name
+    # Poore purane path ka hash - same naam ki files bhi alag shards me
+    digest = hashlib.sha1(name.encode()).hexdigest()
+    top = name.split("/", 1)[0]
+    return f"{top}/{digest[:2]}/{digest[2:4]}/{posixpath.basename(name)}"
+
+
+class ShardedStorageMixin:
+    # FileField upload_to ke baad naam yahan se guzarta hai
+    def generate_filename(self, filename):
+        return super().generate_filename(shard_name(filename))
+
+
+class ShardedFileSystemStorage(ShardedStorageMixin, FileSystemStorage):
+    """Local MEDIA_ROOT with hash-prefix shards instead of date folders."""
+
+
+if S3Storage is not None:
+
+    class ShardedS3Storage(ShardedStorageMixin, S3Storage):
+        """S3-compatible bucket (AWS, MinIO) with the same sharded layout."""
+
+
+# ====================== MIGRATION ======================
+def move_file(storage, old, new):
+    if storage.exists(new):  # pichhle run me move ho chuka, row update se pehle ruka
+        return new
+    try:
+        source, target = storage.path(old), storage.path(new)
+    except NotImplementedError:
+        # Remote storage: copy; purana row update ke baad hatta hai
+        with storage.open(old, "rb") as fh:
+            return storage.save(new, fh)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(source, target)
+    return new
+
+
+def unsharded(model):
+    prefixes = Q()
+    for prefix in SHARDED_PREFIXES:
+        prefixes |= Q(file__startswith=f"{prefix}/")
+    return model.objects.filter(prefixes).exclude(file__regex=SHARD_RE.pattern)
+
+
+def shard_batch(model, after=0, batch_size=500, dry_run=False, log=None):
+    """Move one batch of unsharded files; returns (rows, last pk)."""
+    from .caching import invalidate_share
+    from .models import MediaFile
+
+    log = log or (lambda message: None)
+    rows = list(unsharded(model).filter(pk__gt=after).order_by("pk")[:batch_size])
+    for row in rows:
+        old = row.file.name
+        new = shard_name(old)
+        storage = row.file.storage
+        if dry_run:
+            log(f"{old} -> {new}")
+            continue
+        if not storage.exists(old) and not storage.exists(new):
+            log(f"Skipping missing {old}")
+            continue
+        new = move_file(storage, old, new)
+        model.objects.filter(pk=row.pk).update(file=new)
+        if model is MediaFile:
+            invalidate_share(row.share_token)  # cache me purana path
+        if storage.exists(old):
+            storage.delete(old)
+    return len(rows), rows[-1].pk if rows else after
+
+
+def shard_storage(batch_size=500, dry_run=False, log=None):
+    """Migrate every MediaFile / MediaDerivative to sharded paths."""
+    from .models import MediaDerivative, MediaFile
+
+    handled = {}
+    for model in (MediaFile, MediaDerivative):
+        total, after = 0, 0
+        while True:
+            done, after = shard_batch(model, after, batch_size, dry_run, log)
+            total += done
+            if done < batch_size:
+                break
+        handled[model._meta.model_name] = total
+    return handled
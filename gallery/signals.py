@@ -0,0 +1,176 @@
+# gallery/signals.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from . import stats
+from .caching import invalidate_share
+from .jobs import enqueue
+from .storage import release_blob
+from .models import Album, MediaFile
+from .search import INDEXED_FIELDS, get_backend
+
+# Bulk hard delete (retention.purge_batch) stats/search/album counts/blob refs
+# khud set-based sync karta hai - tab per-row delete handlers kuch nahi karte
+bulk_delete_active = ContextVar("gallery_bulk_delete", default=False)
+
+
+@contextmanager
+def bulk_delete():
+    token = bulk_delete_active.set(True)
+    try:
+        yield
+    finally:
+        bulk_delete_active.reset(token)
+
+
+@receiver(post_save, sender=MediaFile)
+def sync_search_index(sender, instance, update_fields=None, **kwargs):
+    # Soft delete (is_deleted=True) hote hi search se bhi hata do
+    if update_fields is not None and not INDEXED_FIELDS & update_fields:
+        return  # favorite toggle, share token - index me kuch nahi badla
+    backend = get_backend()
+    if instance.is_deleted:
+        backend.remove(instance.pk)
+    else:
+        backend.index(instance)
+
+
+@receiver(post_delete, sender=MediaFile)
+def drop_from_search_index(sender, instance, **kwargs):
+    if bulk_delete_active.get():
+        return
+    get_backend().remove(instance.pk)
+
+
+@receiver(m2m_changed, sender=MediaFile.tags.through)
+def sync_search_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        sync_search_index(MediaFile, instance)
+    elif pk_set:  # tag.media_files.add(...) wali side
+        for media in MediaFile.objects.filter(pk__in=pk_set):
+            sync_search_index(MediaFile, media)
+
+
+# ====================== LIBRARY STATS ======================
+@receiver(post_init, sender=MediaFile)
+def remember_stats_state(sender, instance, **kwargs):
+    instance._stats_snapshot = stats.snapshot(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=MediaFile)
+def update_library_stats(sender, instance, created, **kwargs):
+    new = stats.snapshot(instance)
+    old = None if created else getattr(instance, "_stats_snapshot", None)
+    if new is None or (old is None and not created):
+        # Purana state pata nahi (deferred fields) - diff ki jagah recompute
+        stats.rebuild_stats(instance.user_id)
+    else:
+        stats.record_change(old, new)
+    instance._stats_snapshot = new
+
+
+@receiver(post_delete, sender=MediaFile)
+def drop_from_library_stats(sender, instance, **kwargs):
+    if bulk_delete_active.get():
+        return
+    # User delete ho raha ho to stats row bhi ja chuka hoga - dobara mat banao
+    stats.record_change(stats.snapshot(instance), None, create_missing=False)
+
+
+# ====================== ALBUM MEDIA COUNT ======================
+@receiver(m2m_changed, sender=MediaFile.albums.through)
+def update_album_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # clear() ke baad pata nahi chalega kaunse albums the
+        instance._cleared_album_ids = (
+            [instance.pk]
+            if reverse
+            else list(instance.albums.values_list("pk", flat=True))
+        )
+        return
+    if action == "post_clear":
+        Album.refresh_media_counts(getattr(instance, "_cleared_album_ids", []))
+    elif action in ("post_add", "post_remove"):
+        Album.refresh_media_counts([instance.pk] if reverse else pk_set)
+
+
+@receiver(post_init, sender=MediaFile)
+def remember_deleted_state(sender, instance, **kwargs):
+    instance._was_deleted = instance.__dict__.get("is_deleted")
+
+
+@receiver(post_save, sender=MediaFile)
+def sync_album_counts_on_trash(sender, instance, created, **kwargs):
+    # Soft delete / restore se album ka live count badalta hai
+    if not created and instance._was_deleted != instance.is_deleted:
+        Album.refresh_media_counts(instance.albums.values_list("pk", flat=True))
+    instance._was_deleted = instance.is_deleted
+
+
+@receiver(pre_delete, sender=MediaFile)
+def remember_media_albums(sender, instance, **kwargs):
+    if bulk_delete_active.get():
+        return
+    instance._album_ids = list(instance.albums.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=MediaFile)
+def sync_album_counts_on_delete(sender, instance, **kwargs):
+    if bulk_delete_active.get():
+        return
+    Album.refresh_media_counts(getattr(instance, "_album_ids", []))
+
+
+# ====================== BLOB REFERENCES ======================
+@receiver(post_delete, sender=MediaFile)
+def release_media_blob(sender, instance, **kwargs):
+    # Sirf hard delete pe; soft delete (trash) me file abhi bhi chahiye
+    if bulk_delete_active.get():
+        return
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+
+
+# ====================== SHARE CACHE ======================
+@receiver(post_init, sender=MediaFile)
+def remember_share_token(sender, instance, **kwargs):
+    instance._loaded_share_token = instance.__dict__.get("share_token")
+
+
+@receiver(post_save, sender=MediaFile)
+def invalidate_share_on_save(sender, instance, **kwargs):
+    # Token badla (revoke) ho to purana bhi hatao
+    invalidate_share(instance._loaded_share_token, instance.share_token)
+    instance._loaded_share_token = instance.share_token
+
+
+@receiver(post_delete, sender=MediaFile)
+def invalidate_share_on_delete(sender, instance, **kwargs):
+    if bulk_delete_active.get():
+        return
+    invalidate_share(instance.share_token)
+
+
+# ====================== BACKGROUND PROCESSING ======================
+@receiver(post_save, sender=MediaFile)
+def queue_media_processing(sender, instance, created, **kwargs):
+    # Upload request me sirf job row - thumbnails worker (run_jobs) banata hai
+    if created:
+        enqueue(
+            "process_media",
+            {"media_id": instance.pk},
+            key=f"process_media:{instance.pk}",
+            user=instance.user,
+        )
@@ -0,0 +1,215 @@
+# gallery/similarity.py
+#
+# Near-duplicates (burst shots, WhatsApp re-compress): 64-bit dHash aur
+# Hamming distance. Search multi-index hashing se: hash ke 4 x 16-bit bands
+# alag indexed columns me. Pigeonhole - distance <= k ho to kam se kam ek
+# band k // 4 bits ke andar match karega, isliye sirf un bands ke chhote
+# probe sets index se nikalte hain, poori library scan nahi hoti.
+
+from collections import defaultdict
+from itertools import combinations
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow optional - phash nahi banega
+    Image = None
+
+from .models import MediaFile
+
+HASH_SIZE = 8  # 8x8 = 64 bits
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+MAX_THRESHOLD = BANDS * 3 - 1  # band radius 2 tak - probe set chhota rahe
+
+DEFAULT_SIMILAR_THRESHOLD = 8
+DEFAULT_DUPLICATE_THRESHOLD = 3
+SIMILAR_LIMIT = 12
+CLUSTER_CACHE_PREFIX = "gallery:duplicates:"
+CLUSTER_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def similar_threshold():
+    return getattr(settings, "SIMILAR_PHOTO_THRESHOLD", DEFAULT_SIMILAR_THRESHOLD)
+
+
+def duplicate_threshold():
+    return getattr(settings, "DUPLICATE_PHOTO_THRESHOLD", DEFAULT_DUPLICATE_THRESHOLD)
+
+
+# ====================== HASHING ======================
+def dhash(fh):
+    img = Image.open(fh)
+    # JPEG: DCT scaling se chhota decode - poori 12MP image nahi kholni
+    img.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+    img = ImageOps.exif_transpose(img).convert("L")
+    img = img.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    pixels = img.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def to_signed(value):
+    # BigIntegerField signed 64-bit hai
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value):
+    return value & ((1 << 64) - 1)
+
+
+def split_bands(value):
+    return [(value >> (BAND_BITS * band)) & BAND_MASK for band in range(BANDS)]
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def band_probes(value, radius):
+    # value se radius bits tak door saari 16-bit values
+    probes = {value}
+    for distance in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), distance):
+            flipped = value
+            for bit in bits:
+                flipped ^= 1 << bit
+            probes.add(flipped)
+    return probes
+
+
+def hash_fields(value):
+    fields = {"phash": None if value is None else to_signed(value)}
+    for band, part in enumerate(split_bands(value or 0)):
+        fields[f"phash_b{band}"] = None if value is None else part
+    return fields
+
+
+def compute_phash(media):
+    if Image is None or media.media_type != "photo" or not media.file:
+        return None
+    try:
+        with media.file.open("rb") as fh:
+            value = dhash(fh)
+    except (OSError, ValueError, SyntaxError):  # corrupt / unsupported image
+        value = None
+    fields = hash_fields(value)
+    MediaFile.objects.filter(pk=media.pk).update(**fields)
+    for name, field_value in fields.items():
+        setattr(media, name, field_value)
+    return value
+
+
+# ====================== SEARCH ======================
+def similar_to(media, threshold=None, limit=SIMILAR_LIMIT):
+    """Live photos of the same user within threshold bits, closest first."""
+    if media.phash is None:
+        return []
+    threshold = min(
+        similar_threshold() if threshold is None else threshold, MAX_THRESHOLD
+    )
+    target = to_unsigned(media.phash)
+    radius = threshold // BANDS
+
+    # Har band ka alag SELECT (UNION) - har ek apna (user, band) index le,
+    # OR ke saath planner user wale index pe poori library scan kar deta hai
+    live = MediaFile.objects.filter(user_id=media.user_id, is_deleted=False).order_by()
+    per_band = [
+        live.filter(**{f"phash_b{band}__in": band_probes(part, radius)}).values_list(
+            "pk", "phash"
+        )
+        for band, part in enumerate(split_bands(target))
+    ]
+    rows = per_band[0].union(*per_band[1:])
+    matches = sorted(
+        (distance, pk)
+        for pk, phash in rows
+        if pk != media.pk
+        and (distance := hamming(target, to_unsigned(phash))) <= threshold
+    )[:limit]
+
+    # in_bulk dict deta hai - Meta ordering ka sort bekaar
+    found = (
+        MediaFile.objects.order_by()
+        .prefetch_related("derivatives")
+        .in_bulk([pk for _, pk in matches])
+    )
+    results = []
+    for distance, pk in matches:
+        found[pk].distance = distance
+        results.append(found[pk])
+    return results
+
+
+def hash_signature(user):
+    # Ek aggregate query: naya hash, trash / restore / purge, dobara hash -
+    # kuch bhi badla to signature badalta hai aur purane clusters bekaar
+    hashed = MediaFile.objects.filter(user=user, is_deleted=False, phash__isnull=False)
+    signature = hashed.aggregate(
+        count=Count("pk"),
+        ids=Sum("pk"),
+        **{f"b{band}": Sum(f"phash_b{band}") for band in range(BANDS)},
+    )
+    return ":".join(str(signature[name] or 0) for name in sorted(signature))
+
+
+def duplicate_clusters(user, threshold=None):
+    """Groups of near-duplicate photo ids (largest first) for one user.
+
+    Cached per user until their set of hashes changes.
+    """
+    threshold = min(
+        duplicate_threshold() if threshold is None else threshold, MAX_THRESHOLD
+    )
+    key = f"{CLUSTER_CACHE_PREFIX}{user.pk}:{threshold}:{hash_signature(user)}"
+    groups = cache.get(key)
+    if groups is None:
+        groups = find_clusters(user, threshold)
+        cache.set(key, groups, CLUSTER_CACHE_TIMEOUT)
+    return groups
+
+
+def find_clusters(user, threshold):
+    radius = threshold // BANDS
+
+    # Same hash wale pehle hi ek group - bucket me pairwise compare nahi
+    by_hash = defaultdict(list)
+    for pk, phash in MediaFile.objects.filter(
+        user=user, is_deleted=False, phash__isnull=False
+    ).values_list("pk", "phash"):
+        by_hash[to_unsigned(phash)].append(pk)
+
+    tables = [defaultdict(list) for _ in range(BANDS)]
+    for value in by_hash:
+        for band, part in enumerate(split_bands(value)):
+            tables[band][part].append(value)
+
+    parent = {value: value for value in by_hash}
+
+    def find(value):
+        while parent[value] != value:
+            parent[value] = parent[parent[value]]
+            value = parent[value]
+        return value
+
+    for value in by_hash:
+        for band, part in enumerate(split_bands(value)):
+            for probe in band_probes(part, radius):
+                for other in tables[band].get(probe, ()):
+                    if other > value and hamming(value, other) <= threshold:
+                        parent[find(other)] = find(value)
+
+    clusters = defaultdict(list)
+    for value, pks in by_hash.items():
+        clusters[find(value)].extend(pks)
+    groups = [sorted(pks) for pks in clusters.values() if len(pks) > 1]
+    return sorted(groups, key=lambda pks: (-len(pks), pks[0]))
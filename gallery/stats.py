@@ -0,0 +1,96 @@
+# gallery/stats.py
+#
+# Per-user library stats ka materialized row. Upload/delete/restore/favorite
+# pe sirf delta apply hota hai, dashboard pe koi aggregation nahi.
+
+from django.db.models import Count, F, Q, Sum
+
+from .models import LibraryStats, MediaFile
+
+COUNTERS = (
+    "photo_count",
+    "video_count",
+    "document_count",
+    "favorite_count",
+    "bytes_used",
+    "trash_count",
+    "trash_bytes",
+)
+SNAPSHOT_FIELDS = ("user_id", "media_type", "size", "is_deleted", "is_favorite")
+
+
+def snapshot(media):
+    # __dict__ se padho - deferred field pe extra query nahi chahiye
+    values = {name: media.__dict__.get(name) for name in SNAPSHOT_FIELDS}
+    if None in values.values():
+        return None
+    return values
+
+
+def contribution(state):
+    if state is None:
+        return {}
+    if state["is_deleted"]:
+        return {"trash_count": 1, "trash_bytes": state["size"]}
+    return {
+        f"{state['media_type']}_count": 1,
+        "favorite_count": int(state["is_favorite"]),
+        "bytes_used": state["size"],
+    }
+
+
+def apply_delta(user_id, delta, create_missing=True):
+    delta = {name: value for name, value in delta.items() if value}
+    if not delta:
+        return
+    updated = LibraryStats.objects.filter(user_id=user_id).update(
+        **{name: F(name) + value for name, value in delta.items()}
+    )
+    if not updated and create_missing:  # pehli baar - poora compute kar lo
+        rebuild_stats(user_id)
+
+
+def record_change(old, new, create_missing=True):
+    # old/new snapshot() se; None = row exist nahi karta tha / ab nahi karta
+    if old is None and new is None:
+        return
+    if old and new and old["user_id"] != new["user_id"]:
+        record_change(old, None, create_missing)
+        record_change(None, new, create_missing)
+        return
+    user_id = (new or old)["user_id"]
+    before, after = contribution(old), contribution(new)
+    apply_delta(
+        user_id,
+        {name: after.get(name, 0) - before.get(name, 0) for name in COUNTERS},
+        create_missing,
+    )
+
+
+def compute_stats(user_id):
+    live = Q(is_deleted=False)
+    trash = Q(is_deleted=True)
+    totals = MediaFile.objects.filter(user_id=user_id).aggregate(
+        photo_count=Count("id", filter=live & Q(media_type="photo")),
+        video_count=Count("id", filter=live & Q(media_type="video")),
+        document_count=Count("id", filter=live & Q(media_type="document")),
+        favorite_count=Count("id", filter=live & Q(is_favorite=True)),
+        bytes_used=Sum("size", filter=live),
+        trash_count=Count("id", filter=trash),
+        trash_bytes=Sum("size", filter=trash),
+    )
+    return {name: totals[name] or 0 for name in COUNTERS}
+
+
+def rebuild_stats(user_id):
+    stats, _ = LibraryStats.objects.update_or_create(
+        user_id=user_id, defaults=compute_stats(user_id)
+    )
+    return stats
+
+
+def get_stats(user):
+    stats = LibraryStats.objects.filter(user=user).first()
+    if stats is None:
+        stats = rebuild_stats(user.pk)
+    return stats
@@ -0,0 +1,206 @@
+# gallery/storage.py
+#
+# Content-addressed storage: har unique content (SHA-256) ek hi Blob/file,
+# kitne bhi MediaFile rows (aur users) use share kar sakte hain. ref_count
+# hard delete pe ghatta hai; unreferenced blobs collect_garbage() saaf karta hai.
+
+import hashlib
+import os
+from datetime import timedelta
+
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .forms import media_type_for
+from .mime import SNIFF_BYTES, mime_type_for
+from .models import Blob, MediaFile
+
+HASH_BLOCK_SIZE = 1024 * 1024
+GC_BATCH_SIZE = 500
+
+
+class HashingUploadHandler(FileUploadHandler):
+    # FILE_UPLOAD_HANDLERS me sabse pehle: chunks aage pass karta hai aur
+    # saath saath SHA-256 + MIME sniff (pehle bytes) - file dobara padhni
+    # nahi padti. Size agla handler ka UploadedFile.size hai.
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.header = b""
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        if len(self.header) < SNIFF_BYTES:
+            self.header += raw_data[: SNIFF_BYTES - len(self.header)]
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, "upload_digests"):
+            self.request.upload_digests = {}
+            self.request.upload_headers = {}
+        self.request.upload_digests[self.field_name] = self.hasher.hexdigest()
+        self.request.upload_headers[self.field_name] = self.header
+        return None  # file object agla handler banayega
+
+
+def fingerprint(content):
+    """(sha256, leading bytes) in one read of the content."""
+    hasher = hashlib.sha256()
+    header = b""
+    content.seek(0)
+    for block in content.chunks(HASH_BLOCK_SIZE):
+        hasher.update(block)
+        if len(header) < SNIFF_BYTES:
+            header += block[: SNIFF_BYTES - len(header)]
+    content.seek(0)
+    return hasher.hexdigest(), header
+
+
+def hash_content(content):
+    return fingerprint(content)[0]
+
+
+def upload_fingerprint(request, field="file"):
+    # Handler ne stream ke dauraan bana diya ho to wahi, warna ek pass
+    digest = getattr(request, "upload_digests", {}).get(field)
+    if digest is None:
+        return fingerprint(request.FILES[field])
+    return digest, request.upload_headers[field]
+
+
+def find_blob(digest):
+    return Blob.objects.filter(sha256=digest).first()
+
+
+def owned_blob(user, digest):
+    # Sirf wahi blob jo is user ke kisi row (trash bhi) me pehle se hai -
+    # doosre user ka content sirf hash jaan ke nahi milta
+    return Blob.objects.filter(sha256=digest, media_files__user=user).first()
+
+
+def acquire_blob(blob):
+    Blob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+
+
+def release_blob(blob_id):
+    Blob.objects.filter(pk=blob_id, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1
+    )
+
+
+def store_blob(content, name, digest=None, mime_type=""):
+    """Return (blob, created); ek reference le leta hai."""
+    digest = digest or hash_content(content)
+    blob = find_blob(digest)
+    if blob is not None:
+        acquire_blob(blob)
+        return blob, False
+
+    blob = Blob(
+        sha256=digest,
+        size=content.size,
+        extension=blob_extension(name),
+        mime_type=mime_type or mime_type_for(name),
+    )
+    path = blob.storage_name()
+    storage = blob.file.storage
+    if not storage.exists(path):  # crash ke baad bacha hua file ho to wahi
+        path = storage.save(path, content)
+    blob.file.name = path
+    blob.ref_count = 1
+    try:
+        with transaction.atomic():
+            blob.save()
+    except IntegrityError:  # parallel upload ne pehle bana diya
+        blob = find_blob(digest)
+        acquire_blob(blob)
+        return blob, False
+    return blob, True
+
+
+def blob_extension(name):
+    return os.path.splitext(name or "")[1].lower()[:10]
+
+
+def attach_blob(media, blob):
+    # MediaFile.file bhi blob ka path point kare - URLs waise hi chalte rahen
+    media.blob = blob
+    media.file = blob.file.name
+    media.size = blob.size
+    media.mime_type = media.mime_type or blob.mime_type
+
+
+def ingest(media, content, digest=None):
+    # Upload ka content blob me daalo (ya existing blob share karo) - size,
+    # hash aur MIME yahin row pe; baad ke saves storage ko nahi chhoote
+    blob, _ = store_blob(content, content.name, digest, media.mime_type)
+    if not media.original_name:
+        media.original_name = os.path.basename(content.name)[:255]
+    attach_blob(media, blob)
+    return blob
+
+
+def media_from_blob(user, blob, filename, category=None):
+    # Bytes dobara aaye hi nahi - sirf naya row jo same blob share kare
+    media = MediaFile(
+        user=user,
+        original_name=os.path.basename(filename)[:255],
+        category=category or None,
+        media_type=media_type_for(filename, mime_type=blob.mime_type),
+        mime_type=blob.mime_type,
+    )
+    acquire_blob(blob)
+    attach_blob(media, blob)
+    media.save()
+    return media
+
+
+def existing_media_for(user, digest):
+    # "Already have it": isi user ke paas same content pehle se hai?
+    return MediaFile.objects.filter(
+        user=user, blob__sha256=digest, is_deleted=False
+    ).first()
+
+
+def recount_references(blob_ids=None):
+    refs = (
+        MediaFile.objects.filter(blob=OuterRef("pk"))
+        .values("blob")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    blobs = (
+        Blob.objects.all() if blob_ids is None else Blob.objects.filter(pk__in=blob_ids)
+    )
+    return blobs.update(ref_count=Coalesce(Subquery(refs), 0))
+
+
+def collect_garbage(grace=timedelta(hours=1), dry_run=False, blob_ids=None):
+    # grace: abhi abhi bane blobs ko mat chhuo (upload beech me ho sakta hai)
+    cutoff = timezone.now() - grace
+    unreferenced = Blob.objects.filter(
+        ref_count=0, created_at__lt=cutoff, media_files__isnull=True
+    )
+    if blob_ids is not None:
+        unreferenced = unreferenced.filter(pk__in=blob_ids)
+    candidates = list(unreferenced)
+    if dry_run:
+        return candidates
+    removed = []
+    for start in range(0, len(candidates), GC_BATCH_SIZE):
+        batch = {blob.pk: blob for blob in candidates[start : start + GC_BATCH_SIZE]}
+        with transaction.atomic():
+            # Lock ke andar dobara check - beech me koi reference na aa gaya ho
+            still_free = list(
+                Blob.objects.filter(
+                    pk__in=batch, ref_count=0, media_files__isnull=True
+                ).values_list("pk", flat=True)
+            )
+            Blob.objects.filter(pk__in=still_free).delete()
+        for pk in still_free:
+            batch[pk].file.delete(save=False)
+            removed.append(batch[pk])
+    return removed
@@ -0,0 +1,97 @@
+# gallery/tags.py
+#
+# Normalized tags: Tag + MediaTag (through table, (user, tag) pe index).
+# Bulk add/remove aur tag cloud sab yahi se.
+
+from django.db.models import Count, Q
+
+from .models import MediaFile, MediaTag, Tag
+from .search import get_backend
+
+
+def parse_tags(raw):
+    # "Beach, sunset ,beach" -> ["beach", "sunset"]
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    names = []
+    for part in raw:
+        name = part.strip().lower()[:50]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_tags(user, names):
+    Tag.objects.bulk_create(
+        [Tag(user=user, name=name) for name in names], ignore_conflicts=True
+    )
+    return list(Tag.objects.filter(user=user, name__in=names))
+
+
+def reindex(media_ids):
+    media = MediaFile.objects.filter(pk__in=media_ids, is_deleted=False)
+    get_backend().index_many(media.prefetch_related("tags"))
+
+
+def owned_media_ids(user, media_ids):
+    from .bulk import parse_ids  # bulk.py khud reindex ke liye tags import karta hai
+
+    return list(
+        MediaFile.objects.filter(user=user, pk__in=parse_ids(media_ids)).values_list(
+            "pk", flat=True
+        )
+    )
+
+
+def add_tags(user, media_ids, names):
+    media_ids = owned_media_ids(user, media_ids)
+    names = parse_tags(names)
+    if not media_ids or not names:
+        return 0
+    tags = get_or_create_tags(user, names)
+    MediaTag.objects.bulk_create(
+        [
+            MediaTag(user=user, media_id=media_id, tag=tag)
+            for media_id in media_ids
+            for tag in tags
+        ],
+        ignore_conflicts=True,
+    )
+    reindex(media_ids)
+    return len(media_ids)
+
+
+def remove_tags(user, media_ids, names):
+    media_ids = owned_media_ids(user, media_ids)
+    names = parse_tags(names)
+    if not media_ids or not names:
+        return 0
+    MediaTag.objects.filter(
+        user=user, media_id__in=media_ids, tag__name__in=names
+    ).delete()
+    reindex(media_ids)
+    return len(media_ids)
+
+
+def filter_by_tag(queryset, user, name):
+    # (user, tag) index lookup - icontains jaisa "cat" -> "category" nahi
+    tag = Tag.objects.filter(user=user, name=name.strip().lower()).first()
+    if tag is None:
+        return queryset.none()
+    return queryset.filter(
+        pk__in=MediaTag.objects.filter(user=user, tag=tag).values("media_id")
+    )
+
+
+def tag_counts(user):
+    return (
+        Tag.objects.filter(user=user)
+        .annotate(
+            count=Count(
+                "media_links", filter=Q(media_links__media__is_deleted=False)
+            )
+        )
+        .filter(count__gt=0)
+        .order_by("-count", "name")
+        .values("name", "count")
+    )
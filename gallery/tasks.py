@@ -0,0 +1,41 @@
+# gallery/tasks.py
+#
+# Background jobs (gallery/jobs.py). Har task idempotent hona chahiye -
+# retry pe ya dobara enqueue pe same result.
+
+from datetime import datetime
+
+from . import retention
+from .derivatives import generate_derivatives, get_sizes
+from .jobs import task
+from .metadata import apply_metadata
+from .models import MediaFile
+from .similarity import compute_phash
+
+
+@task("process_media")
+def process_media(media_id):
+    # Upload ke baad ka heavy kaam; file purge ho chuki ho to kuch nahi
+    media = MediaFile.objects.filter(pk=media_id, is_deleted=False).first()
+    if media is None:
+        return
+    apply_metadata(media)
+    compute_phash(media)
+    generate_derivatives(media)
+
+
+@task("generate_derivatives")
+def regenerate_derivatives(media_id):
+    # derivative_url se - missing thumbnail; upload wala process_media pehle
+    # hi bana chuka ho to kuch nahi
+    media = MediaFile.objects.filter(pk=media_id, is_deleted=False).first()
+    if media is None:
+        return
+    if media.derivatives.filter(size_name__in=get_sizes()).count() < len(get_sizes()):
+        generate_derivatives(media)
+
+
+@task("empty_trash")
+def empty_trash(user_id, before):
+    # Dobara chale to kuch bacha hi nahi - purge already ho chuka
+    retention.empty_trash(user_id, before=datetime.fromisoformat(before))
@@ -0,0 +1,36 @@
+# gallery/templatetags/gallery_tags.py
+
+from django import template
+
+from ..fragments import render_fragments
+from ..transcoding import FORMATS, available_formats, with_format
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(media, size_name="thumb"):
+    # {% thumbnail_url file "thumb" %} - grid ke liye chhota version
+    return media.derivative_url(size_name)
+
+
+@register.simple_tag
+def image_sources(url):
+    # {% image_sources thumb as sources %} -> [(mime, url)] <picture> ke <source>
+    # ke liye; jo format Pillow encode nahi kar sakta wo nahi aata
+    return [(FORMATS[fmt][0], with_format(url, fmt)) for fmt in available_formats()]
+
+
+@register.simple_tag
+def thumbnail_sources(media, size_name="thumb"):
+    # Grid ke <source> sirf bane hue derivative ke - fallback original ho to
+    # kuch nahi, warna har tile pe poori photo transcode hoti
+    derivative = media.derivative(size_name)
+    return image_sources(derivative.url) if derivative else []
+
+
+@register.simple_tag
+def media_fragments(media, template_name, **context):
+    # {% media_fragments files "gallery/_media_tile.html" type=type as tiles %}
+    # -> [(file, html)], cache se; sirf naye / badle cards render hote hain
+    return render_fragments(template_name, media, **context)
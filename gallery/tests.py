@@ -1,6 +1,70 @@
-from django.test import TestCase
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zipfile
+import zlib
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
-from .models import MediaFile
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from .models import (
+    Album,
+    Blob,
+    Job,
+    LibraryStats,
+    MediaFile,
+    MediaDerivative,
+    Tag,
+    UploadSession,
+)
+from . import (
+    archive,
+    benchmark,
+    bulk,
+    derivatives,
+    jobs,
+    mime,
+    performance,
+    retention,
+    sharding,
+    similarity,
+    transcoding,
+    uploads,
+)
+from .pagination import paginate
+from .search import get_backend as get_search_backend
+from .stats import COUNTERS, compute_stats
+from .tags import add_tags
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+
+def make_image(name="photo.jpg", size=(2000, 1500), color="red"):
+    from PIL import Image
+
+    buf = BytesIO()
+    Image.new("RGB", size, color).save(buf, "JPEG")
+    return SimpleUploadedFile(name, buf.getvalue(), content_type="image/jpeg")
 
 
 class MediaTests(TestCase):
@@ -10,3 +74,1730 @@ class MediaTests(TestCase):
     def test_media_creation(self):
         file = MediaFile.objects.create(user=self.user, file="test.jpg")
         self.assertEqual(file.media_type, "photo")
+
+
+@unittest.skipIf(derivatives.Image is None, "Pillow not installed")
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, JOBS_EAGER=True)
+class DerivativeTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+
+    def test_upload_generates_named_sizes(self):
+        self.client.post(reverse("upload"), {"file": make_image()})
+        media = MediaFile.objects.get(user=self.user)
+        sizes = {d.size_name: d for d in media.derivatives.all()}
+        self.assertEqual(set(sizes), set(derivatives.get_sizes()))
+        self.assertEqual(sizes["thumb"].width, 256)
+        self.assertEqual(sizes["preview"].width, 1024)
+
+    def test_missing_derivative_falls_back_without_rendering(self):
+        self.client.post(reverse("upload"), {"file": make_image()})
+        media = MediaFile.objects.get(user=self.user)
+        media.derivatives.all().delete()
+        cache.clear()
+
+        # Page render me decode nahi - original URL aur ek hi queued job
+        with self.settings(JOBS_EAGER=False):
+            with patch.object(derivatives, "render_derivative") as render:
+                url = media.derivative_url("thumb")
+                media.derivative_url("thumb")
+        render.assert_not_called()
+        self.assertEqual(url, reverse("media_file", args=[media.pk]))
+        job = Job.objects.get(name="generate_derivatives")
+        self.assertEqual(job.status, Job.QUEUED)
+
+        jobs.work(burst=True)
+        self.assertEqual(media.derivatives.count(), len(derivatives.get_sizes()))
+
+        # Backfill command bhi wahi karta hai
+        media.derivatives.all().delete()
+        call_command("generate_thumbnails", stdout=StringIO())
+        derivative = MediaDerivative.objects.get(media=media, size_name="thumb")
+        self.assertEqual(
+            media.derivative_url("thumb"),
+            f"/files/{media.pk}/thumb/?v={derivative.checksum}",
+        )
+
+    def test_undecodable_photo_is_not_retried(self):
+        upload = SimpleUploadedFile(
+            "IMG_1.heic", b"\x00\x00\x00\x18ftypheic" + b"x" * 64
+        )
+        self.client.post(reverse("upload"), {"file": upload})
+        media = MediaFile.objects.get(user=self.user)
+        self.assertEqual(media.media_type, "photo")
+        self.assertIsNotNone(media.derivatives_failed_at)
+
+        with patch.object(derivatives, "render_derivative") as render:
+            out = StringIO()
+            call_command("generate_thumbnails", stdout=out)
+        render.assert_not_called()
+        self.assertIn("Processed 0 photos", out.getvalue())
+
+    def test_versioned_derivative_is_immutable(self):
+        self.client.post(reverse("upload"), {"file": make_image()})
+        media = MediaFile.objects.get(user=self.user)
+        response = self.client.get(media.derivative_url("thumb"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response["Cache-Control"])
+
+        unversioned = self.client.get(
+            reverse("derivative_file", args=[media.pk, "thumb"])
+        )
+        self.assertIn("no-cache", unversioned["Cache-Control"])
+        again = self.client.get(
+            media.derivative_url("thumb"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_list_serves_thumbnails_not_originals(self):
+        self.client.post(reverse("upload"), {"file": make_image()})
+        media = MediaFile.objects.get(user=self.user)
+        response = self.client.get(reverse("photos_list"))
+        self.assertContains(response, media.derivative_url("thumb"))
+
+    def test_document_falls_back_to_original(self):
+        upload = SimpleUploadedFile("notes.txt", b"hello")
+        self.client.post(reverse("upload"), {"file": upload})
+        media = MediaFile.objects.get(user=self.user)
+        self.assertEqual(
+            media.derivative_url("thumb"), reverse("media_file", args=[media.pk])
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        # bulk_create: save() file ko stat karta hai, yaha files disk pe nahi hain
+        self.files = MediaFile.objects.bulk_create(
+            MediaFile(user=self.user, file=f"uploads/{i}.pdf", media_type="document")
+            for i in range(5)
+        )
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        # Same timestamp wale rows bhi id tie-break se stable rehte hain
+        MediaFile.objects.update(uploaded_at=self.files[0].uploaded_at)
+        seen, cursor = [], None
+        while True:
+            page = paginate(MediaFile.objects.all(), cursor, per_page=2)
+            seen.extend(f.pk for f in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, sorted((f.pk for f in self.files), reverse=True))
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        page = paginate(MediaFile.objects.all(), "not-a-cursor", per_page=2)
+        self.assertEqual(len(page), 2)
+
+    @patch("gallery.views.MEDIA_LIST_PAGE_SIZE", 2)
+    def test_fragment_endpoint_keeps_filters_in_next_url(self):
+        response = self.client.get(
+            reverse("docs_list"), {"category": "", "fragment": "1"}
+        )
+        self.assertIn("cursor=", response["X-Next-Url"])
+        self.assertIn("category=", response["X-Next-Url"])
+        self.assertNotIn("fragment", response["X-Next-Url"])
+        self.assertNotContains(response, "<html")
+
+    @patch("gallery.views.SEARCH_PAGE_SIZE", 2)
+    def test_search_load_more_uses_cursor(self):
+        response = self.client.get(reverse("global_search"), {"type": "document"})
+        self.assertTrue(response.context["has_next"])
+        second = self.client.get(response.context["next_url"] + "&fragment=1")
+        self.assertEqual(len(second.context["results"]), 2)
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+
+    def make(self, name, **fields):
+        # save() size ke liye file stat karta hai - test me stub kar do
+        with patch("django.db.models.fields.files.FieldFile.size", 0):
+            return MediaFile.objects.create(
+                user=self.user, file=f"uploads/2026/01/01/{name}", **fields
+            )
+
+    def search(self, **params):
+        response = self.client.get(reverse("global_search"), params)
+        return [f.pk for f in response.context["results"]]
+
+    def test_prefix_match_on_name_tags_and_category(self):
+        beach = self.make("IMG_1234.jpg")
+        add_tags(self.user, [beach.pk], "beach, sunset")
+        cat = self.make("cat.jpg", category="whatsapp")
+        self.assertEqual(self.search(q="img"), [beach.pk])
+        self.assertEqual(self.search(q="suns"), [beach.pk])
+        self.assertEqual(self.search(q="whats"), [cat.pk])
+
+    def test_no_substring_false_positives(self):
+        self.make("category.jpg")
+        self.assertEqual(self.search(q="ego"), [])
+
+    def test_filters_still_apply(self):
+        fav = self.make("trip1.jpg", is_favorite=True)
+        self.make("trip2.jpg")
+        self.assertEqual(self.search(q="trip", favorite="1"), [fav.pk])
+
+    def test_soft_delete_and_restore_sync_index(self):
+        media = self.make("holiday.jpg")
+        with patch("django.db.models.fields.files.FieldFile.size", 0):
+            media.delete()
+            self.assertEqual(self.search(q="holiday"), [])
+            self.client.get(reverse("restore_file", args=[media.pk]))
+        self.assertEqual(self.search(q="holiday"), [media.pk])
+
+    @override_settings(SEARCH_BACKEND="gallery.search.BasicSearchBackend")
+    def test_basic_backend_matches_original_name_not_blob_path(self):
+        # Blob path me hash hai, naam original_name me
+        media = self.make("ab/cd/0f3a.jpg", original_name="Holiday.jpg")
+        self.assertEqual(self.search(q="holiday"), [media.pk])
+        self.assertEqual(self.search(q="0f3a"), [])
+
+    def test_results_are_ranked(self):
+        weak = self.make("misc.jpg")
+        strong = self.make("dog.jpg")
+        add_tags(self.user, [weak.pk], "dog")
+        add_tags(self.user, [strong.pk], "dog, dog park")
+        self.assertEqual(self.search(q="dog"), [strong.pk, weak.pk])
+
+
+class TagTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        with patch("django.db.models.fields.files.FieldFile.size", 0):
+            self.cat = MediaFile.objects.create(user=self.user, file="uploads/a.jpg")
+            self.other = MediaFile.objects.create(
+                user=self.user, file="uploads/b.jpg", category="category"
+            )
+
+    def test_bulk_add_and_remove(self):
+        response = self.client.post(
+            reverse("bulk_add_tags"),
+            {"ids": [self.cat.pk, self.other.pk], "tags": "Cat, pets ,cat"},
+        )
+        self.assertEqual(response.json(), {"updated": 2})
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(sorted(t.name for t in self.cat.tags.all()), ["cat", "pets"])
+
+        self.client.post(
+            reverse("bulk_remove_tags"), {"ids": [self.other.pk], "tags": "cat"}
+        )
+        self.assertEqual([t.name for t in self.other.tags.all()], ["pets"])
+
+    def test_bad_ids_and_batched_reindex(self):
+        response = self.client.post(
+            reverse("bulk_add_tags"), {"ids": ["abc", self.cat.pk], "tags": "cat"}
+        )
+        self.assertEqual(response.json(), {"updated": 1})
+
+        # FTS refresh: ek DELETE + ek INSERT, selection kitni bhi badi ho
+        with CaptureQueriesContext(connection) as queries:
+            add_tags(self.user, [self.cat.pk, self.other.pk], "pets")
+        fts = [q["sql"] for q in queries if "gallery_mediafile_fts" in q["sql"]]
+        self.assertEqual(len(fts), 2)
+
+    def test_other_users_media_is_ignored(self):
+        stranger = User.objects.create_user(username="x", password="123")
+        updated = add_tags(stranger, [self.cat.pk], "mine")
+        self.assertEqual(updated, 0)
+        self.assertFalse(self.cat.tags.exists())
+
+    def test_tag_filter_is_exact(self):
+        add_tags(self.user, [self.cat.pk], "cat")
+        response = self.client.get(reverse("global_search"), {"tag": "cat"})
+        self.assertEqual([f.pk for f in response.context["results"]], [self.cat.pk])
+
+    def test_search_text_matches_tags(self):
+        add_tags(self.user, [self.other.pk], "sunset")
+        response = self.client.get(reverse("global_search"), {"q": "suns"})
+        self.assertEqual([f.pk for f in response.context["results"]], [self.other.pk])
+
+    def test_tag_cloud_counts(self):
+        add_tags(self.user, [self.cat.pk, self.other.pk], "pets")
+        add_tags(self.user, [self.cat.pk], "cat")
+        response = self.client.get(reverse("tag_cloud"))
+        self.assertEqual(
+            response.json()["tags"],
+            [{"name": "pets", "count": 2}, {"name": "cat", "count": 1}],
+        )
+
+
+class LibraryStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        # Size ingest pe aata hai - save() ab file stat nahi karta
+        self.photo = MediaFile.objects.create(
+            user=self.user, file="uploads/a.jpg", size=100
+        )
+        self.video = MediaFile.objects.create(
+            user=self.user, file="uploads/b.mp4", media_type="video", size=100
+        )
+
+    def stats(self):
+        return {
+            name: getattr(LibraryStats.objects.get(user=self.user), name)
+            for name in COUNTERS
+        }
+
+    def test_counters_follow_favorite_delete_restore(self):
+        self.client.get(reverse("toggle_favorite", args=[self.photo.pk]))
+        self.client.get(reverse("delete_file", args=[self.video.pk]))
+        self.assertEqual(
+            self.stats(),
+            {
+                "photo_count": 1,
+                "video_count": 0,
+                "document_count": 0,
+                "favorite_count": 1,
+                "bytes_used": 100,
+                "trash_count": 1,
+                "trash_bytes": 100,
+            },
+        )
+        self.client.get(reverse("restore_file", args=[self.video.pk]))
+        self.assertEqual(self.stats(), compute_stats(self.user.pk))
+        self.assertEqual(self.stats()["video_count"], 1)
+
+    def test_hard_delete_is_subtracted(self):
+        MediaFile.objects.filter(pk=self.photo.pk).delete()
+        self.assertEqual(self.stats()["photo_count"], 0)
+        self.assertEqual(self.stats(), compute_stats(self.user.pk))
+
+    def test_dashboard_reads_one_stats_row(self):
+        self.client.get(reverse("home"))  # session/user warm up
+        # session + user + stats row + recent uploads (+ derivatives prefetch)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("home"))
+        self.assertEqual(response.context["photos_count"], 1)
+
+    def test_rebuild_command_fixes_drift(self):
+        LibraryStats.objects.filter(user=self.user).update(photo_count=42)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_library_stats", "--verify", stdout=StringIO())
+        call_command("rebuild_library_stats", stdout=StringIO())
+        self.assertEqual(self.stats()["photo_count"], 1)
+
+
+class AlbumCountTests(TestCase):
+    def setUp(self):
+        size_patch = patch("django.db.models.fields.files.FieldFile.size", 0)
+        size_patch.start()
+        self.addCleanup(size_patch.stop)
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        self.album = Album.objects.create(user=self.user, name="Trip")
+        self.media = [
+            MediaFile.objects.create(user=self.user, file=f"uploads/{i}.jpg")
+            for i in range(3)
+        ]
+
+    def count(self):
+        self.album.refresh_from_db()
+        return self.album.media_count
+
+    def test_count_follows_add_remove_and_trash(self):
+        for media in self.media:
+            self.client.get(reverse("add_to_album", args=[self.album.pk, media.pk]))
+        self.assertEqual(self.count(), 3)
+
+        self.client.get(
+            reverse("remove_from_album", args=[self.album.pk, self.media[0].pk])
+        )
+        self.assertEqual(self.count(), 2)
+
+        self.client.get(reverse("delete_file", args=[self.media[1].pk]))
+        self.assertEqual(self.count(), 1)
+        self.client.get(reverse("restore_file", args=[self.media[1].pk]))
+        self.assertEqual(self.count(), 2)
+
+        MediaFile.objects.filter(pk=self.media[2].pk).delete()
+        self.assertEqual(self.count(), 1)
+
+    def test_album_list_queries_do_not_grow_with_albums(self):
+        self.client.get(reverse("album_list"))
+        with CaptureQueriesContext(connection) as one_album:
+            self.client.get(reverse("album_list"))
+
+        for i in range(5):
+            album = Album.objects.create(
+                user=self.user, name=f"A{i}", cover=self.media[0]
+            )
+            album.media_files.add(self.media[0])
+        # Pehli render cover ka missing thumbnail queue karti hai (din me ek baar)
+        self.client.get(reverse("album_list"))
+        with CaptureQueriesContext(connection) as many_albums:
+            response = self.client.get(reverse("album_list"))
+
+        self.assertContains(response, "1 items")
+        # cover wale albums ke liye bas ek derivatives prefetch query judti hai
+        self.assertLessEqual(len(many_albums), len(one_album) + 1)
+
+
+class BulkActionTests(TestCase):
+    def setUp(self):
+        size_patch = patch("django.db.models.fields.files.FieldFile.size", 10)
+        size_patch.start()
+        self.addCleanup(size_patch.stop)
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        self.album = Album.objects.create(user=self.user, name="Trip")
+        self.media = [
+            MediaFile.objects.create(user=self.user, file=f"uploads/beach{i}.jpg")
+            for i in range(20)
+        ]
+        self.ids = [media.pk for media in self.media]
+
+    def post(self, action, ids, **extra):
+        return self.client.post(
+            reverse("bulk_media_action"), {"action": action, "ids": ids, **extra}
+        )
+
+    def test_trash_and_restore_keep_derived_data_in_sync(self):
+        self.album.media_files.add(*self.media[:5])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post("delete", self.ids)
+        self.assertEqual(response.json()["updated"], 20)
+        self.assertLess(len(ctx), 40)  # per-file save nahi
+
+        stats = LibraryStats.objects.get(user=self.user)
+        self.assertEqual((stats.photo_count, stats.trash_count), (0, 20))
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.media_count, 0)
+        live = MediaFile.objects.filter(user=self.user, is_deleted=False)
+        self.assertFalse(get_search_backend().search(live, "beach").exists())
+
+        self.post("restore", self.ids[:5])
+        self.assertEqual(compute_stats(self.user.pk)["photo_count"], 5)
+        self.assertEqual(LibraryStats.objects.get(user=self.user).photo_count, 5)
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.media_count, 5)
+        self.assertEqual(get_search_backend().search(live, "beach").count(), 5)
+
+    def test_favorite_and_album_add(self):
+        self.post("favorite", self.ids[:3])
+        self.assertEqual(LibraryStats.objects.get(user=self.user).favorite_count, 3)
+
+        response = self.post("add_to_album", self.ids, album=self.album.pk)
+        self.assertEqual(response.json()["updated"], 20)
+        self.post("add_to_album", self.ids[:2], album=self.album.pk)  # duplicate ok
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.media_count, 20)
+        self.assertIsNotNone(self.album.cover_id)
+
+    def test_only_own_media_and_known_actions(self):
+        other = User.objects.create_user(username="x", password="123")
+        theirs = MediaFile.objects.create(user=other, file="uploads/theirs.jpg")
+        response = self.post("delete", [theirs.pk, "abc"])
+        self.assertEqual(response.json()["updated"], 0)
+        theirs.refresh_from_db()
+        self.assertFalse(theirs.is_deleted)
+
+        self.assertEqual(self.post("explode", self.ids).status_code, 400)
+        other_album = Album.objects.create(user=other, name="Theirs")
+        response = self.post("add_to_album", self.ids, album=other_album.pk)
+        self.assertEqual(response.status_code, 404)
+
+
+class QueryPlanTests(TestCase):
+    # Har view ka MediaFile query index use kare - full scan + temp sort nahi
+    VIEWS = [
+        ("home", {}),
+        ("photos_list", {"category": "camera"}),
+        ("videos_list", {}),
+        ("docs_list", {"start_date": "2026-01-01"}),
+        ("trash_bin", {}),
+        ("global_search", {"type": "photo"}),
+        ("global_search", {"favorite": "1"}),
+        ("album_list", {}),
+        ("album_detail", {}),
+        ("media_detail", {}),
+        ("photos_list", {"tag": "beach"}),
+        ("global_search", {"tag": "beach"}),
+        ("tag_cloud", {}),
+        ("duplicate_clusters", {}),
+    ]
+    # ORDER BY count - aggregate ka sort index se ho hi nahi sakta (sirf
+    # user ke tags pe, media pe nahi); scan wala check phir bhi lagta hai
+    AGGREGATE_SORTS = {"tag_cloud"}
+
+    def setUp(self):
+        size_patch = patch("django.db.models.fields.files.FieldFile.size", 0)
+        size_patch.start()
+        self.addCleanup(size_patch.stop)
+        cache.clear()  # duplicate clusters cache se na aa jaayen
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        media = [
+            MediaFile.objects.create(user=self.user, file=f"uploads/{i}.jpg")
+            for i in range(3)
+        ]
+        for item in media:
+            MediaFile.objects.filter(pk=item.pk).update(
+                **similarity.hash_fields(0x0F0F_0F0F_0F0F_0F0F + item.pk)
+            )
+        add_tags(self.user, [media[0].pk], "beach")
+        album = Album.objects.create(user=self.user, name="Trip")
+        album.media_files.add(media[0])
+        # Detail pages ke URL args
+        self.args = {"album_detail": [album.pk], "media_detail": [media[0].pk]}
+
+    def query_plans(self, url, params):
+        executed = []
+
+        def capture(execute, sql, sql_params, many, context):
+            if "gallery_mediafile" in sql and sql.lstrip().startswith("SELECT"):
+                executed.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+
+        with connection.execute_wrapper(capture):
+            self.client.get(url, params)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for sql, sql_params in executed:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", sql_params)
+                plans.append((sql, [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def test_media_queries_use_indexes(self):
+        for name, params in self.VIEWS:
+            url = reverse(name, args=self.args.get(name, []))
+            for sql, plan in self.query_plans(url, params):
+                with self.subTest(view=name, params=params, sql=sql):
+                    for step in plan:
+                        self.assertNotRegex(step, r"^SCAN gallery_mediafile$")
+                        if name not in self.AGGREGATE_SORTS:
+                            self.assertNotIn("TEMP B-TREE FOR ORDER BY", step)
+
+    def test_ranked_search_uses_fts_not_a_scan(self):
+        # Rank ke hisaab se sort sirf matched rows pe hota hai, table pe nahi
+        plans = self.query_plans(reverse("global_search"), {"q": "beach"})
+        for sql, plan in plans:
+            with self.subTest(sql=sql):
+                for step in plan:
+                    self.assertNotRegex(step, r"^SCAN gallery_mediafile$")
+
+
+@override_settings(
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    UPLOAD_STAGING_DIR=os.path.join(TEST_MEDIA_ROOT, "staging"),
+    CHUNKED_UPLOAD_CHUNK_SIZE=4,
+)
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        self.payload = b"0123456789"
+        response = self.client.post(
+            reverse("chunked_upload_init"),
+            {"filename": "clip.mp4", "size": len(self.payload), "category": "camera"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.upload_id = response.json()["upload_id"]
+
+    def put(self, offset, data):
+        return self.client.put(
+            reverse("chunked_upload_chunk", args=[self.upload_id])
+            + f"?offset={offset}",
+            data,
+            content_type="application/octet-stream",
+        )
+
+    def finalize(self):
+        return self.client.post(
+            reverse("chunked_upload_finalize", args=[self.upload_id])
+        )
+
+    def test_out_of_order_chunks_then_finalize(self):
+        self.put(8, self.payload[8:])
+        self.put(0, self.payload[:4])
+        self.assertEqual(self.finalize().status_code, 409)
+        self.assertFalse(MediaFile.objects.exists())
+
+        # Resume: status batata hai kya missing hai
+        status = self.client.get(
+            reverse("chunked_upload_status", args=[self.upload_id])
+        ).json()
+        self.assertEqual(status["received"], [[0, 4], [8, 10]])
+
+        self.put(4, self.payload[4:8])
+        data = self.finalize().json()
+        media = MediaFile.objects.get(pk=data["media_id"])
+        self.assertEqual(media.media_type, "video")
+        self.assertEqual(media.category, "camera")
+        with media.file.open("rb") as fh:
+            self.assertEqual(fh.read(), self.payload)
+        staged = os.path.join(TEST_MEDIA_ROOT, "staging", f"{self.upload_id}.part")
+        self.assertFalse(os.path.exists(staged))
+        # Finalize dobara = same media, naya row nahi
+        self.assertEqual(self.finalize().json()["media_id"], media.pk)
+
+    def test_rejects_chunks_outside_declared_size(self):
+        self.assertEqual(self.put(8, b"xyz").status_code, 400)
+        self.assertEqual(self.put(0, b"too-big").status_code, 400)
+
+    def test_other_users_cannot_touch_session(self):
+        User.objects.create_user(username="x", password="123")
+        self.client.login(username="x", password="123")
+        self.assertEqual(self.put(0, b"0123").status_code, 404)
+
+    @override_settings(MAX_UPLOAD_SIZE=100)
+    def test_declared_size_is_capped(self):
+        response = self.client.post(
+            reverse("chunked_upload_init"), {"filename": "huge.mp4", "size": 101}
+        )
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(UploadSession.objects.count(), 1)  # sirf setUp wala
+
+    def test_abandoned_sessions_are_purged(self):
+        staged = os.path.join(TEST_MEDIA_ROOT, "staging", f"{self.upload_id}.part")
+        self.put(0, self.payload[:4])  # chunk aaya -> expiry aage badhi
+        self.assertEqual(uploads.purge_expired_sessions(), 0)
+
+        UploadSession.objects.update(expires_at=timezone.now() - timedelta(hours=1))
+        out = StringIO()
+        call_command("purge_uploads", stdout=out)
+        self.assertIn("Purged 1 upload sessions", out.getvalue())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(staged))
+
+
+@override_settings(
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    UPLOAD_STAGING_DIR=os.path.join(TEST_MEDIA_ROOT, "staging"),
+)
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.other = User.objects.create_user(username="other", password="123")
+        self.content = b"%PDF-1.4 same bytes"
+        self.digest = hashlib.sha256(self.content).hexdigest()
+
+    def upload_as(self, username):
+        self.client.login(username=username, password="123")
+        upload = SimpleUploadedFile("report.pdf", self.content)
+        return self.client.post(reverse("upload"), {"file": upload})
+
+    def test_duplicate_uploads_share_one_blob(self):
+        self.upload_as("test")
+        self.upload_as("test")  # same user: already have it
+        self.upload_as("other")
+
+        blob = Blob.objects.get()
+        self.assertEqual(blob.sha256, self.digest)
+        self.assertEqual(blob.ref_count, 2)
+        files = MediaFile.objects.order_by("user__username")
+        self.assertEqual(len(files), 2)
+        self.assertEqual({f.file.name for f in files}, {blob.file.name})
+        self.assertEqual(files[0].display_name, "report.pdf")
+
+    def test_hash_only_upload_skips_bytes(self):
+        self.upload_as("test")
+        original = MediaFile.objects.get(user=self.user)
+        original.delete()  # trash me bhi ho to user ke paas content hai
+        response = self.client.post(
+            reverse("upload"), {"sha256": self.digest, "filename": "copy.pdf"}
+        )
+        self.assertTrue(response.json()["deduplicated"])
+        media = MediaFile.objects.get(user=self.user, is_deleted=False)
+        self.assertEqual(media.media_type, "document")
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+        missing = self.client.post(
+            reverse("upload"), {"sha256": "0" * 64, "filename": "x.pdf"}
+        )
+        self.assertEqual(missing.status_code, 404)
+
+    def test_hash_of_another_users_file_is_not_claimable(self):
+        self.upload_as("test")
+        self.client.login(username="other", password="123")
+        response = self.client.post(
+            reverse("upload"), {"sha256": self.digest, "filename": "stolen.pdf"}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(response.json()["missing"])
+        init = self.client.post(
+            reverse("chunked_upload_init"),
+            {"filename": "stolen.pdf", "size": 100, "sha256": self.digest},
+        )
+        self.assertEqual(init.status_code, 201)  # bytes bhejne padenge
+        self.assertFalse(MediaFile.objects.filter(user=self.other).exists())
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+
+        # Bytes aaye to dedup server pe - blob phir bhi ek hi
+        self.upload_as("other")
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+    def test_etag_does_not_leak_content_hash(self):
+        self.upload_as("test")
+        media = MediaFile.objects.get(user=self.user)
+        response = self.client.get(reverse("media_file", args=[media.pk]))
+        self.assertNotIn(self.digest, response["ETag"])
+
+    def test_garbage_collector_removes_unreferenced_blobs(self):
+        self.upload_as("test")
+        blob = Blob.objects.get()
+        path = blob.file.path
+        MediaFile.objects.all().delete()  # hard delete
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+
+        call_command("gc_blobs", "--grace-hours=0", stdout=StringIO())
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        self.content = bytes(range(256)) * 4
+        upload = SimpleUploadedFile("clip.mp4", self.content)
+        self.client.post(reverse("upload"), {"file": upload})
+        self.media = MediaFile.objects.get(user=self.user)
+        self.url = reverse("media_file", args=[self.media.pk])
+
+    def test_full_response_advertises_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Type"], "video/mp4")
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+        tail = self.client.get(self.url, HTTP_RANGE="bytes=-4")
+        self.assertEqual(b"".join(tail.streaming_content), self.content[-4:])
+
+        open_ended = self.client.get(self.url, HTTP_RANGE="bytes=1000-")
+        self.assertEqual(open_ended["Content-Range"], "bytes 1000-1023/1024")
+
+        bad = self.client.get(self.url, HTTP_RANGE="bytes=5000-")
+        self.assertEqual(bad.status_code, 416)
+        self.assertEqual(bad["Content-Range"], "bytes */1024")
+
+    def test_owner_only_and_share_token(self):
+        User.objects.create_user(username="x", password="123")
+        self.client.login(username="x", password="123")
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        self.client.logout()
+        shared = reverse("shared_media_file", args=[self.media.share_token])
+        self.assertEqual(self.client.get(shared).status_code, 200)
+        self.media.delete()  # soft delete -> share band
+        self.assertEqual(self.client.get(shared).status_code, 404)
+
+    def test_html_and_svg_are_never_rendered_inline(self):
+        # Stored XSS: shared link app ke origin pe HTML/SVG na chalaye
+        for name, content in (
+            ("evil.html", b"<script>alert(1)</script>"),
+            ("evil.svg", b"<svg xmlns='http://www.w3.org/2000/svg'></svg>"),
+        ):
+            self.client.post(
+                reverse("upload"), {"file": SimpleUploadedFile(name, content)}
+            )
+            media = MediaFile.objects.get(original_name=name)
+            self.client.logout()
+            response = self.client.get(
+                reverse("shared_media_file", args=[media.share_token])
+            )
+            self.assertTrue(response["Content-Disposition"].startswith("attachment"))
+            self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+            self.client.login(username="test", password="123")
+
+        # Type upload pe sniff hua wala, extension wala nahi
+        self.client.post(
+            reverse("upload"),
+            {"file": SimpleUploadedFile("scan.html", b"%PDF-1.4 not html")},
+        )
+        pdf = MediaFile.objects.get(original_name="scan.html")
+        response = self.client.get(reverse("media_file", args=[pdf.pk]))
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response["Content-Disposition"].startswith("inline"))
+
+    @override_settings(DEBUG=True)
+    def test_media_root_is_not_served_statically(self):
+        # DEBUG me bhi blob path seedha nahi khulna chahiye - sirf media_file view
+        import importlib
+
+        from media_vault import urls
+
+        patterns = [str(p.pattern) for p in importlib.reload(urls).urlpatterns]
+        self.assertFalse([p for p in patterns if p.startswith("^media/")])
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/")
+    def test_proxy_handoff(self):
+        response = self.client.get(self.url, {"download": "1"})
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/" + self.media.file.name
+        )
+        self.assertIn("attachment", response["Content-Disposition"])
+
+    async def test_asgi_streams_with_async_iterator(self):
+        # AsyncClient = ASGIRequest: body async iterator se, memory me list() nahi
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(self.url, headers={"Range": "bytes=10-19"})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(body, self.content[10:20])
+
+        shared = reverse("shared_media_file", args=[self.media.share_token])
+        response = await AsyncClient().get(shared)
+        self.assertEqual(response["Content-Length"], "1024")
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(body, self.content)
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertIn("private", response["Cache-Control"])
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], response["ETag"])
+
+        # If-Range purane ETag ka -> poori file
+        stale = self.client.get(
+            self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(stale.status_code, 200)
+
+    def test_share_page_revalidates_and_revokes(self):
+        page = reverse("public_share", args=[self.media.share_token])
+        self.client.logout()
+        response = self.client.get(page)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+        again = self.client.get(page, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        self.client.login(username="test", password="123")
+        self.client.post(reverse("revoke_share", args=[self.media.pk]))
+        self.client.logout()
+        # Cached lookup bhi turant invalidate hona chahiye
+        self.assertEqual(self.client.get(page).status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, JOBS_EAGER=True)
+class TrashRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        for color in ("red", "blue"):
+            self.client.post(
+                reverse("upload"), {"file": make_image(f"{color}.jpg", color=color)}
+            )
+        self.old, self.recent = MediaFile.objects.order_by("pk")
+        self.album = Album.objects.create(user=self.user, name="Trip")
+        self.client.get(reverse("add_to_album", args=[self.album.pk, self.old.pk]))
+        self.old.delete()
+        self.recent.delete()
+        MediaFile.objects.filter(pk=self.old.pk).update(
+            deleted_at=timezone.now() - timedelta(days=40)
+        )
+
+    def test_purge_removes_only_expired_trash(self):
+        derivative_paths = [d.file.path for d in self.old.derivatives.all()]
+        self.assertTrue(derivative_paths)
+        blob_path = self.old.blob.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("purge_trash", "--batch-size=1", stdout=StringIO())
+
+        self.assertFalse(MediaFile.objects.filter(pk=self.old.pk).exists())
+        self.assertTrue(MediaFile.objects.filter(pk=self.recent.pk).exists())
+        self.assertFalse(any(os.path.exists(path) for path in derivative_paths))
+        self.album.refresh_from_db()
+        self.assertIsNone(self.album.cover_id)
+        self.assertEqual(self.album.media_count, 0)
+        self.assertEqual(LibraryStats.objects.get(user=self.user).trash_count, 1)
+        # Aakhri reference gaya to blob aur uski file bhi - gc_blobs ka wait nahi
+        self.assertFalse(Blob.objects.filter(pk=self.old.blob_id).exists())
+        self.assertFalse(os.path.exists(blob_path))
+        self.assertTrue(Blob.objects.filter(pk=self.recent.blob_id).exists())
+
+    def test_restore_clears_clock_and_empty_trash(self):
+        self.client.get(reverse("restore_file", args=[self.recent.pk]))
+        self.recent.refresh_from_db()
+        self.assertIsNone(self.recent.deleted_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("empty_trash"))
+        self.assertEqual(
+            list(MediaFile.objects.values_list("pk", flat=True)), [self.recent.pk]
+        )
+        self.assertEqual(Job.objects.get(name="empty_trash").status, Job.DONE)
+        self.assertEqual(list(Blob.objects.all()), [self.recent.blob])
+
+    def test_purge_queries_do_not_grow_with_batch(self):
+        def purge_queries(count):
+            MediaFile.objects.filter(user=self.user).delete()
+            for i in range(count):
+                self.client.post(
+                    reverse("upload"),
+                    {"file": make_image(f"{i}.jpg", (40, 30), (i * 40, 0, 0))},
+                )
+            ids = list(MediaFile.objects.values_list("pk", flat=True))
+            for media in MediaFile.objects.all():
+                self.client.get(reverse("add_to_album", args=[self.album.pk, media.pk]))
+            bulk.trash(self.user, ids)
+            with CaptureQueriesContext(connection) as queries:
+                with self.captureOnCommitCallbacks(execute=True):
+                    retention.purge_batch(ids)
+            self.assertFalse(MediaFile.objects.exists())
+            return len(queries)
+
+        self.assertEqual(purge_queries(2), purge_queries(5))
+
+
+@jobs.task("test_flaky")
+def flaky_task(fail_times, marker):
+    key = f"flaky:{marker}"
+    calls = flaky_task.calls.get(key, 0) + 1
+    flaky_task.calls[key] = calls
+    if calls <= fail_times:
+        raise RuntimeError("temporary failure")
+
+
+flaky_task.calls = {}
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, JOB_RETRY_BACKOFF=0)
+class JobQueueTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+
+    def test_upload_enqueues_and_worker_processes(self):
+        self.client.post(reverse("upload"), {"file": make_image()})
+        media = MediaFile.objects.get(user=self.user)
+        self.assertFalse(media.derivatives.exists())  # request me nahi bana
+
+        response = self.client.get(reverse("media_jobs", args=[media.pk]))
+        self.assertEqual(response.json()["jobs"][0]["status"], Job.QUEUED)
+
+        call_command("run_jobs", "--burst", "--threads=1", stdout=StringIO())
+        self.assertEqual(media.derivatives.count(), 2)
+        job = Job.objects.get(key=f"process_media:{media.pk}")
+        status = self.client.get(reverse("job_status", args=[job.pk])).json()
+        self.assertEqual(status["status"], Job.DONE)
+
+    def test_idempotent_keys_and_retries(self):
+        first = jobs.enqueue("test_flaky", {"fail_times": 1, "marker": "a"}, key="a")
+        again = jobs.enqueue("test_flaky", {"fail_times": 9, "marker": "a"}, key="a")
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+        jobs.work(burst=True)  # pehli baar fail, backoff 0 -> turant retry
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), (Job.DONE, 2))
+
+        with self.settings(JOB_MAX_ATTEMPTS=2):
+            doomed = jobs.enqueue("test_flaky", {"fail_times": 5, "marker": "b"})
+        jobs.work(burst=True)
+        doomed.refresh_from_db()
+        self.assertEqual(doomed.status, Job.FAILED)
+        self.assertIn("temporary failure", doomed.as_json()["error"])
+
+    def test_worker_recovers_stale_jobs(self):
+        # Worker mar gaya: lock expire, job RUNNING me atka
+        expired = timezone.now() - jobs.lock_timeout() - timedelta(seconds=1)
+        crashed = jobs.enqueue("test_flaky", {"fail_times": 0, "marker": "c"})
+        poison = jobs.enqueue("test_flaky", {"fail_times": 0, "marker": "d"})
+        Job.objects.filter(pk=crashed.pk).update(
+            status=Job.RUNNING, attempts=1, locked_at=expired
+        )
+        Job.objects.filter(pk=poison.pk).update(
+            status=Job.RUNNING, attempts=poison.max_attempts, locked_at=expired
+        )
+
+        self.assertEqual(jobs.work(burst=True), 1)
+        crashed.refresh_from_db()
+        poison.refresh_from_db()
+        self.assertEqual((crashed.status, crashed.attempts), (Job.DONE, 2))
+        self.assertEqual(poison.status, Job.FAILED)
+        self.assertIn("lock expired", poison.last_error)
+
+
+def make_exif_image(name="trip.jpg"):
+    from PIL import Image
+
+    exif = Image.Exif()
+    exif[271], exif[272], exif[274] = "Canon", "EOS 80D", 6
+    exif.get_ifd(0x8769)[36867] = "2019:07:04 10:30:00"
+    gps = exif.get_ifd(0x8825)
+    gps[1], gps[2], gps[3], gps[4] = "N", (12.0, 30.0, 0.0), "W", (77.0, 35.0, 0.0)
+    buf = BytesIO()
+    Image.new("RGB", (40, 20), "green").save(buf, "JPEG", exif=exif)
+    return SimpleUploadedFile(name, buf.getvalue(), content_type="image/jpeg")
+
+
+def mp4_box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def make_mp4(name="clip.mp4", seconds=12.5, size=(1920, 1080)):
+    # Sirf headers: mdat pehle (moov file ke end pe, jaise zyada tar cameras)
+    mvhd = bytes(4) + struct.pack(">IIII", 0, 0, 1000, int(seconds * 1000))
+    tkhd = bytes(4) + bytes(72) + struct.pack(">II", size[0] << 16, size[1] << 16)
+    audio = bytes(4) + bytes(80)
+    moov = mp4_box(
+        b"moov",
+        mp4_box(b"mvhd", mvhd + bytes(80))
+        + mp4_box(b"trak", mp4_box(b"tkhd", audio))
+        + mp4_box(b"trak", mp4_box(b"tkhd", tkhd)),
+    )
+    content = mp4_box(b"ftyp", b"isom") + mp4_box(b"mdat", bytes(4096)) + moov
+    return SimpleUploadedFile(name, content, content_type="video/mp4")
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, JOBS_EAGER=True)
+class MetadataTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+
+    def test_photo_exif_columns(self):
+        self.client.post(reverse("upload"), {"file": make_exif_image()})
+        media = MediaFile.objects.get(user=self.user)
+        self.assertEqual(media.taken_at.year, 2019)
+        self.assertEqual((media.camera_make, media.camera_model), ("Canon", "EOS 80D"))
+        self.assertEqual((media.width, media.height, media.orientation), (20, 40, 6))
+        self.assertAlmostEqual(media.latitude, 12.5)
+        self.assertAlmostEqual(media.longitude, -77.5833, places=3)
+
+    def test_video_header_parsing(self):
+        self.client.post(reverse("upload"), {"file": make_mp4()})
+        media = MediaFile.objects.get(user=self.user)
+        self.assertEqual(media.duration, 12.5)
+        self.assertEqual((media.width, media.height), (1920, 1080))
+
+    def test_filters_and_backfill(self):
+        self.client.post(reverse("upload"), {"file": make_exif_image()})
+        self.client.post(reverse("upload"), {"file": make_image("plain.jpg")})
+        MediaFile.objects.update(metadata_extracted_at=None, camera_model="")
+        call_command("extract_metadata", "--workers=1", stdout=StringIO())
+        self.assertFalse(
+            MediaFile.objects.filter(metadata_extracted_at__isnull=True).exists()
+        )
+
+        response = self.client.get(
+            reverse("photos_list"),
+            {"taken_from": "2019-07-01", "taken_to": "2019-07-04"},
+        )
+        self.assertEqual(len(response.context["files"]), 1)
+        response = self.client.get(
+            reverse("global_search"), {"camera": "eos 80d", "located": "1"}
+        )
+        self.assertEqual(len(response.context["results"]), 1)
+        response = self.client.get(reverse("photos_list"), {"taken_from": "2019-02-30"})
+        self.assertEqual(len(response.context["files"]), 2)  # kharab date ignore
+
+
+def make_gradient(name, quality=90, flip=False):
+    from PIL import Image, ImageOps
+
+    img = Image.linear_gradient("L").resize((320, 240)).convert("RGB")
+    if flip:
+        img = ImageOps.mirror(img.rotate(90, expand=True))
+    buf = BytesIO()
+    img.save(buf, "JPEG", quality=quality)
+    return SimpleUploadedFile(name, buf.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, JOBS_EAGER=True)
+class SimilarPhotoTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        for upload in (
+            make_gradient("burst1.jpg", quality=95),
+            make_gradient("whatsapp.jpg", quality=20),  # re-compressed forward
+            make_gradient("other.jpg", flip=True),
+        ):
+            self.client.post(reverse("upload"), {"file": upload})
+        self.original, self.forward, self.other = MediaFile.objects.order_by("pk")
+
+    def test_multi_index_probes_cover_threshold(self):
+        target = 0x0123_4567_89AB_CDEF
+        near = target ^ 0b1011 ^ (1 << 40) ^ (1 << 63)  # 5 bits apart
+        self.assertEqual(similarity.hamming(target, near), 5)
+        bands = similarity.split_bands(near)
+        radius = 8 // similarity.BANDS
+        self.assertTrue(
+            any(
+                part in similarity.band_probes(bands[band], radius)
+                for band, part in enumerate(similarity.split_bands(target))
+            )
+        )
+        self.assertEqual(similarity.to_unsigned(similarity.to_signed(near)), near)
+
+    def test_similar_panel_and_clusters(self):
+        self.assertIsNotNone(self.original.phash)
+        response = self.client.get(reverse("media_detail", args=[self.original.pk]))
+        self.assertEqual([m.pk for m in response.context["similar"]], [self.forward.pk])
+
+        response = self.client.get(reverse("duplicate_clusters"))
+        clusters = response.context["clusters"]
+        self.assertEqual(
+            [[m.pk for m in cluster] for cluster in clusters],
+            [[self.original.pk, self.forward.pk]],
+        )
+
+    def test_clusters_cached_until_hashes_change(self):
+        cache.clear()
+        pair = [[self.original.pk, self.forward.pk]]
+        self.assertEqual(similarity.duplicate_clusters(self.user), pair)
+        with patch.object(similarity, "find_clusters") as find:
+            self.assertEqual(similarity.duplicate_clusters(self.user), pair)
+        find.assert_not_called()
+
+        # Naya near-duplicate hash -> signature badla, dobara cluster
+        self.client.post(
+            reverse("upload"), {"file": make_gradient("burst2.jpg", quality=90)}
+        )
+        [cluster] = similarity.duplicate_clusters(self.user)
+        self.assertEqual(len(cluster), 3)
+        self.forward.delete()
+        [cluster] = similarity.duplicate_clusters(self.user)
+        self.assertNotIn(self.forward.pk, cluster)
+
+    def test_similar_lookup_uses_band_indexes(self):
+        executed = []
+
+        def capture(execute, sql, sql_params, many, context):
+            executed.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+
+        with connection.execute_wrapper(capture):
+            similarity.similar_to(self.original)
+        sql, sql_params = executed[0]
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", sql_params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("media_phash_b0_idx", plan)
+        self.assertNotRegex(plan, r"SCAN gallery_mediafile(?! USING)")
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        performance.reset_timings()
+        self.addCleanup(performance.reset_timings)
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("home"))
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(timing, r"tpl;dur=[\d.]+")
+        self.assertRegex(timing, r"total;dur=[\d.]+")
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_request_logged_with_top_sql(self):
+        with self.assertLogs("gallery.performance", "WARNING") as logs:
+            self.client.get(reverse("photos_list"))
+        record = json.loads(logs.records[0].getMessage().split(" ", 1)[1])
+        self.assertEqual(record["view"], "photos_list")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertGreater(record["bytes"], 0)
+        self.assertTrue(record["top_queries"][0]["sql"].startswith("SELECT"))
+
+    def test_staff_only_percentiles(self):
+        for _ in range(3):
+            self.client.get(reverse("photos_list"))
+        self.assertEqual(self.client.get(reverse("perf_stats")).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        rows = {
+            row["view"]: row
+            for row in self.client.get(reverse("perf_stats")).json()["views"]
+        }
+        self.assertEqual(rows["photos_list"]["count"], 3)
+        self.assertLessEqual(
+            rows["photos_list"]["p50_ms"], rows["photos_list"]["p99_ms"]
+        )
+        self.assertGreater(rows["photos_list"]["avg_queries"], 0)
+
+    async def test_async_views_counted(self):
+        media = await sync_to_async(MediaFile.objects.create)(
+            user=self.user,
+            file=SimpleUploadedFile("clip.mp4", b"x" * 64),
+            media_type="video",
+        )
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse("media_file", args=[media.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body), 64)
+
+    async def test_overlapping_async_requests_count_their_own_queries(self):
+        import asyncio
+
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        gate, started = asyncio.Event(), []
+
+        async def view(request):
+            for _ in range(request.queries):
+                await sync_to_async(User.objects.count)()
+            started.append(request)
+            if len(started) == 2:
+                gate.set()
+            await gate.wait()  # dono requests ek saath beech me
+            await sync_to_async(User.objects.count)()
+            return HttpResponse()
+
+        middleware = performance.PerformanceMiddleware(view)
+        requests = []
+        for queries in (1, 3):
+            request = RequestFactory().get("/")
+            request.queries = queries
+            requests.append(middleware(request))
+        first, second = await asyncio.gather(*requests)
+        self.assertIn('desc="2 queries"', first["Server-Timing"])
+        self.assertIn('desc="4 queries"', second["Server-Timing"])
+
+        wrappers = await sync_to_async(lambda: list(connection.execute_wrappers))()
+        self.assertEqual(wrappers.count(performance.record_query), 1)
+
+
+@override_settings(
+    MEDIA_ROOT=TEST_MEDIA_ROOT,
+    UPLOAD_STAGING_DIR=os.path.join(TEST_MEDIA_ROOT, "staging"),
+    SLOW_REQUEST_MS=float("inf"),
+)
+class BenchmarkTests(TestCase):
+    def test_every_url_is_benchmarked_with_a_budget(self):
+        from .urls import urlpatterns
+
+        names = {pattern.name for pattern in urlpatterns}
+        self.assertEqual({case.name for case in benchmark.CASES}, names)
+        self.assertEqual(set(benchmark.QUERY_BUDGETS), names)
+
+    def test_query_budgets_hold_as_library_grows(self):
+        fixture = benchmark.seed(users=2, files=24, albums=3, tags=4)
+        small = benchmark.run(fixture, repeat=1)
+        json.dumps(small)  # machine-readable report
+        self.assertEqual(small["over_budget"], [])
+        for result in small["results"]:
+            self.assertLess(result["status"], 400, result)
+
+        # Library 5x - fixed-budget views ki query count bilkul same rahe
+        benchmark.seed_library(fixture.user, files=96, albums=12, tags=16)
+        large = benchmark.run(fixture, repeat=1)
+        self.assertEqual(large["over_budget"], [])
+        for before, after in zip(small["results"], large["results"]):
+            with self.subTest(view=before["name"], params=before["params"]):
+                self.assertEqual(before["queries"], after["queries"])
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ImportMediaTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for path, content in [
+            ("2019/Goa Trip/beach.jpg", b"beach"),
+            ("2019/Goa Trip/waves.MP4", b"waves"),
+            ("Scans/tax.pdf", b"%PDF tax"),
+            ("Scans/beach copy.jpg", b"beach"),  # same content - ek hi baar
+            (".thumbnails/beach.jpg", b"thumb"),
+        ]:
+            path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fh:
+                fh.write(content)
+
+    def import_media(self, *args):
+        out = StringIO()
+        call_command(
+            "import_media", "test", self.root, "--batch-size=2", *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_imports_tree_with_categories_and_restarts(self):
+        other = User.objects.create_user(username="other", password="123")
+        self.client.login(username="other", password="123")
+        self.client.post(
+            reverse("upload"), {"file": SimpleUploadedFile("tax.pdf", b"%PDF tax")}
+        )
+
+        self.assertIn(
+            "Imported 3 files (1 already present, 0 failed)", self.import_media()
+        )
+        media = {m.original_name: m for m in MediaFile.objects.filter(user=self.user)}
+        self.assertEqual(set(media), {"beach.jpg", "waves.MP4", "tax.pdf"})
+        self.assertEqual(media["beach.jpg"].media_type, "photo")
+        self.assertEqual(media["waves.MP4"].media_type, "video")
+        self.assertEqual(media["beach.jpg"].category, "Goa Trip")
+        self.assertEqual(media["tax.pdf"].category, "Scans")
+        with media["beach.jpg"].file.open("rb") as fh:
+            self.assertEqual(fh.read(), b"beach")
+        # Dusre user ka same content - blob share, copy nahi
+        self.assertEqual(media["tax.pdf"].blob.ref_count, 2)
+        self.assertEqual(MediaFile.objects.get(user=other).blob, media["tax.pdf"].blob)
+
+        stats = LibraryStats.objects.get(user=self.user)
+        self.assertEqual((stats.photo_count, stats.document_count), (1, 1))
+        self.assertEqual(
+            Job.objects.filter(name="process_media", user=self.user).count(), 3
+        )
+        results = get_search_backend().search(
+            MediaFile.objects.filter(user=self.user), "beach"
+        )
+        self.assertEqual(list(results), [media["beach.jpg"]])
+
+        self.assertIn("Imported 0 files (4 already present", self.import_media())
+        self.assertEqual(MediaFile.objects.filter(user=self.user).count(), 3)
+
+    def test_folders_as_albums(self):
+        self.import_media("--folders=album", "--workers=1")
+        album = Album.objects.get(user=self.user, name="Goa Trip")
+        self.assertEqual(album.media_count, 2)
+        self.assertIsNotNone(album.cover_id)
+        self.assertEqual(Album.objects.filter(user=self.user).count(), 2)
+        self.assertFalse(MediaFile.objects.exclude(category=None).exists())
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ZipExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        self.album = Album.objects.create(user=self.user, name="Goa")
+        self.files = {}
+        for name, content in [
+            ("beach.jpg", b"beach " * 50),
+            ("beach.jpg", b"other beach " * 40),  # same naam, alag content
+            ("notes.pdf", b"%PDF notes"),
+        ]:
+            self.client.post(
+                reverse("upload"), {"file": SimpleUploadedFile(name, content)}
+            )
+            media = MediaFile.objects.latest("id")
+            self.album.media_files.add(media)
+            self.files[media.pk] = content
+
+    def download(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        body = b"".join(response.streaming_content)
+        if response.status_code in (200, 206):
+            self.assertEqual(int(response["Content-Length"]), len(body))
+        return response, body
+
+    def test_album_zip_contents_and_crc_cache(self):
+        url = reverse("album_download", args=[self.album.pk])
+        response, body = self.download(url)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertIn('filename="Goa.zip"', response["Content-Disposition"])
+
+        with zipfile.ZipFile(BytesIO(body)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.namelist(), ["beach.jpg", "beach (2).jpg", "notes.pdf"])
+            self.assertEqual(
+                [zf.read(name) for name in zf.namelist()], list(self.files.values())
+            )
+        for media in MediaFile.objects.select_related("blob"):
+            self.assertEqual(media.blob.crc32, zlib.crc32(self.files[media.pk]))
+
+        # Dobara: same bytes, same ETag -> 304
+        again, body_again = self.download(url)
+        self.assertEqual(body_again, body)
+        cached = self.client.get(url, headers={"If-None-Match": again["ETag"]})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_range_resume_rebuilds_same_bytes(self):
+        url = reverse("album_download", args=[self.album.pk])
+        _, full = self.download(url)
+        Blob.objects.update(crc32=None)  # resume pe CRC file padh ke banta hai
+
+        for cut in (1, 100, len(full) // 2, len(full) - 5):
+            response, tail = self.download(url, Range=f"bytes={cut}-")
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(full[:cut] + tail, full)
+
+        stale = self.client.get(url, headers={"Range": "bytes=10-", "If-Range": '"x"'})
+        self.assertEqual(stale.status_code, 200)
+        unsatisfiable = self.client.get(url, headers={"Range": f"bytes={len(full)}-"})
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+    async def test_asgi_streams_same_archive(self):
+        url = reverse("album_download", args=[self.album.pk])
+        _, full = await sync_to_async(self.download)(url)
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(url, headers={"Range": "bytes=40-"})
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(body, full[40:])
+
+    def test_zip64_records(self):
+        with patch("gallery.archive.ZIP64_LIMIT", 16):
+            _, body = self.download(reverse("album_download", args=[self.album.pk]))
+        self.assertIn(struct.pack("<I", 0x06064B50), body)
+        with zipfile.ZipFile(BytesIO(body)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.read("notes.pdf"), b"%PDF notes")
+
+    def test_selection_and_search_export_are_owner_only(self):
+        other = User.objects.create_user(username="other", password="123")
+        [theirs] = MediaFile.objects.bulk_create(
+            [MediaFile(user=other, file="x.jpg", size=1)]
+        )
+        ids = [*self.files][:2] + [theirs.pk]
+
+        _, body = self.download(
+            f"{reverse('export_media')}?ids={'&ids='.join(map(str, ids))}"
+        )
+        with zipfile.ZipFile(BytesIO(body)) as zf:
+            self.assertEqual(zf.namelist(), ["beach.jpg", "beach (2).jpg"])
+
+        _, body = self.download(f"{reverse('export_media')}?type=document")
+        with zipfile.ZipFile(BytesIO(body)) as zf:
+            self.assertEqual(zf.namelist(), ["notes.pdf"])
+
+        self.client.login(username="other", password="123")
+        response = self.client.get(reverse("album_download", args=[self.album.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class IngestTests(TestCase):
+    PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 40
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+
+    def upload(self, name, content):
+        self.client.post(reverse("upload"), {"file": SimpleUploadedFile(name, content)})
+        return MediaFile.objects.latest("id")
+
+    def test_sniffs_content_not_extension(self):
+        media = self.upload("scan.pdf", self.PNG)
+        self.assertEqual((media.media_type, media.mime_type), ("photo", "image/png"))
+        self.assertEqual(media.size, len(self.PNG))
+        self.assertEqual(media.blob.mime_type, "image/png")
+
+        # Hash-only upload: bytes nahi aaye, blob ka MIME kaam aata hai
+        media.delete()
+        self.client.post(
+            reverse("upload"), {"sha256": media.blob.sha256, "filename": "copy.bin"}
+        )
+        copy = MediaFile.objects.get(user=self.user, is_deleted=False)
+        self.assertEqual((copy.media_type, copy.mime_type), ("photo", "image/png"))
+
+        # Magic bytes na mile (plain text) to extension wala purana rule
+        self.assertEqual(self.upload("clip.mp4", b"not really").media_type, "video")
+
+    def test_flag_saves_skip_storage(self):
+        media = self.upload("photo.jpg", b"\xff\xd8\xff" + b"x" * 20)
+        album = Album.objects.create(user=self.user, name="Trip")
+        os.remove(media.file.path)  # network storage jaisa: stat = error
+
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse("toggle_favorite", args=[media.pk]))
+        update = next(q["sql"] for q in captured if q["sql"].startswith("UPDATE"))
+        self.assertNotIn('"size"', update)
+
+        self.client.get(reverse("add_to_album", args=[album.pk, media.pk]))
+        self.client.get(reverse("delete_file", args=[media.pk]))
+        self.client.get(reverse("restore_file", args=[media.pk]))
+        media.refresh_from_db()
+        self.assertTrue(media.is_favorite)
+        self.assertFalse(media.is_deleted)
+        self.assertEqual(media.size, 23)
+        album.refresh_from_db()
+        self.assertEqual(album.cover_id, media.pk)
+
+    def test_signatures(self):
+        for header, expected in [
+            (b"\x00\x00\x00\x18ftypmp42", "video/mp4"),
+            (b"\x00\x00\x00\x18ftypheic", "image/heic"),
+            (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+            (b"\x1a\x45\xdf\xa3\x9f\x42\x82\x84webm", "video/webm"),
+            (b"%PDF-1.7", "application/pdf"),
+        ]:
+            self.assertEqual(mime.sniff(header), expected)
+        self.assertIsNone(mime.sniff(b"hello"))
+
+        bmp = b"BM" + struct.pack("<IIII", 70, 0, 54, 40)
+        id3 = b"ID3\x04\x00\x00\x00\x00\x02\x01"
+        self.assertEqual(mime.sniff(bmp), "image/bmp")
+        self.assertEqual(mime.sniff(id3), "audio/mpeg")
+        # Sirf prefix match nahi - text files "BM"/"ID3" se shuru ho sakti hain
+        for header in [
+            b"BMW service notes, 2019 model year",
+            b"BM" + struct.pack("<IIII", 70, 1, 54, 40),  # reserved != 0
+            b"ID3 tags cleanup script",
+            b"ID3\x04\x00\x0f\x00\x00\x02\x01",  # undefined flag bits
+        ]:
+            self.assertIsNone(mime.sniff(header), header)
+        self.assertEqual(
+            mime.mime_type_for("bmw.txt", b"BMW service notes, 2019"), "text/plain"
+        )
+        zipped = b"PK\x03\x04rest"
+        self.assertEqual(
+            mime.mime_type_for("report.docx", zipped),
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        )
+        self.assertEqual(mime.mime_type_for("blob", b"hello"), mime.OCTET_STREAM)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        self.photos = MediaFile.objects.bulk_create(
+            MediaFile(
+                user=self.user, file=f"uploads/{i}.jpg", original_name=f"p{i}.jpg"
+            )
+            for i in range(3)
+        )
+
+    def no_rendering(self):
+        # Cache hit pe thumbnail lookup (template evaluation) hona hi nahi chahiye
+        return patch.object(
+            MediaFile, "derivative_url", side_effect=AssertionError("rendered")
+        )
+
+    def test_tiles_come_from_cache(self):
+        self.client.get(reverse("photos_list"))
+        with self.no_rendering():
+            response = self.client.get(reverse("photos_list"))
+        for photo in self.photos:
+            self.assertContains(response, f'value="{photo.pk}"')
+
+    def test_favorite_and_rename_change_the_card(self):
+        search = reverse("global_search")
+        self.client.get(search)
+        self.assertNotContains(self.client.get(search), "❤️")
+        self.client.get(reverse("toggle_favorite", args=[self.photos[1].pk]))
+        self.assertContains(self.client.get(search), "❤️", count=1)
+
+        MediaFile.objects.filter(pk=self.photos[1].pk).update(
+            original_name="p1 beach.jpg"
+        )
+        self.assertContains(self.client.get(search), "p1 beach.jpg")
+
+    def test_warm_fragments_command(self):
+        out = StringIO()
+        call_command("warm_fragments", "--user=test", stdout=out)
+        self.assertIn("Warmed fragments for 3 files", out.getvalue())
+        with self.no_rendering():
+            response = self.client.get(reverse("photos_list"))
+        self.assertContains(response, "p0.jpg")
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ShardedStorageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="test", password="123")
+
+    def legacy(self, name, content=b"old bytes"):
+        # Sharding se pehle ka row: date folder me file
+        path = os.path.join(TEST_MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(content)
+        [media] = MediaFile.objects.bulk_create(
+            [MediaFile(user=self.user, file=name, size=len(content))]
+        )
+        return media
+
+    def test_new_files_land_in_shards(self):
+        media = MediaFile.objects.create(
+            user=self.user, file=SimpleUploadedFile("IMG_1.jpg", b"x" * 10)
+        )
+        self.assertRegex(
+            media.file.name, r"^uploads/[0-9a-f]{2}/[0-9a-f]{2}/IMG_1.jpg$"
+        )
+        self.assertEqual(media.size, 10)
+
+        name = "uploads/2024/05/01/IMG_1.jpg"
+        self.assertEqual(sharding.shard_name(name), sharding.shard_name(name))
+        self.assertNotEqual(
+            sharding.shard_name(name),
+            sharding.shard_name("uploads/2024/05/02/IMG_1.jpg"),
+        )
+        blob_path = "blobs/ab/cd/" + "ab" * 32 + ".jpg"
+        self.assertEqual(sharding.shard_name(blob_path), blob_path)
+
+    def test_migration_is_resumable(self):
+        media = self.legacy("uploads/2024/05/01/a.jpg")
+        other = self.legacy("uploads/2024/05/01/b.jpg", b"b bytes")
+        target = sharding.shard_name(other.file.name)
+        # Pichhla run file move karke row update se pehle ruk gaya
+        sharding.move_file(other.file.storage, other.file.name, target)
+
+        out = StringIO()
+        call_command("shard_storage", "--batch-size=1", stdout=out)
+        self.assertIn("Moved 2 media files", out.getvalue())
+
+        media.refresh_from_db()
+        other.refresh_from_db()
+        self.assertTrue(sharding.is_sharded(media.file.name))
+        self.assertEqual(other.file.name, target)
+        with media.file.open("rb") as fh:
+            self.assertEqual(fh.read(), b"old bytes")
+        self.assertFalse(
+            os.path.exists(os.path.join(TEST_MEDIA_ROOT, "uploads/2024/05/01/a.jpg"))
+        )
+
+        out = StringIO()
+        call_command("shard_storage", stdout=out)
+        self.assertIn("Moved 0 media files", out.getvalue())
+
+
+@unittest.skipIf(
+    sharding.S3Storage is None or importlib.util.find_spec("moto") is None,
+    "django-storages / moto not installed",
+)
+class ShardedS3StorageTests(TestCase):
+    def test_round_trip_against_moto(self):
+        import boto3
+        from moto import mock_aws
+
+        with mock_aws():
+            boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="vault")
+            storage = sharding.ShardedS3Storage(
+                bucket_name="vault", region_name="us-east-1"
+            )
+            name = storage.generate_filename("uploads/2024/05/01/a.jpg")
+            self.assertTrue(sharding.is_sharded(name))
+            name = storage.save(name, ContentFile(b"s3 bytes"))
+            with storage.open(name, "rb") as fh:
+                self.assertEqual(fh.read(), b"s3 bytes")
+
+            moved = sharding.move_file(storage, name, "uploads/00/00/copy.jpg")
+            self.assertTrue(storage.exists(moved))
+
+
+@unittest.skipUnless(transcoding.available_formats(), "Pillow cannot encode WebP")
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, TRANSCODE_CACHE_DIR=tempfile.mkdtemp())
+class TranscodingTests(TestCase):
+    def setUp(self):
+        from PIL import Image
+
+        transcoding.reset_cache_accounting()
+        self.user = User.objects.create_user(username="test", password="123")
+        self.client.login(username="test", password="123")
+        # Gradient PNG - screenshot jaisa, lossless aur bhaari
+        buf = BytesIO()
+        Image.linear_gradient("L").resize((640, 480)).convert("RGB").save(buf, "PNG")
+        self.png = buf.getvalue()
+        upload = SimpleUploadedFile("shot.png", self.png, content_type="image/png")
+        self.client.post(reverse("upload"), {"file": upload})
+        self.media = MediaFile.objects.get(user=self.user)
+        self.url = reverse("media_file", args=[self.media.pk])
+
+    def tearDown(self):
+        from django.conf import settings
+
+        shutil.rmtree(settings.TRANSCODE_CACHE_DIR, ignore_errors=True)
+
+    def test_accept_negotiation_and_cache_hit(self):
+        from PIL import Image
+
+        accept = "image/avif;q=0,image/webp,image/*,*/*;q=0.8"
+        response = self.client.get(self.url, HTTP_ACCEPT=accept)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("Accept", response["Vary"])
+        self.assertTrue(response["ETag"].endswith('.webp"'))
+        body = b"".join(response.streaming_content)
+        self.assertLess(len(body), len(self.png))
+        self.assertEqual(Image.open(BytesIO(body)).format, "WEBP")
+
+        # Dusri request disk cache se - dobara encode nahi
+        with patch.object(transcoding, "transcode", side_effect=AssertionError):
+            again = self.client.get(self.url, HTTP_ACCEPT=accept)
+            self.assertEqual(b"".join(again.streaming_content), body)
+            cached = self.client.get(
+                self.url, HTTP_ACCEPT=accept, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+            self.assertEqual(cached.status_code, 304)
+
+    def test_original_without_accept_or_for_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("Accept", response["Vary"])
+        self.assertEqual(b"".join(response.streaming_content), self.png)
+
+        download = self.client.get(
+            self.url + "?download=1", HTTP_ACCEPT="image/webp,*/*"
+        )
+        self.assertEqual(download["Content-Type"], "image/png")
+        self.assertNotIn("Accept", download.get("Vary", ""))
+
+    @unittest.skipUnless(
+        "avif" in transcoding.available_formats(), "Pillow cannot encode AVIF"
+    )
+    def test_explicit_format(self):
+        response = self.client.get(transcoding.with_format(self.url, "avif"))
+        self.assertEqual(response["Content-Type"], "image/avif")
+        self.assertEqual(
+            response["Content-Disposition"], 'inline; filename="shot.avif"'
+        )
+
+    def test_picture_sources_in_templates(self):
+        response = self.client.get(reverse("media_detail", args=[self.media.pk]))
+        self.assertContains(
+            response,
+            f'<source type="image/webp" srcset="{self.url}?format=webp">',
+            html=False,
+        )
+        # Thumbnail abhi nahi bana - tile original dikhata hai par use
+        # transcode karne wale <source> nahi
+        tiles = self.client.get(reverse("photos_list"))
+        self.assertContains(tiles, f'src="{self.url}"')
+        self.assertNotContains(tiles, "format=")
+
+        derivatives.generate_derivatives(self.media)
+        thumb = self.media.derivatives.get(size_name="thumb").url
+        tiles = self.client.get(reverse("photos_list"))
+        self.assertContains(
+            tiles, f'<source type="image/webp" srcset="{thumb}&amp;format=webp">'
+        )
+
+    def test_lru_eviction(self):
+        from django.conf import settings
+
+        root = settings.TRANSCODE_CACHE_DIR
+        for i, age in enumerate([300, 100, 200]):
+            path = os.path.join(root, "ab", f"{i}.webp")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fh:
+                fh.write(b"x" * 100)
+            past = timezone.now().timestamp() - age
+            os.utime(path, (past, past))
+
+        self.assertEqual(transcoding.evict(root, 250), 200)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(root, "ab"))), ["1.webp", "2.webp"]
+        )
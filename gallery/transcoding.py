@@ -0,0 +1,184 @@
+# gallery/transcoding.py
+#
+# Photos ke modern formats (AVIF / WebP) pehli request pe banate hain - PNG
+# screenshots aur bina optimize JPEGs se aadhe se bhi kam bytes. Format
+# <picture> ke ?format= se ya Accept header se tay hota hai (serving.py).
+#
+# Variants disk cache me rehte hain (TRANSCODE_CACHE_DIR), key source ka
+# content version (blob hash / derivative checksum) - source badla to naya
+# variant. Size cap LRU se: har hit pe mtime aage, cap paar ho to sabse
+# purane hatte hain.
+
+import mimetypes
+import os
+import tempfile
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow optional hai - bina uske original hi serve hoga
+    Image = None
+
+# Pasand ka order: AVIF sabse chhota, phir WebP
+FORMATS = {
+    "avif": ("image/avif", "AVIF", {"quality": 55}),
+    "webp": ("image/webp", "WEBP", {"quality": 80, "method": 4}),
+}
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024**3
+EVICT_TO = 0.9  # cap paar hone pe 90% tak khaali karo, har write pe scan nahi
+
+for _mime, *_ in FORMATS.values():
+    # Purane Python ke mimetypes me .avif nahi hai - Content-Type isi se
+    mimetypes.add_type(_mime, f".{_mime.split('/')[1]}")
+
+_cache_bytes = None  # is process ka andaza; asli hisaab evict() ka scan
+_cache_lock = threading.Lock()
+
+
+def available_formats():
+    """Formats this Pillow build can encode, in preference order."""
+    if Image is None:
+        return []
+    Image.init()
+    return [fmt for fmt, (_, plugin, _) in FORMATS.items() if plugin in Image.SAVE]
+
+
+def negotiate(accept):
+    # Sirf explicit image/avif / image/webp - "*/*" to purane browsers bhi bhejte hain
+    accepted = set()
+    for part in (accept or "").split(","):
+        mime, *params = [piece.strip() for piece in part.split(";")]
+        quality = next((p[2:] for p in params if p.startswith("q=")), "1")
+        try:
+            if float(quality) > 0:
+                accepted.add(mime.lower())
+        except ValueError:
+            continue
+    for fmt in available_formats():
+        if FORMATS[fmt][0] in accepted:
+            return fmt
+    return None
+
+
+def with_format(url, fmt):
+    return f"{url}{'&' if '?' in url else '?'}format={fmt}"
+
+
+# ====================== DISK CACHE ======================
+def cache_storage():
+    location = getattr(
+        settings,
+        "TRANSCODE_CACHE_DIR",
+        os.path.join(settings.BASE_DIR, "transcode_cache"),
+    )
+    return FileSystemStorage(location=location)
+
+
+def cache_limit():
+    return getattr(settings, "TRANSCODE_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES)
+
+
+def variant_name(key, fmt):
+    return f"{key[:2]}/{key}.{fmt}"
+
+
+def evict(root, limit):
+    """Drop least recently used variants until the cache fits; returns bytes."""
+    entries = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(".tmp"):  # abhi likha ja raha hai
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # dusre process ne abhi hataya
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    if total <= limit:
+        return total
+    for _, size, path in sorted(entries):
+        if total <= limit * EVICT_TO:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
+
+
+def remember_write(root, size):
+    global _cache_bytes
+    with _cache_lock:
+        if _cache_bytes is None:
+            # Pehli write: disk scan (naya variant bhi usme gina gaya)
+            _cache_bytes = evict(root, cache_limit())
+            return
+        _cache_bytes += size
+        if _cache_bytes > cache_limit():
+            _cache_bytes = evict(root, cache_limit())
+
+
+def reset_cache_accounting():
+    global _cache_bytes
+    with _cache_lock:
+        _cache_bytes = None
+
+
+# ====================== TRANSCODE ======================
+def transcode(fieldfile, fmt):
+    """Encoded bytes of fieldfile in fmt, or None if it cannot be converted."""
+    _, plugin, options = FORMATS[fmt]
+    try:
+        with fieldfile.storage.open(fieldfile.name, "rb") as fh:
+            img = Image.open(fh)
+            if getattr(img, "is_animated", False):
+                return None  # animated GIF ka pehla frame bhejna galat hoga
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "RGBA", "L"):
+                has_alpha = img.mode in ("LA", "PA") or "transparency" in img.info
+                img = img.convert("RGBA" if has_alpha else "RGB")
+            buf = BytesIO()
+            img.save(buf, plugin, **options)
+    except (OSError, ValueError):  # corrupt / unsupported image
+        return None
+    return buf.getvalue()
+
+
+def get_variant(fieldfile, key, fmt):
+    """FieldFile-like handle to the cached fmt variant, created on a miss."""
+    if fmt not in available_formats():
+        return None
+    storage = cache_storage()
+    name = variant_name(key, fmt)
+    path = storage.path(name)
+    try:
+        os.utime(path)  # LRU: hit = abhi use hua
+        return VariantFile(storage, name)
+    except FileNotFoundError:
+        pass
+
+    data = transcode(fieldfile, fmt)
+    if data is None:
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Temp file + rename: saath aayi do requests adha likha file na padhen
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+    remember_write(storage.location, len(data))
+    return VariantFile(storage, name)
+
+
+class VariantFile:
+    # serve_file ko bas .storage aur .name chahiye
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
@@ -0,0 +1,109 @@
+# gallery/uploads.py
+#
+# Chunked, resumable upload: init -> PUT chunk (offset ke saath) -> finalize.
+# Chunks seedha staging file me likhe jaate hain; MediaFile row sirf finalize
+# pe banta hai, aur staging file storage me move hoti hai (copy nahi).
+
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+STREAM_BLOCK_SIZE = 64 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_MAX_UPLOAD_SIZE = 50 * 1024**3
+DEFAULT_SESSION_TTL_HOURS = 48
+
+
+def chunk_size():
+    return getattr(settings, "CHUNKED_UPLOAD_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+
+
+def max_upload_size():
+    return getattr(settings, "MAX_UPLOAD_SIZE", DEFAULT_MAX_UPLOAD_SIZE)
+
+
+def session_expiry():
+    # Har chunk pe aage badhta hai - sirf chhode hue sessions expire hote hain
+    hours = getattr(settings, "UPLOAD_SESSION_TTL_HOURS", DEFAULT_SESSION_TTL_HOURS)
+    return timezone.now() + timedelta(hours=hours)
+
+
+def staging_path(session):
+    return os.path.join(settings.UPLOAD_STAGING_DIR, f"{session.pk}.part")
+
+
+def create_staging_file(session):
+    os.makedirs(settings.UPLOAD_STAGING_DIR, exist_ok=True)
+    with open(staging_path(session), "wb") as fh:
+        fh.truncate(session.total_size)  # sparse file, chunks kisi bhi order me
+
+
+def write_chunk(session, offset, stream, length):
+    # Request body ko blocks me padho - poora chunk memory me nahi aata
+    written = 0
+    with open(staging_path(session), "r+b") as fh:
+        fh.seek(offset)
+        while written < length:
+            block = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            fh.write(block)
+            written += len(block)
+    return written
+
+
+def merge_range(ranges, start, end):
+    # [[0, 10], [20, 30]] + (10, 20) -> [[0, 30]]
+    merged = []
+    for lo, hi in sorted([*ranges, [start, end]]):
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+def record_chunk(session_id, start, end):
+    # Parallel chunks: ranges ko row lock ke andar merge karo
+    from .models import UploadSession
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+        session.received = merge_range(session.received, start, end)
+        session.expires_at = session_expiry()
+        session.save(update_fields=["received", "expires_at", "updated_at"])
+    return session
+
+
+def discard_staging_file(session):
+    try:
+        os.remove(staging_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def purge_expired_sessions(now=None):
+    """Delete expired upload sessions and their staging files; returns count."""
+    from .models import UploadSession
+
+    expired = UploadSession.objects.filter(expires_at__lt=now or timezone.now())
+    purged = 0
+    for session in expired.iterator():
+        discard_staging_file(session)
+        session.delete()
+        purged += 1
+    return purged
+
+
+class StagedFile(File):
+    # temporary_file_path() hone se FileSystemStorage file ko move karta hai
+    def __init__(self, path, name):
+        super().__init__(open(path, "rb"), name=name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
@@ -6,6 +6,22 @@ from . import views
 urlpatterns = [
     path("", views.home, name="home"),
     path("upload/", views.upload, name="upload"),
+    path("api/uploads/", views.chunked_upload_init, name="chunked_upload_init"),
+    path(
+        "api/uploads/<uuid:upload_id>/",
+        views.chunked_upload_status,
+        name="chunked_upload_status",
+    ),
+    path(
+        "api/uploads/<uuid:upload_id>/chunk/",
+        views.chunked_upload_chunk,
+        name="chunked_upload_chunk",
+    ),
+    path(
+        "api/uploads/<uuid:upload_id>/finalize/",
+        views.chunked_upload_finalize,
+        name="chunked_upload_finalize",
+    ),
     path("photos/", views.photos_list, name="photos_list"),
     path("videos/", views.videos_list, name="videos_list"),
     path("documents/", views.docs_list, name="docs_list"),
@@ -16,6 +32,7 @@ urlpatterns = [
     path("albums/<int:pk>/edit/", views.album_edit, name="album_edit"),
     path("albums/<int:pk>/delete/", views.album_delete, name="album_delete"),
     path("albums/<int:pk>/", views.album_detail, name="album_detail"),
+    path("albums/<int:pk>/download/", views.album_download, name="album_download"),
     path(
         "albums/<int:album_pk>/add/<int:media_pk>/",
         views.add_to_album,
@@ -27,10 +44,28 @@ urlpatterns = [
         name="remove_from_album",
     ),
     path("search/", views.global_search, name="global_search"),
+    path("download/", views.export_media, name="export_media"),
     path("toggle-favorite/<int:pk>/", views.toggle_favorite, name="toggle_favorite"),
     path("trash/", views.trash_bin, name="trash_bin"),
+    path("duplicates/", views.duplicate_clusters_view, name="duplicate_clusters"),
     path("restore/<int:pk>/", views.restore_file, name="restore_file"),
+    path("trash/empty/", views.empty_trash, name="empty_trash"),
     path("toggle-theme/", views.toggle_dark_mode, name="toggle_theme"),
     path("share/<uuid:token>/", views.public_share, name="public_share"),
+    path("files/<int:pk>/", views.media_file, name="media_file"),
+    path(
+        "files/<int:pk>/<str:size_name>/",
+        views.derivative_file,
+        name="derivative_file",
+    ),
+    path("api/share/<int:pk>/revoke/", views.revoke_share, name="revoke_share"),
+    path("share/<uuid:token>/file/", views.shared_media_file, name="shared_media_file"),
     path("api/share/<int:pk>/", views.share_link, name="share_link"),
+    path("api/media/bulk/", views.bulk_media_action, name="bulk_media_action"),
+    path("api/media/<int:pk>/jobs/", views.media_jobs, name="media_jobs"),
+    path("api/jobs/<int:pk>/", views.job_status, name="job_status"),
+    path("api/perf/", views.perf_stats, name="perf_stats"),
+    path("api/tags/", views.tag_cloud, name="tag_cloud"),
+    path("api/tags/add/", views.bulk_add_tags, name="bulk_add_tags"),
+    path("api/tags/remove/", views.bulk_remove_tags, name="bulk_remove_tags"),
 ]
@@ -2,41 +2,79 @@
 
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.shortcuts import render, get_object_or_404, redirect
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils import timezone
+from django.views.decorators.http import (
+    condition,
+    require_GET,
+    require_http_methods,
+    require_POST,
+)
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
+from asgiref.sync import sync_to_async
 from datetime import datetime
+import os
+import uuid
+from . import bulk, retention
+from .archive import serve_archive
 from .forms import UploadForm, AlbumForm
-from .models import MediaFile, Album
-from django.db.models import Q, Count, Sum
-from django.core.paginator import Paginator
+from .jobs import enqueue
+from .models import MediaFile, MediaDerivative, Album, Job, UploadSession
+from .metadata import filter_by_metadata
+from .pagination import ORDERING, paginate, next_page_url
+from .performance import timing_summary
+from .caching import aget_shared_media, get_shared_media
+from .search import get_backend as get_search_backend
+from .similarity import duplicate_clusters, similar_to
+from .serving import SHARED_MAX_AGE, serve_derivative, serve_media
+from .stats import get_stats
+from .storage import (
+    existing_media_for,
+    fingerprint,
+    ingest,
+    media_from_blob,
+    owned_blob,
+    upload_fingerprint,
+)
+from .tags import add_tags, filter_by_tag, remove_tags, tag_counts
+from .uploads import (
+    StagedFile,
+    chunk_size,
+    create_staging_file,
+    discard_staging_file,
+    max_upload_size,
+    record_chunk,
+    staging_path,
+    write_chunk,
+)
 
 
 @login_required
 def home(request):
-    user_files = MediaFile.objects.filter(user=request.user)
-
-    # Stats
-    photos_count = user_files.filter(media_type="photo").count()
-    videos_count = user_files.filter(media_type="video").count()
-    docs_count = user_files.filter(media_type="document").count()
-    total_size = user_files.aggregate(total=Sum("size"))["total"] or 0
-    total_size_gb = round(total_size / (1024**3), 2)  # Bytes to GB
+    # Stats: ek materialized row (gallery/stats.py), har baar aggregation nahi
+    stats = get_stats(request.user)
+    total_size_gb = round(stats.total_bytes / (1024**3), 2)  # Bytes to GB
 
     # Recent uploads (last 12)
-    recent_uploads = user_files.order_by("-uploaded_at")[:12]
-    type_counts = (
+    recent_uploads = (
         MediaFile.objects.filter(user=request.user, is_deleted=False)
-        .values("media_type")
-        .annotate(count=Count("id"))
+        .order_by("-uploaded_at")
+        .prefetch_related("derivatives")[:12]
     )
 
     context = {
-        "photos_count": photos_count,
-        "videos_count": videos_count,
-        "docs_count": docs_count,
+        "photos_count": stats.photo_count,
+        "videos_count": stats.video_count,
+        "docs_count": stats.document_count,
         "total_size_gb": total_size_gb,
         "recent_uploads": recent_uploads,
-        "type_counts": {item["media_type"]: item["count"] for item in type_counts},
+        "type_counts": {
+            "photo": stats.photo_count,
+            "video": stats.video_count,
+            "document": stats.document_count,
+        },
     }
     return render(request, "gallery/home.html", context)
 
@@ -44,11 +82,22 @@ def home(request):
 @login_required
 def upload(request):
     if request.method == 'POST':
-        form = UploadForm(request.POST, request.FILES)
+        # "Already have it": sirf sha256 aaya, content user ke paas pehle se hai
+        if "file" not in request.FILES and request.POST.get("sha256"):
+            return upload_by_hash(request)
+
+        digest = header = None
+        if "file" in request.FILES:
+            # HashingUploadHandler ne stream hote waqt hi hash + MIME header bana diya
+            digest, header = upload_fingerprint(request)
+        form = UploadForm(request.POST, request.FILES, header=header)
         if form.is_valid():
-            media = form.save(commit=False)
-            media.user = request.user
-            media.save()  # ← yaha category bhi save ho jayegi
+            upload = request.FILES["file"]
+            if existing_media_for(request.user, digest) is None:
+                media = form.save(commit=False)
+                media.user = request.user
+                ingest(media, upload, digest)
+                media.save()  # ← yaha category bhi save ho jayegi
             return redirect('home')
     else:
         form = UploadForm()
@@ -56,14 +105,132 @@ def upload(request):
     return render(request, 'gallery/upload.html', {'form': form})
 
 
+def upload_by_hash(request):
+    digest = request.POST["sha256"].strip().lower()
+    filename = request.POST.get("filename", "")
+    media = existing_media_for(request.user, digest)
+    if media is None:
+        # Trash wali copy chalegi; kisi aur user ka blob nahi - tab bytes
+        # bhejo, dedup server pe ingest() me hota hai
+        blob = owned_blob(request.user, digest)
+        if blob is None or not filename:
+            return JsonResponse({"success": False, "missing": True}, status=404)
+        media = media_from_blob(
+            request.user, blob, filename, request.POST.get("category")
+        )
+    return JsonResponse({"success": True, "media_id": media.pk, "deduplicated": True})
+
+
+# ====================== CHUNKED UPLOAD ======================
+# Bade videos ke liye: init -> PUT chunk?offset=N -> finalize. Beech me
+# connection toote to status dekh ke sirf missing ranges dobara bhejo.
+@login_required
+@require_POST
+def chunked_upload_init(request):
+    filename = os.path.basename(request.POST.get("filename", "")).strip()
+    try:
+        total_size = int(request.POST.get("size", ""))
+    except ValueError:
+        total_size = 0
+    if not filename or total_size <= 0:
+        return JsonResponse({"error": "filename and size are required"}, status=400)
+    if total_size > max_upload_size():
+        # Staging file declared size jitni truncate hoti hai - disk bharne na do
+        return JsonResponse(
+            {"error": "file too large", "max_size": max_upload_size()}, status=413
+        )
+
+    digest = request.POST.get("sha256", "").strip().lower()
+    if digest and owned_blob(request.user, digest) is not None:
+        return upload_by_hash(request)  # bytes bhejne ki zarurat hi nahi
+
+    session = UploadSession.objects.create(
+        user=request.user,
+        filename=filename,
+        category=request.POST.get("category") or None,
+        total_size=total_size,
+    )
+    create_staging_file(session)
+    return JsonResponse({**session.as_json(), "chunk_size": chunk_size()}, status=201)
+
+
+@login_required
+@require_GET
+def chunked_upload_status(request, upload_id):
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    return JsonResponse(session.as_json())
+
+
+@login_required
+@require_http_methods(["PUT"])
+async def chunked_upload_chunk(request, upload_id):
+    # Async: slow clients ke chunks event loop pe, worker thread nahi pakadte
+    user = await request.auser()
+    session = await aget_object_or_404(
+        UploadSession, pk=upload_id, user=user, media__isnull=True
+    )
+    try:
+        offset = int(request.GET.get("offset", ""))
+        length = int(request.headers.get("Content-Length", ""))
+    except ValueError:
+        return JsonResponse({"error": "offset and Content-Length required"}, status=400)
+    if (
+        offset < 0
+        or length <= 0
+        or length > chunk_size()
+        or offset + length > session.total_size
+    ):
+        return JsonResponse({"error": "chunk outside the declared size"}, status=400)
+
+    # Disk write thread me - event loop block nahi hota
+    written = await sync_to_async(write_chunk, thread_sensitive=False)(
+        session, offset, request, length
+    )
+    session = await sync_to_async(record_chunk)(session.pk, offset, offset + written)
+    return JsonResponse(session.as_json())
+
+
+@login_required
+@require_POST
+def chunked_upload_finalize(request, upload_id):
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    if session.media_id:  # dobara finalize = same result
+        return JsonResponse({"success": True, "media_id": session.media_id})
+    if not session.is_complete:
+        return JsonResponse({"success": False, **session.as_json()}, status=409)
+
+    # Normal upload wala hi form - validation aur media_type same rahe
+    staged = StagedFile(staging_path(session), session.filename)
+    try:
+        # Parallel chunks - hash aur MIME sniff ka yahi ek sequential pass
+        digest, header = fingerprint(staged)
+        form = UploadForm(
+            {"category": session.category or ""}, {"file": staged}, header=header
+        )
+        if not form.is_valid():
+            return JsonResponse({"success": False, "errors": form.errors}, status=400)
+        media = existing_media_for(request.user, digest)
+        if media is None:
+            media = form.save(commit=False)
+            media.user = request.user
+            ingest(media, staged, digest)  # naya blob ho to file move hoti hai
+            media.save()
+    finally:
+        staged.close()
+    discard_staging_file(session)
+
+    session.media = media
+    session.save(update_fields=["media", "updated_at"])
+    return JsonResponse({"success": True, "media_id": media.pk})
+
+
 @login_required
 def photos_list(request):
     queryset = MediaFile.objects.filter(
         user=request.user, media_type="photo", is_deleted=False
-    )
+    ).prefetch_related("derivatives")
     queryset = apply_filters(request, queryset)
-    context = {"files": queryset, "title": "Photos", "type": "photo"}
-    return render(request, "gallery/media_list.html", context)
+    return render_media_list(request, queryset, "Photos", "photo")
 
 
 @login_required
@@ -72,8 +239,7 @@ def videos_list(request):
         user=request.user, media_type="video", is_deleted=False
     )
     queryset = apply_filters(request, queryset)
-    context = {"files": queryset, "title": "Videos", "type": "video"}
-    return render(request, "gallery/media_list.html", context)
+    return render_media_list(request, queryset, "Videos", "video")
 
 
 @login_required
@@ -82,7 +248,28 @@ def docs_list(request):
         user=request.user, media_type="document", is_deleted=False
     )
     queryset = apply_filters(request, queryset)
-    context = {"files": queryset, "title": "Documents", "type": "document"}
+    return render_media_list(request, queryset, "Documents", "document")
+
+
+MEDIA_LIST_PAGE_SIZE = 48
+
+
+def render_media_list(request, queryset, title, media_type):
+    page = paginate(queryset, request.GET.get("cursor"), MEDIA_LIST_PAGE_SIZE)
+    context = {
+        "files": page,
+        "title": title,
+        "type": media_type,
+        "next_url": next_page_url(request, page),
+    }
+    if not request.GET.get("fragment"):
+        # Multi-select toolbar ka "Add to album" dropdown
+        context["albums"] = Album.objects.filter(user=request.user).only("name")
+    # Infinite scroll: ?fragment=1 pe sirf tiles bhejo, poora page nahi
+    if request.GET.get("fragment"):
+        response = render(request, "gallery/_media_list_items.html", context)
+        response["X-Next-Url"] = context["next_url"]
+        return response
     return render(request, "gallery/media_list.html", context)
 
 
@@ -91,8 +278,12 @@ def apply_filters(request, queryset):
     start_date = request.GET.get("start_date")
     end_date = request.GET.get("end_date")
 
+    tag = request.GET.get("tag")
+
     if category:
         queryset = queryset.filter(category=category)
+    if tag:
+        queryset = filter_by_tag(queryset, request.user, tag)
     if start_date:
         queryset = queryset.filter(
             uploaded_at__gte=datetime.strptime(start_date, "%Y-%m-%d")
@@ -102,7 +293,8 @@ def apply_filters(request, queryset):
             uploaded_at__lte=datetime.strptime(end_date, "%Y-%m-%d")
         )
 
-    return queryset
+    # Capture date / camera / GPS (EXIF columns)
+    return filter_by_metadata(queryset, request.GET)
 
 
 @login_required
@@ -114,14 +306,44 @@ def delete_file(request, pk):
 
 @login_required
 def media_detail(request, pk):
-    file = get_object_or_404(MediaFile, pk=pk, user=request.user, is_deleted=False)
-    context = {"file": file}
+    file = get_object_or_404(
+        MediaFile.objects.prefetch_related("tags"),
+        pk=pk,
+        user=request.user,
+        is_deleted=False,
+    )
+    # Near-duplicates: phash bands ke index se, poori library scan nahi
+    context = {"file": file, "similar": similar_to(file)}
     return render(request, "gallery/media_detail.html", context)
 
 
+DUPLICATE_CLUSTERS_PER_PAGE = 50
+
+
+@login_required
+def duplicate_clusters_view(request):
+    clusters = duplicate_clusters(request.user)
+    shown = clusters[:DUPLICATE_CLUSTERS_PER_PAGE]
+    found = (
+        MediaFile.objects.order_by()  # dict hai, sort bekaar
+        .prefetch_related("derivatives")
+        .in_bulk([pk for cluster in shown for pk in cluster])
+    )
+    context = {
+        "clusters": [[found[pk] for pk in cluster] for cluster in shown],
+        "total_clusters": len(clusters),
+    }
+    return render(request, "gallery/duplicates.html", context)
+
+
 @login_required
 def album_list(request):
-    albums = Album.objects.filter(user=request.user)
+    # media_count column + cover ek hi query me, album ke hisaab se N+1 nahi
+    albums = (
+        Album.objects.filter(user=request.user)
+        .select_related("cover")
+        .prefetch_related("cover__derivatives")
+    )
     return render(request, "gallery/album_list.html", {"albums": albums})
 
 
@@ -170,7 +392,10 @@ def album_delete(request, pk):
 @login_required
 def album_detail(request, pk):
     album = get_object_or_404(Album, pk=pk, user=request.user)
-    media_in_album = album.media_files.filter(is_deleted=False)
+    # user filter: live index order me chalta hai, album ke rows ka temp sort nahi
+    media_in_album = album.media_files.filter(
+        user=request.user, is_deleted=False
+    ).prefetch_related("derivatives")
 
     # All user media not in this album (for "Add Media" dropdown)
     all_user_media = MediaFile.objects.filter(
@@ -199,7 +424,7 @@ def add_to_album(request, album_pk, media_pk):
     # Set cover if album has no cover
     if not album.cover:
         album.cover = media
-        album.save()
+        album.save(update_fields=["cover"])
 
     return redirect("album_detail", pk=album_pk)
 
@@ -213,76 +438,193 @@ def remove_from_album(request, album_pk, media_pk):
     return redirect("album_detail", pk=album_pk)
 
 
-# ====================== GLOBAL SEARCH (Phase 8) ======================
+# ====================== ZIP EXPORT ======================
+# Archive on the fly stream hota hai (gallery/archive.py) - Range se resume
+@login_required
+@require_GET
+def album_download(request, pk):
+    album = get_object_or_404(Album, pk=pk, user=request.user)
+    return serve_archive(
+        request, album.media_files.filter(is_deleted=False), album.name
+    )
 
 
 @login_required
-def global_search(request):
+@require_GET
+def export_media(request):
+    # Multi-select (?ids=1&ids=2), warna search ka poora result set
+    ids = request.GET.getlist("ids")
+    if ids:
+        media = bulk.owned(request.user, ids).filter(is_deleted=False)
+    else:
+        media, _ = search_results(request)
+    return serve_archive(request, media, "MediaVault export")
+
+
+# ====================== GLOBAL SEARCH (Phase 8) ======================
+
+
+SEARCH_PAGE_SIZE = 12
+
+
+def search_results(request):
+    # global_search aur uska ZIP export - dono me same filters
     query = request.GET.get("q", "").strip()
     media_type = request.GET.get("type")
     category = request.GET.get("category")
-    favorite_only = request.GET.get("favorite") == "1"
+    tag = request.GET.get("tag")
     start_date = request.GET.get("start_date")
     end_date = request.GET.get("end_date")
 
     results = MediaFile.objects.filter(user=request.user, is_deleted=False)
 
+    # Full-text index (SQLite FTS5 / Postgres tsvector), LIKE scan nahi
+    ordering = ORDERING
     if query:
-        results = results.filter(
-            Q(file__icontains=query)
-            | Q(tags__icontains=query)
-            | Q(category__icontains=query)
-        )
+        backend = get_search_backend()
+        results = backend.search(results, query)
+        ordering = backend.ordering
     if media_type:
         results = results.filter(media_type=media_type)
     if category:
         results = results.filter(category=category)
-    if favorite_only:
+    if tag:
+        results = filter_by_tag(results, request.user, tag)
+    if request.GET.get("favorite") == "1":
         results = results.filter(is_favorite=True)
     if start_date:
         results = results.filter(uploaded_at__gte=start_date)
     if end_date:
         results = results.filter(uploaded_at__lte=end_date)
+    return filter_by_metadata(results, request.GET), ordering
 
-    # Pagination for Load More
-    paginator = Paginator(results, 12)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+
+@login_required
+def global_search(request):
+    query = request.GET.get("q", "").strip()
+    media_type = request.GET.get("type")
+    category = request.GET.get("category")
+    tag = request.GET.get("tag")
+    favorite_only = request.GET.get("favorite") == "1"
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
+
+    results, ordering = search_results(request)
+    results = results.prefetch_related("derivatives")
+
+    # Load More: keyset cursor, COUNT(*)/OFFSET ke bina
+    page = paginate(
+        results, request.GET.get("cursor"), SEARCH_PAGE_SIZE, ordering=ordering
+    )
 
     context = {
-        "results": page_obj,
+        "results": page,
         "query": query,
         "media_type": media_type,
         "category": category,
+        "tag": tag,
         "favorite_only": favorite_only,
         "start_date": start_date,
         "end_date": end_date,
-        "has_next": page_obj.has_next(),
+        "taken_from": request.GET.get("taken_from", ""),
+        "taken_to": request.GET.get("taken_to", ""),
+        "camera": request.GET.get("camera", ""),
+        "located": request.GET.get("located") == "1",
+        "has_next": page.has_next,
+        "next_url": next_page_url(request, page),
     }
+    if request.GET.get("fragment"):
+        response = render(request, "gallery/_search_results.html", context)
+        response["X-Next-Url"] = context["next_url"]
+        return response
     return render(request, "gallery/search.html", context)
 
 
+# ====================== TAGS ======================
+@login_required
+@require_GET
+def tag_cloud(request):
+    return JsonResponse({"tags": list(tag_counts(request.user))})
+
+
+@login_required
+@require_POST
+def bulk_add_tags(request):
+    updated = add_tags(
+        request.user, request.POST.getlist("ids"), request.POST.get("tags", "")
+    )
+    return JsonResponse({"updated": updated})
+
+
+@login_required
+@require_POST
+def bulk_remove_tags(request):
+    updated = remove_tags(
+        request.user, request.POST.getlist("ids"), request.POST.get("tags", "")
+    )
+    return JsonResponse({"updated": updated})
+
+
+# ====================== BULK ACTIONS ======================
+@login_required
+@require_POST
+def bulk_media_action(request):
+    # Multi-select: ids + action, ek request me (500 files = 500 requests nahi)
+    action = request.POST.get("action")
+    ids = request.POST.getlist("ids")
+    if action == "add_to_album":
+        album = Album.objects.filter(
+            user=request.user, pk__in=bulk.parse_ids([request.POST.get("album", "")])
+        ).first()
+        if album is None:
+            raise Http404("Album not found")
+        updated = bulk.add_to_album(request.user, album, ids)
+    elif action in bulk.ACTIONS:
+        updated = bulk.ACTIONS[action](request.user, ids)
+    else:
+        return JsonResponse({"error": "Unknown action"}, status=400)
+    return JsonResponse({"action": action, "updated": updated})
+
+
 # ====================== FAVORITE TOGGLE ======================
 @login_required
 def toggle_favorite(request, pk):
     file = get_object_or_404(MediaFile, pk=pk, user=request.user)
     file.is_favorite = not file.is_favorite
-    file.save()
+    file.save(update_fields=["is_favorite"])
     return JsonResponse({"is_favorite": file.is_favorite})
 
 
 # ====================== TRASH BIN ======================
 @login_required
 def trash_bin(request):
-    trash_files = MediaFile.objects.filter(user=request.user, is_deleted=True)
-    return render(request, "gallery/trash.html", {"files": trash_files})
+    trash_files = MediaFile.objects.filter(
+        user=request.user, is_deleted=True
+    ).prefetch_related("derivatives")
+    return render(
+        request,
+        "gallery/trash.html",
+        {"files": trash_files, "retention_days": retention.retention_days()},
+    )
 
 
 @login_required
 def restore_file(request, pk):
     file = get_object_or_404(MediaFile, pk=pk, user=request.user)
-    file.is_deleted = False
-    file.save()
+    file.restore()
+    return redirect("trash_bin")
+
+
+@login_required
+@require_POST
+def empty_trash(request):
+    # Retention ka wait nahi, par purge worker pe - bada trash request ko
+    # na roke
+    enqueue(
+        "empty_trash",
+        {"user_id": request.user.pk, "before": timezone.now().isoformat()},
+        user=request.user,
+    )
     return redirect("trash_bin")
 
 
@@ -302,6 +644,105 @@ def share_link(request, pk):
     return JsonResponse({"share_url": share_url})
 
 
+# ====================== BACKGROUND JOBS ======================
+@login_required
+@require_GET
+def job_status(request, pk):
+    job = get_object_or_404(Job, pk=pk, user=request.user)
+    return JsonResponse(job.as_json())
+
+
+@login_required
+@require_GET
+def media_jobs(request, pk):
+    # Upload ke baad processing kahan tak pahunchi (thumbnails etc.)
+    media = get_object_or_404(MediaFile, pk=pk, user=request.user)
+    jobs = Job.objects.filter(user=request.user, payload__media_id=media.pk)
+    return JsonResponse({"jobs": [job.as_json() for job in jobs.order_by("id")]})
+
+
+# ====================== PERFORMANCE ======================
+@login_required
+@require_GET
+def perf_stats(request):
+    # Per-view latency percentiles (gallery/performance.py) - sirf staff
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return JsonResponse({"views": timing_summary()})
+
+
+# ====================== MEDIA BYTES ======================
+# Async views: ASGI pe bytes event loop se stream hote hain (serving.py),
+# hazaron slow downloads ek process me; WSGI pe bhi same views chalte hain.
+@login_required
+@require_GET
+async def media_file(request, pk):
+    # Owner check ke saath original file; Range requests (video seek) supported
+    user = await request.auser()
+    file = await aget_object_or_404(
+        MediaFile.objects.select_related("blob"), pk=pk, user=user
+    )
+    return await sync_to_async(serve_media, thread_sensitive=False)(
+        request, file, as_attachment="download" in request.GET
+    )
+
+
+@login_required
+@require_GET
+async def derivative_file(request, pk, size_name):
+    user = await request.auser()
+    derivative = await aget_object_or_404(
+        MediaDerivative, media_id=pk, media__user=user, size_name=size_name
+    )
+    return await sync_to_async(serve_derivative, thread_sensitive=False)(
+        request, derivative
+    )
+
+
+@require_GET
+async def shared_media_file(request, token):
+    file = await aget_shared_media(token)
+    if file is None:
+        raise Http404("Share link not found")
+    return await sync_to_async(serve_media, thread_sensitive=False)(
+        request, file, as_attachment="download" in request.GET, shared=True
+    )
+
+
+@login_required
+@require_POST
+def revoke_share(request, pk):
+    # Naya token - purana link (aur uska cache) turant band
+    file = get_object_or_404(MediaFile, pk=pk, user=request.user)
+    file.share_token = uuid.uuid4()
+    file.save(update_fields=["share_token"])
+    return JsonResponse({"revoked": True})
+
+
+def share_page_etag(request, token):
+    file = get_shared_media(token)
+    if file is None:
+        return None
+    # Page navbar/theme viewer pe depend karta hai - woh bhi ETag me
+    viewer = request.user.pk or "anon"
+    theme = request.session.get("theme", "dark")
+    return f'"share-{file.pk}-{file.size}-{viewer}-{theme}"'
+
+
+def share_page_last_modified(request, token):
+    file = get_shared_media(token)
+    return file.uploaded_at if file else None
+
+
+@condition(etag_func=share_page_etag, last_modified_func=share_page_last_modified)
 def public_share(request, token):
-    file = get_object_or_404(MediaFile, share_token=token)
-    return render(request, "gallery/public_share.html", {"file": file})
+    file = get_shared_media(token)
+    if file is None:
+        raise Http404("Share link not found")
+    response = render(request, "gallery/public_share.html", {"file": file})
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    else:
+        patch_cache_control(response, public=True, max_age=SHARED_MAX_AGE)
+    patch_vary_headers(response, ["Cookie"])
+    return response
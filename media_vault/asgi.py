@@ -5,6 +5,31 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+ASGI deployment mode
+--------------------
+Media bytes (``media_file``, ``derivative_file``, ``shared_media_file``) and
+chunk uploads (``chunked_upload_chunk``) are async views. Under ASGI their
+bodies are streamed with async iterators and file reads/writes run in a
+thread pool, so a slow client holds a coroutine, not a worker thread.
+Everything else is a regular sync view and Django runs it in a thread.
+
+Run it with any ASGI server, e.g.::
+
+    pip install uvicorn
+    uvicorn media_vault.asgi:application --host 0.0.0.0 --port 8000 --workers 2
+
+or ``daphne media_vault.asgi:application`` / ``hypercorn media_vault.asgi:application``.
+
+Notes:
+
+* Keep the job worker (``manage.py run_jobs``) as a separate process.
+* ``MEDIA_ACCEL_REDIRECT_PREFIX`` / ``MEDIA_SENDFILE_HEADER`` still apply; with
+  nginx in front the bytes never pass through Python at all.
+* Leave ``CONN_MAX_AGE`` at 0 under ASGI - Django closes connections per
+  request and persistent connections are not reused across async tasks.
+* WSGI (``media_vault/wsgi.py``) keeps working unchanged: the same views run
+  there, streaming with plain iterators / ``FileResponse``.
 """
 
 import os
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "gallery.performance.PerformanceMiddleware",  # sabse bahar - poora time gine
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -54,10 +56,20 @@ ROOT_URLCONF = "media_vault.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "gallery.performance.TimedDjangoTemplates",  # render time bhi
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Compiled templates process me hi rehte hain (har request pe file
+            # parse nahi). runserver template badalne pe khud reset karta hai.
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -81,6 +93,8 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Worker threads + web ek saath likhte hain - lock pe thoda ruko
+        "OPTIONS": {"timeout": 20},
     }
 }
 
@@ -124,6 +138,98 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads tree ka layout (gallery/sharding.py): date folders ki jagah hash
+# shards. Purani files: python manage.py shard_storage (resumable).
+# S3 / MinIO: MEDIA_STORAGE=s3 + AWS_STORAGE_BUCKET_NAME, AWS_S3_ENDPOINT_URL,
+# AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY (pip install django-storages[s3])
+MEDIA_STORAGE = os.environ.get("MEDIA_STORAGE", "local")
+STORAGES = {
+    "default": {
+        "BACKEND": (
+            "gallery.sharding.ShardedS3Storage"
+            if MEDIA_STORAGE == "s3"
+            else "gallery.sharding.ShardedFileSystemStorage"
+        ),
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+if MEDIA_STORAGE == "s3":
+    AWS_STORAGE_BUCKET_NAME = os.environ.get("AWS_STORAGE_BUCKET_NAME", "mediavault")
+    AWS_S3_ENDPOINT_URL = os.environ.get("AWS_S3_ENDPOINT_URL")  # MinIO
+    AWS_DEFAULT_ACL = None
+
+# Upload ke saath hi SHA-256 (content-addressed storage, gallery/storage.py)
+FILE_UPLOAD_HANDLERS = [
+    "gallery.storage.HashingUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+# Chunked uploads: chunks yaha jama hote hain, finalize pe MEDIA_ROOT me move
+UPLOAD_STAGING_DIR = BASE_DIR / "upload_staging"
+CHUNKED_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Init pe declared size isse bada ho to mana (staging file utni badi banti hai)
+MAX_UPLOAD_SIZE = 50 * 1024**3
+# Itne ghante koi chunk na aaye to session + staging file purge_uploads hata deta hai
+UPLOAD_SESSION_TTL_HOURS = 48
+
+# Originals gallery.views.media_file se serve hote hain (owner check + Range).
+# Production me bytes proxy se bhejne ho to inme se ek set karo:
+#   nginx:  MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"  (internal location
+#           jo MEDIA_ROOT pe alias ho)
+#   apache: MEDIA_SENDFILE_HEADER = "X-Sendfile"
+MEDIA_ACCEL_REDIRECT_PREFIX = None
+MEDIA_SENDFILE_HEADER = None
+
+# Photos ke AVIF / WebP variants (gallery/transcoding.py) pehli request pe
+# bante hain aur yahan cache hote hain. Cap paar ho to sabse kam use hue
+# variants hatte hain; directory kabhi bhi saaf kar sakte ho.
+TRANSCODE_CACHE_DIR = BASE_DIR / "transcode_cache"
+TRANSCODE_CACHE_MAX_BYTES = 2 * 1024**3
+
+# Background jobs (gallery/jobs.py): upload ke baad thumbnails wagaira.
+# Worker: python manage.py run_jobs [--threads N] [--processes N]
+# JOBS_EAGER = True ho to job request me hi chal jaata hai (worker ke bina dev)
+JOBS_EAGER = False
+JOB_WORKER_THREADS = 2
+JOB_WORKER_PROCESSES = 1
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 30  # seconds, har retry pe double
+
+# Near-duplicate photos (gallery/similarity.py): dHash bits ka Hamming distance.
+# Max 11 - usse upar multi-index probe sets bahut bade ho jaate hain.
+SIMILAR_PHOTO_THRESHOLD = 8  # media_detail "Similar photos"
+DUPLICATE_PHOTO_THRESHOLD = 3  # duplicates review page
+
+# Trash me files kitne din rehti hain, phir purge_trash hard delete karta hai.
+# Cron/systemd timer se roz chalao: python manage.py purge_trash
+TRASH_RETENTION_DAYS = 30
+
+# Share link lookup kitni der cache me rahe (seconds), see gallery/caching.py.
+# Multi-process deploy me CACHES ko shared backend (redis/memcached) pe rakho,
+# warna revoke dusre workers me timeout tak dikhta rahega.
+SHARE_CACHE_TIMEOUT = 300
+
+# Media cards / grid tiles ka rendered HTML (gallery/fragments.py). Key me
+# content ka version hai, isliye lamba timeout safe hai; warm_fragments
+# deploy ke baad cache pehle se bhar deta hai.
+FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Request instrumentation (gallery/performance.py): har response pe
+# Server-Timing header; isse slow requests "gallery.performance" logger pe
+# JSON me (top SQL ke saath). Per-view percentiles: /api/perf/ (staff only).
+SLOW_REQUEST_MS = 500
+PERF_WINDOW = 500  # percentiles ke liye har view ke last N requests
+PERF_TOP_QUERIES = 5
+
+# Grid thumbnails (name -> longest edge in px), see gallery/derivatives.py
+THUMBNAIL_SIZES = {
+    "thumb": 256,
+    "preview": 1024,
+}
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Auth redirects
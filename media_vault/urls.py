@@ -30,4 +30,6 @@ urlpatterns = [
 
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # MEDIA_URL yahan serve nahi hota: har media byte gallery ke views se
+    # (owner / share token check ke saath) - warna blob / derivative paths
+    # bina login ke khul jaate
@@ -71,28 +71,109 @@ document.addEventListener('DOMContentLoaded', () => {
         return div;
     }
     
+    // Chunked, resumable upload: init -> PUT chunks (parallel) -> finalize
+    const PARALLEL_CHUNKS = 3;
+    const MAX_RETRIES = 5;
+
+    const HASH_LIMIT = 256 * 1024 * 1024;
+
+    async function sha256Hex(file) {
+        // Chhoti files ka hash pehle bhejo - server pe ho to upload hi skip
+        if (!(window.crypto && crypto.subtle) || file.size > HASH_LIMIT) return '';
+        const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+        return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    function csrfToken() {
+        return form.querySelector('[name=csrfmiddlewaretoken]').value;
+    }
+
+    async function api(url, options = {}) {
+        const response = await fetch(url, {
+            ...options,
+            headers: { 'X-CSRFToken': csrfToken(), ...(options.headers || {}) },
+        });
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.error || response.statusText);
+        return data;
+    }
+
+    function missingChunks(session, chunkSize) {
+        // Server ke received ranges se bacha hua hissa nikaalo (resume)
+        const chunks = [];
+        let cursor = 0;
+        const ranges = [...session.received, [session.total_size, session.total_size]];
+        for (const [start, end] of ranges) {
+            for (let offset = cursor; offset < start; offset += chunkSize) {
+                chunks.push([offset, Math.min(offset + chunkSize, start)]);
+            }
+            cursor = Math.max(cursor, end);
+        }
+        return chunks;
+    }
+
+    async function putChunk(uploadId, file, [start, end]) {
+        for (let attempt = 0; ; attempt++) {
+            try {
+                return await api(`/api/uploads/${uploadId}/chunk/?offset=${start}`, {
+                    method: 'PUT',
+                    body: file.slice(start, end),
+                    headers: { 'Content-Type': 'application/octet-stream' },
+                });
+            } catch (error) {
+                if (attempt >= MAX_RETRIES) throw error;
+                await new Promise(r => setTimeout(r, 500 * 2 ** attempt));
+            }
+        }
+    }
+
     async function uploadFile(file) {
-        const formData = new FormData();
-        formData.append('csrfmiddlewaretoken', '{{ csrf_token }}');  // Django CSRF
-        formData.append('file', file);
-        
+        const msg = document.createElement('p');
+        statusMessages.appendChild(msg);
+
         try {
-            const response = await fetch('{% url "upload" %}', {
-                method: 'POST',
-                body: formData,
-                headers: { 'x-requested-with': 'XMLHttpRequest' }
-            });
-            
-            const data = await response.json();
-            const msg = document.createElement('p');
-            msg.textContent = data.success ? `${file.name} uploaded successfully!` : `Error uploading ${file.name}`;
-            msg.className = data.success ? 'text-green-400' : 'text-red-400';
-            statusMessages.appendChild(msg);
+            // Same file dobara drop ho to purana session resume karo
+            const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+            let session = null;
+            const savedId = localStorage.getItem(resumeKey);
+            if (savedId) {
+                session = await api(`/api/uploads/${savedId}/`).catch(() => null);
+            }
+            const body = new FormData();
+            body.append('filename', file.name);
+            body.append('size', file.size);
+            const category = form.querySelector('[name=category]');
+            if (category) body.append('category', category.value);
+            if (!session) body.append('sha256', await sha256Hex(file));
+            const init = session ? null : await api('/api/uploads/', { method: 'POST', body });
+            if (init && init.deduplicated) {
+                msg.textContent = `${file.name} already in your vault!`;
+                msg.className = 'text-green-400';
+                return;
+            }
+            session = session || init;
+            localStorage.setItem(resumeKey, session.upload_id);
+
+            const chunkSize = (init && init.chunk_size) || 8 * 1024 * 1024;
+            const queue = missingChunks(session, chunkSize);
+            const total = queue.length;
+            let done = 0;
+            const worker = async () => {
+                while (queue.length) {
+                    await putChunk(session.upload_id, file, queue.shift());
+                    done++;
+                    msg.textContent = `${file.name}: ${Math.round((done / total) * 100)}%`;
+                }
+            };
+            await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, worker));
+
+            const result = await api(`/api/uploads/${session.upload_id}/finalize/`, { method: 'POST' });
+            localStorage.removeItem(resumeKey);
+            msg.textContent = result.success ? `${file.name} uploaded successfully!` : `Error uploading ${file.name}`;
+            msg.className = result.success ? 'text-green-400' : 'text-red-400';
         } catch (error) {
-            const msg = document.createElement('p');
             msg.textContent = `Upload failed for ${file.name}: ${error}`;
             msg.className = 'text-red-400';
-            statusMessages.appendChild(msg);
         }
     }
 });